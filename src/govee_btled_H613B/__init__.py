@@ -5,13 +5,34 @@ __version__ = "0.0.6"
 
 from bleak_retry_connector import get_device
 
-from .exceptions import CharacteristicMissingError,ConnectionTimeout
+from .exceptions import CharacteristicMissingError,ConnectionTimeout,DaemonError,DeviceUnavailable,ResponseTimeout
 from .govee_btled_H613B import BLEAK_EXCEPTIONS, GoveeInstance
+from .fleet import FleetResult, GoveeFleet
+from .devicecache import DeviceCache
+from .models import DeviceInfo
+from .snapshot import load_snapshot, save_snapshot
+from .polling import PollScheduler
+from .pacing import AdaptiveRateLimiter, TokenBucket, get_adapter_rate_limiter
+from .utils import get_adapter
 
 __all__ = [
+    "AdaptiveRateLimiter",
     "BLEAK_EXCEPTIONS",
     "CharacteristicMissingError",
+    "DeviceCache",
+    "DeviceInfo",
+    "FleetResult",
+    "GoveeFleet",
     "GoveeInstance",
+    "PollScheduler",
+    "TokenBucket",
+    "get_adapter",
+    "get_adapter_rate_limiter",
     "get_device",
-    'ConnectionTimeout'
+    "load_snapshot",
+    "save_snapshot",
+    'ConnectionTimeout',
+    'DaemonError',
+    'DeviceUnavailable',
+    'ResponseTimeout',
 ]
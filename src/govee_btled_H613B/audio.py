@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import wave
+from collections.abc import AsyncIterable, AsyncIterator, Sequence
+from typing import TYPE_CHECKING, Any, Tuple
+
+from .codec import color_frame
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+if TYPE_CHECKING:
+    from .govee_btled_H613B import GoveeInstance
+
+_LOGGER = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024
+
+# Frequency bands driving the red, green and blue channels
+DEFAULT_BANDS = ((20, 250), (250, 2000), (2000, 8000))
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError(
+            'numpy is required for audio streaming, install govee-btled-H613B[audio]'
+        )
+
+
+def _to_mono(samples: Any, channels: int = 1):
+    """ Converts int16 PCM bytes or an array into mono float samples in [-1, 1]. """
+    if isinstance(samples, (bytes, bytearray, memoryview)):
+        samples = np.frombuffer(samples, dtype='<i2')
+    samples = np.asarray(samples)
+    if samples.dtype.kind in 'iu':
+        samples = samples.astype(np.float32) / np.iinfo(samples.dtype).max
+    if samples.ndim == 1 and channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1)
+    return samples.astype(np.float32, copy=False)
+
+
+async def wav_chunks(path: str, chunk_size: int = CHUNK_SIZE, realtime: bool = False) -> AsyncIterator[Any]:
+    """ Yields mono chunks of a 16-bit WAV file, paced like live audio if `realtime`. """
+    _require_numpy()
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError('Only 16-bit WAV files are supported')
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        start = time.monotonic()
+        position = 0
+        while data := wav.readframes(chunk_size):
+            yield _to_mono(data, channels)
+            position += chunk_size
+            if realtime:
+                await asyncio.sleep(max(position / rate - (time.monotonic() - start), 0))
+
+
+def wav_samples(path: str) -> tuple[Any, int]:
+    """ Reads a whole 16-bit WAV file as mono samples and its sample rate. """
+    _require_numpy()
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError('Only 16-bit WAV files are supported')
+        return _to_mono(wav.readframes(wav.getnframes()), wav.getnchannels()), wav.getframerate()
+
+
+class AudioAnalyzer:
+    """
+    Maps PCM chunks to colors.
+
+    Band energies are computed with a windowed FFT, several chunks at once when
+    given a 2D array, and normalised by a slowly decaying peak so the output
+    follows the dynamics of the music rather than its volume. The band energies
+    drive red, green and blue, overall loudness scales the color.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        chunk_size: int = CHUNK_SIZE,
+        bands: Sequence[tuple[float, float]] = DEFAULT_BANDS,
+        decay: float = 0.995,
+        floor: float = 0.05,
+    ) -> None:
+        _require_numpy()
+        if len(bands) != 3:
+            raise ValueError('Exactly three bands are needed, one per color channel')
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.decay = decay
+        self.floor = floor
+        self._window = np.hanning(chunk_size).astype(np.float32)
+        freqs = np.fft.rfftfreq(chunk_size, 1 / sample_rate)
+        self._masks = np.stack(
+            [(freqs >= low) & (freqs < high) for low, high in bands]
+        ).astype(np.float32)
+        self._peak = np.full(3, 1e-9, dtype=np.float32)
+
+    def band_energies(self, chunks: Any):
+        """ Band energies of one chunk, shape (3,), or of a 2D array of chunks, shape (n, 3). """
+        chunks = np.asarray(chunks, dtype=np.float32)
+        single = chunks.ndim == 1
+        chunks = np.atleast_2d(chunks)
+        if chunks.shape[1] != self.chunk_size:
+            padded = np.zeros((chunks.shape[0], self.chunk_size), dtype=np.float32)
+            size = min(self.chunk_size, chunks.shape[1])
+            padded[:, :size] = chunks[:, :size]
+            chunks = padded
+        power = np.abs(np.fft.rfft(chunks * self._window, axis=1)) ** 2
+        energies = np.sqrt(power @ self._masks.T)
+        return energies[0] if single else energies
+
+    def colors(self, energies: Any):
+        """ Normalised (n, 3) uint8 colors for (n, 3) band energies. """
+        energies = np.atleast_2d(energies)
+        colors = np.empty(energies.shape, dtype=np.float32)
+        for index, energy in enumerate(energies):
+            self._peak = np.maximum(self._peak * self.decay, energy)
+            # Quiet bands are not boosted beyond a tenth of the loudest one
+            colors[index] = energy / np.maximum(self._peak, self._peak.max() * 0.1)
+        loudness = colors.mean(axis=1, keepdims=True)
+        colors = np.where(colors < self.floor, 0, colors) * np.clip(loudness * 2, 0, 1)
+        return np.round(colors * 255).astype(np.uint8)
+
+    def render(self, samples: Any) -> list[Tuple[int, int, int]]:
+        """ Offline rendering: one color per chunk of a whole recording. """
+        samples = _to_mono(samples)
+        count = len(samples) // self.chunk_size
+        chunks = samples[:count * self.chunk_size].reshape(count, self.chunk_size)
+        return [tuple(int(x) for x in rgb) for rgb in self.colors(self.band_energies(chunks))]
+
+
+class AudioStream:
+    """
+    Streams colors computed from PCM chunks to a device.
+
+    Only the newest frame is kept while a write is in flight, so the link never
+    queues up stale frames; latency is measured from the arrival of a chunk to
+    the end of the GATT write carrying its frame. Like an AnimationPlayer, a
+    started stream is stopped by cancel(), which the device's setters call.
+    """
+
+    def __init__(self, instance: GoveeInstance, analyzer: AudioAnalyzer) -> None:
+        self.instance = instance
+        self.analyzer = analyzer
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.latencies: list[float] = []
+        self._latest: tuple[bytes, dict, float] | None = None
+        self._ready = asyncio.Event()
+        self._done = False
+        self._task: asyncio.Task | None = None
+        # Set when stopped through cancel() rather than by the end of the audio
+        self.stopped = False
+
+    @property
+    def mean_latency(self) -> float:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    def start(self, source: AsyncIterable[Any] | Any, channels: int = 1) -> asyncio.Task:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(source, channels))
+        return self._task
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self.stopped = True
+            self._task.cancel()
+
+    def done(self) -> bool:
+        return self._task is not None and self._task.done()
+
+    def __await__(self):
+        if self._task is None:
+            raise RuntimeError('Audio stream not started')
+        return self._task.__await__()
+
+    async def run(self, source: AsyncIterable[Any] | Any, channels: int = 1) -> None:
+        """ Streams an async iterator of chunks, or a whole array of samples. """
+        if not hasattr(source, '__aiter__'):
+            source = self._array_chunks(source, channels)
+            # The chunks are downmixed already
+            channels = 1
+        writer = asyncio.create_task(self._writer())
+        try:
+            async for chunk in source:
+                received = time.monotonic()
+                rgb = tuple(int(x) for x in self.analyzer.colors(
+                    self.analyzer.band_energies(_to_mono(chunk, channels))
+                )[0])
+                if self._latest is not None:
+                    self.frames_skipped += 1
+                self._latest = (color_frame(*rgb), {'rgb': rgb, 'color_temp': 0}, received)
+                self._ready.set()
+                # Let the writer pick up the frame
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            # Whatever stopped the stream takes over, the pending frame is dropped
+            self._latest = None
+            raise
+        finally:
+            self._done = True
+            self._ready.set()
+            await writer
+
+    async def _array_chunks(self, samples: Any, channels: int = 1) -> AsyncIterator[Any]:
+        """ Plays an array at the pace of its sample rate, downmixing interleaved channels first. """
+        samples = _to_mono(samples, channels)
+        size = self.analyzer.chunk_size
+        start = time.monotonic()
+        for position in range(0, len(samples) - size + 1, size):
+            yield samples[position:position + size]
+            await asyncio.sleep(max((position + size) / self.analyzer.sample_rate - (time.monotonic() - start), 0))
+
+    async def _writer(self) -> None:
+        while True:
+            if self._latest is None:
+                if self._done:
+                    return
+                await self._ready.wait()
+                self._ready.clear()
+                continue
+            frame, changes, received = self._latest
+            self._latest = None
+            try:
+                await self.instance._write_animation_frame(frame, changes)
+            except Exception as ex:
+                _LOGGER.debug("%s: Audio frame failed: %s", self.instance.name, ex)
+                continue
+            self.frames_sent += 1
+            self.latencies.append(time.monotonic() - received)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+from .const import LedCommand, LedMsgType
+
+
+class _Pending:
+    __slots__ = ('key', 'frame', 'futures', 'barrier')
+
+    def __init__(self, frame: bytes, future: asyncio.Future, barrier: bool) -> None:
+        self.key = (frame[0], frame[1])
+        self.frame = frame
+        self.futures = [future]
+        self.barrier = barrier
+
+
+class CoalescingSendQueue:
+    """
+    Last-write-wins send queue.
+
+    Only the newest pending frame per (LedMsgType, LedCommand) is written, older
+    unsent frames with the same key are dropped and their callers complete
+    together with the frame that replaced them. Power frames act as barriers:
+    they are never coalesced and nothing is moved across them.
+    """
+
+    def __init__(self, send: Callable[[bytes], Awaitable[None]]) -> None:
+        self._send = send
+        self._pending: deque[_Pending] = deque()
+        self._worker: asyncio.Task | None = None
+        self.frames_coalesced = 0
+        self.frames_sent = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def put(self, frame: bytes) -> None:
+        """ Queues a frame and waits until it, or a newer frame replacing it, is sent. """
+        future = asyncio.get_running_loop().create_future()
+        barrier = frame[0] == LedMsgType.COMMAND and frame[1] == LedCommand.POWER
+        if not barrier and self._coalesce(frame, future):
+            self.frames_coalesced += 1
+        else:
+            self._pending.append(_Pending(frame, future, barrier))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        await future
+
+    def _coalesce(self, frame: bytes, future: asyncio.Future) -> bool:
+        key = (frame[0], frame[1])
+        for pending in reversed(self._pending):
+            if pending.barrier:
+                return False
+            if pending.key == key:
+                pending.frame = frame
+                pending.futures.append(future)
+                return True
+        return False
+
+    async def _drain(self) -> None:
+        while self._pending:
+            pending = self._pending.popleft()
+            try:
+                await self._send(pending.frame)
+            except Exception as ex:
+                for future in pending.futures:
+                    if not future.done():
+                        future.set_exception(ex)
+                continue
+            self.frames_sent += 1
+            # Resolve in submission order so the newest caller finishes last
+            for future in pending.futures:
+                if not future.done():
+                    future.set_result(None)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from functools import lru_cache
+
+from .const import LedCommand, LedMode, LedMsgType, LedQuery
+
+_LOGGER = logging.getLogger(__name__)
+
+FRAME_LENGTH = 20
+MAX_PAYLOAD_LENGTH = 17
+
+COLOR_FRAME_CACHE_SIZE = 256
+
+_ZERO_FRAME = bytes(FRAME_LENGTH)
+
+
+def checksum(data) -> int:
+    """ XOR of all bytes; padding zeros do not change the result. """
+    value = 0
+    for b in data:
+        value ^= b
+    return value
+
+
+def encode_into(buffer: bytearray, head: int, cmd: int, payload=b'') -> bytearray:
+    """ Encodes a frame into a preallocated 20-byte buffer and returns it. """
+    size = len(payload)
+    if size > MAX_PAYLOAD_LENGTH:
+        raise ValueError('Payload too long')
+    buffer[:] = _ZERO_FRAME
+    buffer[0] = head
+    buffer[1] = cmd & 0xFF
+    buffer[2:2 + size] = payload
+    buffer[19] = checksum(memoryview(buffer)[:2 + size])
+    return buffer
+
+
+class FrameEncoder:
+    """ Encodes frames reusing a single buffer, so only the result is allocated. """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray(FRAME_LENGTH)
+
+    def encode(self, head: int, cmd: int, payload=b'') -> bytes:
+        return bytes(encode_into(self._buffer, head, cmd, payload))
+
+
+_ENCODER = FrameEncoder()
+encode_frame = _ENCODER.encode
+
+
+def is_valid_frame(frame) -> bool:
+    return len(frame) == FRAME_LENGTH and checksum(frame[:19]) == frame[19]
+
+
+def decode_frame(frame) -> tuple[int, int, bytes]:
+    """ Splits a frame into (head, cmd, payload) after checking its checksum. """
+    if len(frame) != FRAME_LENGTH:
+        raise ValueError(f'Invalid frame length: {len(frame)}')
+    if checksum(frame[:19]) != frame[19]:
+        raise ValueError('Invalid frame checksum')
+    return frame[0], frame[1], bytes(frame[2:19])
+
+
+POWER_FRAMES = (
+    encode_frame(LedMsgType.COMMAND, LedCommand.POWER, b'\x00'),
+    encode_frame(LedMsgType.COMMAND, LedCommand.POWER, b'\x01'),
+)
+
+BRIGHTNESS_FRAMES = tuple(
+    encode_frame(LedMsgType.COMMAND, LedCommand.BRIGHTNESS, bytes((level,)))
+    for level in range(256)
+)
+
+# The queries sent by GoveeInstance.update(), keyed by the reply's command byte
+STATUS_QUERY_FRAMES = {
+    LedCommand.POWER: encode_frame(LedMsgType.KEEP_ALIVE, LedCommand.POWER),
+    LedCommand.COLOR: encode_frame(LedMsgType.KEEP_ALIVE, LedCommand.COLOR, b'\x01'),
+    LedCommand.BRIGHTNESS: encode_frame(LedMsgType.KEEP_ALIVE, LedCommand.BRIGHTNESS),
+}
+
+
+# Queries sent by GoveeInstance.device_info(), keyed by the reply's command byte
+DEVICE_INFO_QUERY_FRAMES = {
+    LedQuery.FIRMWARE_VERSION: encode_frame(LedMsgType.KEEP_ALIVE, LedQuery.FIRMWARE_VERSION),
+    LedQuery.HARDWARE_VERSION: encode_frame(LedMsgType.KEEP_ALIVE, LedQuery.HARDWARE_VERSION, b'\x03'),
+}
+
+
+def decode_version(frame) -> str:
+    """ Version string of a firmware or hardware version reply. """
+    # aa06322e30342e3030... -> 2.04.00, aa0703322e30312e3031... -> 2.01.01
+    payload = bytes(frame[3:19] if frame[1] == LedQuery.HARDWARE_VERSION else frame[2:19])
+    return payload.rstrip(b'\x00').decode('ascii', errors='replace')
+
+
+def power_frame(on: bool) -> bytes:
+    return POWER_FRAMES[bool(on)]
+
+
+def brightness_frame(level: int) -> bytes:
+    return BRIGHTNESS_FRAMES[level]
+
+
+@lru_cache(maxsize=COLOR_FRAME_CACHE_SIZE)
+def color_frame(r: int, g: int, b: int) -> bytes:
+    return encode_frame(LedMsgType.COMMAND, LedCommand.COLOR, bytes((LedMode.MANUAL, r, g, b)))
+
+
+@lru_cache(maxsize=COLOR_FRAME_CACHE_SIZE)
+def color_temp_frame(kelvin: int, r: int, g: int, b: int) -> bytes:
+    """ White frame: the rgb part is ignored, the white shade follows the kelvin value. """
+    return encode_frame(
+        LedMsgType.COMMAND,
+        LedCommand.COLOR,
+        bytes((LedMode.MANUAL, 0xff, 0xff, 0xff, kelvin >> 8, kelvin & 0xFF, r, g, b)),
+    )
+
+
+def _decode_power(data) -> dict | None:
+    return {'power': data[2] == 0x01}
+
+
+def _decode_color(data) -> dict | None:
+    # byte 3 is always LedMode.MANUAL so far
+    if data[2] != LedMode.MANUAL:
+        _LOGGER.warning('Unknown byte 3 seen in COLOR info packet: %s', data[2])
+        return None
+    return {'rgb': (data[3], data[4], data[5]), 'color_temp': data[6] << 8 | data[7]}
+
+
+def _decode_brightness(data) -> dict | None:
+    return {'brightness': data[2]}
+
+
+# Decoders of the status replies, keyed by (msg type, command); each returns
+# the GoveeState fields carried by the frame
+STATE_DECODERS: dict[tuple[int, int], Callable[[bytes], dict | None]] = {
+    (LedMsgType.KEEP_ALIVE, LedCommand.POWER): _decode_power,
+    (LedMsgType.KEEP_ALIVE, LedCommand.COLOR): _decode_color,
+    (LedMsgType.KEEP_ALIVE, LedCommand.BRIGHTNESS): _decode_brightness,
+}
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import colorsys
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from .codec import color_frame
+from .colortemp import PRIMARY_SHADE, hex2rgb, kelvin2rgb, kelvin_table
+from .const import COLOR_TEMP_KELVIN_MAX, COLOR_TEMP_KELVIN_MIN
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+DEFAULT_GAMMA = 2.2
+
+# Highest brightness the app sends, see GoveeInstance.set_brightness
+MAX_BRIGHTNESS = 100
+
+# Conversions return an (n, 3) uint8 array when numpy is installed and a list
+# of (r, g, b) tuples otherwise; both are accepted wherever colors are taken.
+
+
+def gamma_table(gamma: float = DEFAULT_GAMMA) -> bytes:
+    """ Maps each 0-255 channel value to its gamma corrected value. """
+    return bytes(round(255 * (value / 255) ** gamma) for value in range(256))
+
+
+def brightness_table(gamma: float = DEFAULT_GAMMA, max_level: int = MAX_BRIGHTNESS) -> bytes:
+    """
+    Maps a perceived 0-255 brightness to a device brightness up to max_level,
+    only 0 turning the light fully down.
+    """
+    return bytes(
+        0 if value == 0 else max(1, round(max_level * (value / 255) ** gamma))
+        for value in range(256)
+    )
+
+
+GAMMA_TABLE = gamma_table()
+BRIGHTNESS_TABLE = brightness_table()
+
+
+def apply_table(values: Any, table: bytes) -> Any:
+    """ Looks up every 0-255 value, e.g. the rgb rows of a conversion, in a table. """
+    if np is not None:
+        return np.frombuffer(table, dtype=np.uint8)[np.asarray(values, dtype=np.intp)]
+    if values and isinstance(values[0], (tuple, list)):
+        return [tuple(table[x] for x in row) for row in values]
+    return [table[x] for x in values]
+
+
+def _from_chroma(h: Any, c: Any, m: Any) -> Any:
+    """ rgb from hue in [0, 1), chroma and the value added to every channel. """
+    h6 = (h % 1.0) * 6
+    x = c * (1 - np.abs(h6 % 2 - 1))
+    sector = np.floor(h6).astype(np.intp) % 6
+    zero = np.zeros_like(c)
+    # Channel values of each 60 degree sector of the hue
+    r = np.choose(sector, (c, x, zero, zero, x, c))
+    g = np.choose(sector, (x, c, c, x, zero, zero))
+    b = np.choose(sector, (zero, zero, x, c, c, x))
+    rgb = np.stack((r + m, g + m, b + m), axis=-1)
+    return np.round(rgb * 255).astype(np.uint8)
+
+
+def hsv_to_rgb(h: Any, s: Any = 1.0, v: Any = 1.0) -> Any:
+    """ Converts hues, saturations and values in [0, 1], scalars broadcasting. """
+    if np is not None:
+        h, s, v = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (h, s, v)))
+        c = v * s
+        return _from_chroma(np.atleast_1d(h), np.atleast_1d(c), np.atleast_1d(v - c))
+    return [
+        tuple(round(x * 255) for x in colorsys.hsv_to_rgb(*hsv))
+        for hsv in _broadcast(h, s, v)
+    ]
+
+
+def hsl_to_rgb(h: Any, s: Any = 1.0, l: Any = 0.5) -> Any:
+    """ Converts hues, saturations and lightnesses in [0, 1], scalars broadcasting. """
+    if np is not None:
+        h, s, l = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (h, s, l)))
+        c = (1 - np.abs(2 * l - 1)) * s
+        return _from_chroma(np.atleast_1d(h), np.atleast_1d(c), np.atleast_1d(l - c / 2))
+    return [
+        tuple(round(x * 255) for x in colorsys.hls_to_rgb(hue, light, sat))
+        for hue, sat, light in _broadcast(h, s, l)
+    ]
+
+
+def _expand_hex(color: str) -> str:
+    color = color.lstrip('#')
+    if len(color) == 3:
+        color = ''.join(digit * 2 for digit in color)
+    if len(color) != 6:
+        raise ValueError(f'Invalid hex color: {color}')
+    return color
+
+
+def hex_to_rgb(colors: Iterable[str]) -> Any:
+    """ Converts '#rrggbb' or '#rgb' strings. """
+    if np is not None:
+        values = np.fromiter((int(_expand_hex(color), 16) for color in colors), dtype=np.uint32)
+        return np.stack((values >> 16, values >> 8, values), axis=-1).astype(np.uint8)
+    return [hex2rgb(_expand_hex(color)) for color in colors]
+
+
+def rgb_to_hex(rgb: Any) -> list[str]:
+    return ['#%02x%02x%02x' % tuple(row) for row in _rows(rgb)]
+
+
+def rgb_to_hsv(rgb: Any) -> Any:
+    """ Converts rgb rows into (h, s, v) rows of floats in [0, 1]. """
+    if np is not None:
+        rgb = np.atleast_2d(np.asarray(rgb, dtype=np.float64)) / 255
+        v = rgb.max(axis=-1)
+        c = v - rgb.min(axis=-1)
+        r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+        safe_c = np.where(c == 0, 1, c)
+        h = np.select(
+            (c == 0, v == r, v == g),
+            (0.0, ((g - b) / safe_c) % 6, (b - r) / safe_c + 2),
+            (r - g) / safe_c + 4,
+        ) / 6
+        s = np.where(v == 0, 0.0, c / np.where(v == 0, 1, v))
+        return np.stack((h, s, v), axis=-1)
+    return [colorsys.rgb_to_hsv(*(x / 255 for x in row)) for row in _rows(rgb)]
+
+
+def kelvin_to_rgb(kelvins: Any, variant: int = PRIMARY_SHADE) -> Any:
+    """ White shades of color temperatures, see colortemp.kelvin2rgb(). """
+    if np is not None:
+        kelvins = np.round(np.atleast_1d(np.asarray(kelvins, dtype=np.float64))).astype(np.intp)
+        if kelvins.size and (kelvins.min() < COLOR_TEMP_KELVIN_MIN or kelvins.max() > COLOR_TEMP_KELVIN_MAX):
+            raise ValueError(f'Color Temperature value out of range: {kelvins.min()}-{kelvins.max()}')
+        table = np.frombuffer(kelvin_table(variant), dtype=np.uint8).reshape(-1, 3)
+        return table[kelvins - COLOR_TEMP_KELVIN_MIN]
+    if isinstance(kelvins, (int, float)):
+        kelvins = [kelvins]
+    return [tuple(kelvin2rgb(kelvin, variant)) for kelvin in kelvins]
+
+
+def gradient(start: Sequence[int], end: Sequence[int], count: int) -> Any:
+    """ count colors evenly spaced from start to end, both included. """
+    if np is not None:
+        t = np.linspace(0.0, 1.0, count)[:, None]
+        start_array = np.asarray(start, dtype=np.float64)
+        return np.round(start_array + (np.asarray(end, dtype=np.float64) - start_array) * t).astype(np.uint8)
+    return [
+        tuple(round(a + (b - a) * index / max(count - 1, 1)) for a, b in zip(start, end))
+        for index in range(count)
+    ]
+
+
+def color_frames(rgb: Any, table: bytes | None = None) -> list[bytes]:
+    """ COLOR frames for rgb rows, optionally corrected through a table first. """
+    if table is not None:
+        rgb = apply_table(rgb, table)
+    return [color_frame(r, g, b) for r, g, b in _rows(rgb)]
+
+
+def _rows(rgb: Any) -> list:
+    """ rgb rows as lists, a single (r, g, b) row included. """
+    if np is not None and isinstance(rgb, np.ndarray):
+        return np.atleast_2d(rgb).tolist()
+    rows = list(rgb)
+    if rows and not isinstance(rows[0], Iterable):
+        return [rows]
+    return rows
+
+
+def _broadcast(*columns: Any) -> list[tuple]:
+    """ Pure-Python broadcasting of sequences and scalars into rows. """
+    columns = [column if isinstance(column, (int, float)) else list(column) for column in columns]
+    length = max((len(column) for column in columns if isinstance(column, list)), default=1)
+    return list(zip(*(
+        column if isinstance(column, list) else [column] * length for column in columns
+    )))
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from .const import COLOR_TEMP_KELVIN_MAX, COLOR_TEMP_KELVIN_MIN, SHADES_OF_WHITE
+
+# SHADES_OF_WHITE lists two shades per 100 K step. The first one is the shade
+# used by KELVIN2COLOR, the second one is the alternative the app also produces.
+PRIMARY_SHADE = 0
+ALTERNATE_SHADE = 1
+
+_STEP = 100
+
+
+def hex2rgb(color: str) -> tuple[int, int, int]:
+    """ Converts a '#rrggbb' string into a 3-tuple of 0-255 valued ints. """
+    value = int(color.lstrip('#'), 16)
+    return value >> 16, (value >> 8) & 0xFF, value & 0xFF
+
+
+def _anchors(variant: int) -> list[tuple[int, int, int]]:
+    shades: dict[int, list[str]] = {}
+    for color, kelvin in SHADES_OF_WHITE:
+        shades.setdefault(kelvin, []).append(color)
+    return [hex2rgb(shades[kelvin][variant]) for kelvin in sorted(shades)]
+
+
+def _build_table(variant: int) -> bytes:
+    """ Linearly interpolates the 100 K anchors into one rgb triplet per kelvin. """
+    anchors = _anchors(variant)
+    table = bytearray()
+    for kelvin in range(COLOR_TEMP_KELVIN_MIN, COLOR_TEMP_KELVIN_MAX + 1):
+        index, offset = divmod(kelvin - COLOR_TEMP_KELVIN_MIN, _STEP)
+        low = anchors[index]
+        high = anchors[min(index + 1, len(anchors) - 1)]
+        table.extend(
+            round(a + (b - a) * offset / _STEP) for a, b in zip(low, high)
+        )
+    return bytes(table)
+
+
+_TABLES = (_build_table(PRIMARY_SHADE), _build_table(ALTERNATE_SHADE))
+
+
+def kelvin_table(variant: int = PRIMARY_SHADE) -> bytes:
+    """ The rgb bytes of every kelvin from COLOR_TEMP_KELVIN_MIN up, 3 per kelvin. """
+    return _TABLES[variant]
+
+
+def kelvin2rgb(kelvin: int, variant: int = PRIMARY_SHADE) -> bytes:
+    """ Returns the 3 rgb bytes of the white shade for a color temperature. """
+    if not COLOR_TEMP_KELVIN_MIN <= kelvin <= COLOR_TEMP_KELVIN_MAX:
+        raise ValueError(f'Color Temperature value out of range: {kelvin}')
+    offset = (round(kelvin) - COLOR_TEMP_KELVIN_MIN) * 3
+    return _TABLES[variant][offset:offset + 3]
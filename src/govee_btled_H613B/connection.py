@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .govee_btled_H613B import GoveeInstance
+
+DISCONNECT_DELAY = 120
+
+# Connections most adapters hold reliably at once
+CONNECTIONS_PER_ADAPTER = 5
+
+# Seconds after which a connect waiting for a slot looks for an idle holder
+# again, in case a holder became idle without a command finishing
+SLOT_RECHECK = 1.0
+
+MIN_DISCONNECT_DELAY = 10
+MAX_DISCONNECT_DELAY = 600
+
+# Accesses closer together than this belong to the same burst of commands
+BURST_GAP = 2.0
+
+
+class ConnectionPolicy:
+    """
+    Picks the idle disconnect delay of a device from its access pattern.
+
+    The gap between bursts of commands is tracked as a moving average. Devices
+    used regularly stay connected for `factor` times that gap, up to
+    `max_delay`; devices whose next use is further away than that are
+    disconnected after `min_delay` to free the adapter slot. Until a gap has
+    been observed DISCONNECT_DELAY is used.
+    """
+
+    def __init__(
+        self,
+        min_delay: float = MIN_DISCONNECT_DELAY,
+        max_delay: float = MAX_DISCONNECT_DELAY,
+        factor: float = 1.5,
+        smoothing: float = 0.3,
+        prewarm_on_advertisement: bool = False,
+    ) -> None:
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.smoothing = smoothing
+        self.prewarm_on_advertisement = prewarm_on_advertisement
+        self.interval: float | None = None
+        self._last_access: float | None = None
+
+    def record_access(self, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        if self._last_access is not None:
+            gap = now - self._last_access
+            if gap >= BURST_GAP:
+                if self.interval is None:
+                    self.interval = gap
+                else:
+                    self.interval += self.smoothing * (gap - self.interval)
+        self._last_access = now
+
+    def idle_timeout(self) -> float:
+        """Seconds to keep an idle connection open."""
+        if self.interval is None:
+            return DISCONNECT_DELAY
+        expected = self.interval * self.factor
+        if expected > self.max_delay:
+            return self.min_delay
+        return max(self.min_delay, expected)
+
+    def next_access(self) -> float | None:
+        """Predicted time.monotonic() of the next access."""
+        if self.interval is None or self._last_access is None:
+            return None
+        return self._last_access + self.interval
+
+    def should_prewarm(self, now: float | None = None) -> bool:
+        """
+        True if the next access is predicted soon enough for a connection
+        opened now to still be open then. Once the predicted time has passed
+        without an access, nothing is prewarmed until the device is used again.
+        """
+        if not self.prewarm_on_advertisement:
+            return False
+        predicted = self.next_access()
+        if predicted is None:
+            return False
+        now = time.monotonic() if now is None else now
+        return now <= predicted <= now + self.idle_timeout()
+
+
+class ConnectionSlots:
+    """
+    Caps the connections open at once on one bluetooth adapter.
+
+    An instance takes a slot before connecting and keeps it until it
+    disconnects. When every slot is taken, the least recently used idle
+    connection is closed to make room; while all of them are busy, the
+    connect waits.
+    """
+
+    def __init__(self, limit: int = CONNECTIONS_PER_ADAPTER) -> None:
+        if limit < 1:
+            raise ValueError(f'Limit must be at least 1: {limit}')
+        self.limit = limit
+        # Holders and the time they were last used
+        self._holders: dict[GoveeInstance, float] = {}
+        self._waiters: list[asyncio.Future] = []
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._holders)
+
+    def __contains__(self, instance: GoveeInstance) -> bool:
+        return instance in self._holders
+
+    async def acquire(self, instance: GoveeInstance) -> None:
+        """ Waits for a slot, closing the least recently used idle connection if needed. """
+        while instance not in self._holders:
+            if len(self._holders) < self.limit:
+                self._holders[instance] = time.monotonic()
+                return
+            idle = [holder for holder in self._holders if not holder.is_busy]
+            if idle:
+                self.evictions += 1
+                # Disconnecting gives the slot back through release()
+                await min(idle, key=self._holders.__getitem__).disconnect()
+                continue
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait((waiter,), timeout=SLOT_RECHECK)
+            finally:
+                self._waiters.remove(waiter)
+
+    def touch(self, instance: GoveeInstance) -> None:
+        """ Marks the connection of a holder as used now. """
+        if instance in self._holders:
+            self._holders[instance] = time.monotonic()
+
+    def release(self, instance: GoveeInstance) -> None:
+        """ Gives the slot of a disconnected instance back. """
+        if self._holders.pop(instance, None) is not None:
+            self.wake()
+
+    def wake(self) -> None:
+        """ Lets waiting connects check again, e.g. after a holder became idle. """
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
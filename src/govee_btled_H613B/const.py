@@ -12,15 +12,30 @@ class LedCommand(IntEnum):
     BRIGHTNESS = 0x04
     COLOR      = 0x05
 
+class LedQuery(IntEnum):
+    """ Queries for constant device information. """
+    FIRMWARE_VERSION = 0x06
+    HARDWARE_VERSION = 0x07
+
 class LedMode(IntEnum):
     """
     The mode in which a color change happens in.
     
-    Currently only manual is supported.
+    Manual, scenes and DIY are supported.
     """
     MANUAL     = 0x0d
     MICROPHONE = 0x06
     SCENES     = 0x05
+    DIY        = 0x0a
+
+class DiyCommand(IntEnum):
+    """ A DIY packet's type. """
+    PROGRAM = 0x02
+
+class DiyPacket(IntEnum):
+    """ Sequence byte of a multi-packet DIY upload. """
+    START   = 0x00
+    END     = 0xff
 
 
 READ_CHARACTERISTIC_UUIDS = ['00010203-0405-0607-0809-0a0b0c0d2b10']
@@ -0,0 +1,446 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+import os
+import stat
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from bleak import BleakScanner
+from bleak_retry_connector import get_device
+
+from .exceptions import DaemonError
+from .govee_btled_H613B import GoveeInstance
+from .models import GoveeState
+from .utils import get_cached_device
+
+_LOGGER = logging.getLogger(__name__)
+
+SOCKET_PATH_ENV = 'GOVEE_BTLED_SOCKET'
+
+SOCKET_NAME = 'govee_btled_H613B.sock'
+
+FIND_TIMEOUT = 10.0
+
+# Longest request line accepted, in bytes
+MAX_LINE = 64 * 1024
+
+# GoveeInstance methods a client may call on a device
+DEVICE_OPERATIONS = frozenset((
+    'turn_on', 'turn_off', 'set_color', 'set_brightness', 'set_color_temp',
+    'apply', 'update', 'verify_state',
+))
+
+InstanceFactory = Callable[[str], Awaitable[GoveeInstance]]
+
+
+def default_socket_path() -> str:
+    """
+    The socket in the per-user runtime directory, or in a private directory in
+    /tmp without one. Resolved on use, as os.getuid() only exists on Unix.
+    """
+    if path := os.environ.get(SOCKET_PATH_ENV):
+        return path
+    if runtime := os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(runtime, SOCKET_NAME)
+    return os.path.join(_fallback_directory(), SOCKET_NAME)
+
+
+def _fallback_directory() -> str:
+    return f'/tmp/govee_btled_H613B-{os.getuid()}'
+
+
+def _check_private(directory: str) -> None:
+    """ Refuses a directory in /tmp that another user could have created or can enter. """
+    info = os.lstat(directory)
+    if stat.S_ISLNK(info.st_mode) or not stat.S_ISDIR(info.st_mode):
+        raise RuntimeError(f'{directory} is not a directory')
+    if info.st_uid != os.getuid():
+        raise RuntimeError(f'{directory} is owned by another user')
+    if info.st_mode & 0o077:
+        raise RuntimeError(f'{directory} is accessible to other users')
+
+
+def encode_state(state: GoveeState) -> dict[str, Any]:
+    return {
+        'power': state.power,
+        'rgb': list(state.rgb),
+        'color_temp': state.color_temp,
+        'brightness': state.brightness,
+        'verified': state.verified,
+    }
+
+
+def _encode_result(value: Any) -> Any:
+    if isinstance(value, GoveeState):
+        return encode_state(value)
+    if hasattr(value, '__dataclass_fields__'):
+        return {name: getattr(value, name) for name in value.__dataclass_fields__}
+    return value
+
+
+async def find_instance(address: str) -> GoveeInstance:
+    """ Default instance factory: looks the device up among the known and advertising ones. """
+    cached = get_cached_device(address)
+    if cached is not None:
+        return GoveeInstance(*cached)
+    device = await get_device(address) or await BleakScanner.find_device_by_address(
+        address, timeout=FIND_TIMEOUT
+    )
+    if device is None:
+        raise ValueError(f'Device not found: {address}')
+    return GoveeInstance(device)
+
+
+class _Session:
+    """One connected client: its writer and state subscriptions."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.unsubscribe: dict[str, Callable[[], None]] = {}
+
+    def send(self, message: dict[str, Any]) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+
+    def close(self) -> None:
+        for unsubscribe in self.unsubscribe.values():
+            unsubscribe()
+        self.unsubscribe.clear()
+
+
+class GoveeDaemon:
+    """
+    Owns the GoveeInstance of every device and serves them to other processes.
+
+    Clients talk newline-delimited JSON over a Unix socket. A request is
+    {"id": 1, "op": "set_color", "address": "...", "args": [[255, 0, 0]]} and is
+    answered by {"id": 1, "result": ...} or {"id": 1, "error": "...", "type": "..."};
+    subscribed clients also receive {"event": "state", "address": "...",
+    "state": {...}} on every state change. Requests of a client are processed
+    concurrently, so a slow device does not hold up the others.
+
+    Instances are created on first use by `factory`, which makes the daemon
+    testable with simulated devices; handle() serves any pair of streams.
+    """
+
+    def __init__(self, factory: InstanceFactory = find_instance, path: str | None = None) -> None:
+        self.factory = factory
+        self.path = path or default_socket_path()
+        self.instances: dict[str, GoveeInstance] = {}
+        self._creating: dict[str, asyncio.Task] = {}
+        self._sessions: set[_Session] = set()
+        self._server: asyncio.AbstractServer | None = None
+
+    async def instance(self, address: str) -> GoveeInstance:
+        address = address.upper()
+        if address in self.instances:
+            return self.instances[address]
+        # Concurrent requests for a new device share a single factory call
+        if address not in self._creating:
+            self._creating[address] = asyncio.ensure_future(self.factory(address))
+        try:
+            instance = await asyncio.shield(self._creating[address])
+        finally:
+            task = self._creating.get(address)
+            if task is not None and task.done():
+                del self._creating[address]
+        self.instances[address] = instance
+        return instance
+
+    async def start(self) -> None:
+        """
+        Listens on the socket; refuses to when another daemon already answers
+        there or when the fallback directory in /tmp is not private, and replaces
+        the socket file when it is left over from one that died.
+        """
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # An existing fallback directory may have been planted by another user
+        if os.name == 'posix' and directory == _fallback_directory():
+            _check_private(directory)
+        if os.path.exists(self.path):
+            try:
+                _reader, writer = await asyncio.open_unix_connection(self.path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                _LOGGER.debug('Removing stale socket %s', self.path)
+                os.unlink(self.path)
+            else:
+                writer.close()
+                raise RuntimeError(f'Another daemon is listening on {self.path}')
+        # The socket is created accessible to the owner only, not chmod-ed after binding
+        umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(self.handle, self.path, limit=MAX_LINE)
+        finally:
+            os.umask(umask)
+        _LOGGER.info('Listening on %s', self.path)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        for session in list(self._sessions):
+            session.close()
+            session.writer.close()
+        await asyncio.gather(
+            *(instance.disconnect() for instance in self.instances.values()),
+            return_exceptions=True,
+        )
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Serves one client until it disconnects. """
+        session = _Session(writer)
+        self._sessions.add(session)
+        pending: set[asyncio.Task] = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self._respond(session, line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (ConnectionError, ValueError) as ex:
+            _LOGGER.debug('Client connection failed: %s', ex)
+        finally:
+            for task in pending:
+                task.cancel()
+            session.close()
+            self._sessions.discard(session)
+            writer.close()
+
+    async def _respond(self, session: _Session, line: bytes) -> None:
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            result = await self.execute(session, request)
+            session.send({'id': request_id, 'result': _encode_result(result)})
+        except Exception as ex:
+            session.send({'id': request_id, 'error': str(ex), 'type': type(ex).__name__})
+        try:
+            await session.writer.drain()
+        except ConnectionError:
+            pass
+
+    async def execute(self, session: _Session | None, request: dict[str, Any]) -> Any:
+        """ Runs a decoded request; subscriptions need a session. """
+        op = request.get('op')
+        args = request.get('args', [])
+        kwargs = request.get('kwargs', {})
+        if op == 'ping':
+            return 'pong'
+        if op == 'devices':
+            return {address: encode_state(instance.state) for address, instance in self.instances.items()}
+        address = request.get('address')
+        if not isinstance(address, str):
+            raise ValueError('Missing device address')
+        instance = await self.instance(address)
+        if op == 'state':
+            return instance.state
+        if op == 'device_info':
+            return await instance.device_info()
+        if op == 'subscribe':
+            if session is None:
+                raise ValueError('Subscriptions need a client connection')
+            self._subscribe(session, instance)
+            return instance.state
+        if op == 'unsubscribe':
+            if session is not None and instance.address in session.unsubscribe:
+                session.unsubscribe.pop(instance.address)()
+            return None
+        if op not in DEVICE_OPERATIONS:
+            raise ValueError(f'Unknown operation: {op}')
+        if op in ('set_color', 'apply'):
+            args = [tuple(arg) if isinstance(arg, list) else arg for arg in args]
+            kwargs = {name: tuple(value) if isinstance(value, list) else value for name, value in kwargs.items()}
+        return await getattr(instance, op)(*args, **kwargs)
+
+    def _subscribe(self, session: _Session, instance: GoveeInstance) -> None:
+        if instance.address in session.unsubscribe:
+            return
+        address = instance.address
+
+        def _on_change(state: GoveeState) -> None:
+            session.send({'event': 'state', 'address': address, 'state': encode_state(state)})
+
+        session.unsubscribe[address] = instance.register_callback(_on_change)
+
+
+class DaemonClient:
+    """
+    Client of a GoveeDaemon.
+
+    Calls may be issued concurrently; replies are matched by request id and
+    state events are handed to the callbacks given to subscribe(), which may be
+    coroutine functions. A failing callback or malformed message is logged and
+    does not stop the client.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path or default_socket_path()
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._subscribers: dict[str, list[Callable[[str, dict[str, Any]], Any]]] = {}
+        self._read_task: asyncio.Task | None = None
+        self._callback_tasks: set[asyncio.Task] = set()
+
+    async def connect(self) -> None:
+        reader, writer = await asyncio.open_unix_connection(self.path, limit=MAX_LINE)
+        self.attach(reader, writer)
+
+    def attach(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Uses an already open pair of streams, e.g. an in-memory transport. """
+        self._reader = reader
+        self._writer = writer
+        self._read_task = asyncio.create_task(self._read())
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._read_task is not None:
+            await asyncio.gather(self._read_task, return_exceptions=True)
+        for task in self._callback_tasks:
+            task.cancel()
+        await asyncio.gather(*self._callback_tasks, return_exceptions=True)
+
+    async def __aenter__(self) -> DaemonClient:
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def _read(self) -> None:
+        assert self._reader is not None
+        try:
+            while line := await self._reader.readline():
+                try:
+                    self._handle(json.loads(line))
+                except (ValueError, TypeError, KeyError, AttributeError) as ex:
+                    _LOGGER.warning('Ignoring malformed message from the daemon: %s', ex)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('Daemon connection closed'))
+            self._pending.clear()
+
+    def _handle(self, message: dict[str, Any]) -> None:
+        if 'event' in message:
+            self._dispatch(message['address'], message['state'])
+            return
+        future = self._pending.pop(message.get('id'), None)
+        if future is None or future.done():
+            return
+        if 'error' in message:
+            future.set_exception(DaemonError(message.get('type', 'Exception'), message['error']))
+        else:
+            future.set_result(message.get('result'))
+
+    def _dispatch(self, address: str, state: dict[str, Any]) -> None:
+        """ Hands a state event to the subscribers; coroutines run as tasks, so they may call the daemon. """
+        for callback in list(self._subscribers.get(address, ())):
+            try:
+                result = callback(address, state)
+            except Exception:
+                _LOGGER.exception('Error in state callback for %s', address)
+                continue
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                self._callback_tasks.add(task)
+                task.add_done_callback(self._callback_done)
+
+    def _callback_done(self, task: asyncio.Task) -> None:
+        self._callback_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.error('Error in state callback', exc_info=task.exception())
+
+    async def call(self, op: str, address: str | None = None, *args: Any, **kwargs: Any) -> Any:
+        if self._writer is None:
+            raise ConnectionError('Not connected to the daemon')
+        request_id = next(self._ids)
+        request: dict[str, Any] = {'id': request_id, 'op': op}
+        if address is not None:
+            request['address'] = address
+        if args:
+            request['args'] = args
+        if kwargs:
+            request['kwargs'] = kwargs
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(json.dumps(request, separators=(',', ':')).encode() + b'\n')
+        await self._writer.drain()
+        return await future
+
+    async def subscribe(self, address: str, callback: Callable[[str, dict[str, Any]], Any]) -> dict[str, Any]:
+        """ Calls callback(address, state) on every state change; returns the current state. """
+        address = address.upper()
+        self._subscribers.setdefault(address, []).append(callback)
+        return await self.call('subscribe', address)
+
+    async def unsubscribe(self, address: str) -> None:
+        address = address.upper()
+        self._subscribers.pop(address, None)
+        await self.call('unsubscribe', address)
+
+    async def state(self, address: str) -> dict[str, Any]:
+        return await self.call('state', address)
+
+    async def devices(self) -> dict[str, dict[str, Any]]:
+        return await self.call('devices')
+
+    async def turn_on(self, address: str) -> None:
+        await self.call('turn_on', address)
+
+    async def turn_off(self, address: str) -> None:
+        await self.call('turn_off', address)
+
+    async def set_color(self, address: str, rgb: tuple[int, int, int]) -> None:
+        await self.call('set_color', address, rgb)
+
+    async def set_brightness(self, address: str, intensity: int) -> None:
+        await self.call('set_brightness', address, intensity)
+
+    async def set_color_temp(self, address: str, color_temp: int) -> None:
+        await self.call('set_color_temp', address, color_temp)
+
+    async def update(self, address: str, **kwargs: Any) -> dict[str, Any]:
+        return await self.call('update', address, **kwargs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serve H613B devices over a Unix socket')
+    parser.add_argument('--socket', help=f'socket path, default ${SOCKET_PATH_ENV} or {SOCKET_NAME} in $XDG_RUNTIME_DIR')
+    parser.add_argument('--debug', action='store_true')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+
+    async def _serve() -> None:
+        daemon = GoveeDaemon(path=args.socket)
+        try:
+            await daemon.serve_forever()
+        finally:
+            await daemon.close()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+import os
+from contextlib import contextmanager
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from .utils import atomic_write
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+_LOGGER = logging.getLogger(__name__)
+
+CACHE_PATH_ENV = 'GOVEE_BTLED_CACHE'
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'govee_btled_H613B',
+    'devices.json',
+)
+
+
+class DeviceCache:
+    """
+    Per-address cache, kept in a JSON file, of what never changes on a device:
+    its firmware and hardware versions.
+
+    The file is read on first use. Writes merge into the current file content
+    under an exclusive lock and replace it atomically, so several processes can
+    share one cache. The async_ methods do the file I/O in the default
+    executor, off the event loop. When the file cannot be used, e.g. on a
+    read-only home, the cache is kept in memory only.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path or os.environ.get(CACHE_PATH_ENV) or DEFAULT_CACHE_PATH
+        self._entries: dict[str, dict[str, Any]] | None = None
+        self.in_memory = False
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self) -> dict[str, dict[str, Any]]:
+        try:
+            with open(self.path) as file:
+                entries = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as ex:
+            _LOGGER.warning('Ignoring unreadable device cache %s: %s', self.path, ex)
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self, entries: dict[str, dict[str, Any]]) -> None:
+        atomic_write(self.path, json.dumps(entries, indent=1, sort_keys=True).encode())
+
+    def _fall_back(self, ex: OSError) -> None:
+        if not self.in_memory:
+            _LOGGER.warning('Keeping the device cache in memory, %s is unusable: %s', self.path, ex)
+        self.in_memory = True
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self._entries is None:
+            try:
+                with self._locked(exclusive=False):
+                    self._entries = self._read()
+            except OSError as ex:
+                self._fall_back(ex)
+                self._entries = {}
+        return self._entries
+
+    def _change(self, change: Callable[[dict[str, dict[str, Any]]], None]) -> None:
+        """Applies a change to the file content, or only in memory once the file is unusable."""
+        if not self.in_memory:
+            try:
+                with self._locked(exclusive=True):
+                    entries = self._read()
+                    change(entries)
+                    self._write(entries)
+            except OSError as ex:
+                self._fall_back(ex)
+            else:
+                self._entries = entries
+                return
+        change(self._load())
+
+    def get(self, address: str) -> dict[str, Any]:
+        """The cached fields of a device, empty if unknown."""
+        return dict(self._load().get(address.upper(), {}))
+
+    def update(self, address: str, **fields: Any) -> None:
+        """Stores fields of a device, keeping the ones written by other processes."""
+        address = address.upper()
+
+        def _merge(entries: dict[str, dict[str, Any]]) -> None:
+            entries[address] = {**entries.get(address, {}), **fields}
+
+        self._change(_merge)
+
+    def invalidate(self, address: str) -> None:
+        """Forgets everything cached about a device."""
+        address = address.upper()
+        if address not in self._load():
+            return
+        self._change(lambda entries: entries.pop(address, None))
+
+    async def async_get(self, address: str) -> dict[str, Any]:
+        if self._entries is not None:
+            return self.get(address)
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, address)
+
+    async def async_update(self, address: str, **fields: Any) -> None:
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self.update, address, **fields)
+        )
+
+    async def async_invalidate(self, address: str) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.invalidate, address)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any
+
+from .models import GoveeState
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class SubscriberStats:
+    """Delivery statistics of a single callback."""
+
+    calls: int = 0
+    errors: int = 0
+    # Updates merged into a later delivery instead of being delivered on their own
+    coalesced: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+class _Subscriber:
+    """A callback and how it wants to be called."""
+
+    def __init__(
+        self,
+        callback: Callable[..., Any],
+        with_changes: bool,
+        executor: Executor | bool | None,
+        min_interval: float | None,
+    ) -> None:
+        self.callback = callback
+        self.with_changes = with_changes
+        self.is_coroutine = asyncio.iscoroutinefunction(callback)
+        self.executor = executor
+        self.min_interval = min_interval
+        self.stats = SubscriberStats()
+        self.last_delivery = float("-inf")
+        self.busy = False
+        self.timer: asyncio.TimerHandle | None = None
+        self.pending: tuple[GoveeState, dict] | None = None
+
+    @property
+    def inline(self) -> bool:
+        return not self.is_coroutine and not self.executor
+
+    def args(self, state: GoveeState, changes: dict) -> tuple:
+        return (state, changes) if self.with_changes else (state,)
+
+
+class CallbackDispatcher:
+    """
+    Delivers state updates to the registered callbacks.
+
+    Plain callables run inline, coroutine functions run as tasks and, with
+    `executor`, blocking callables run in a thread pool. Tasks and executor
+    calls never overlap for a subscriber: updates arriving meanwhile are merged
+    and delivered once the running call is done. With `min_interval` a
+    subscriber receives at most one update per interval, carrying the latest
+    state and every field changed since its previous delivery.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: list[_Subscriber] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    def subscribe(
+        self,
+        callback: Callable[..., Any],
+        with_changes: bool = False,
+        executor: Executor | bool | None = None,
+        min_interval: float | None = None,
+    ) -> Callable[[], None]:
+        subscriber = _Subscriber(callback, with_changes, executor, min_interval)
+        self._subscribers.append(subscriber)
+
+        def unsubscribe() -> None:
+            if subscriber.timer:
+                subscriber.timer.cancel()
+            self._subscribers.remove(subscriber)
+
+        return unsubscribe
+
+    @property
+    def stats(self) -> dict[Callable[..., Any], SubscriberStats]:
+        return {subscriber.callback: subscriber.stats for subscriber in self._subscribers}
+
+    def dispatch(self, state: GoveeState, changes: dict) -> None:
+        for subscriber in self._subscribers:
+            if subscriber.pending is not None:
+                # A delivery is already scheduled: merge into it
+                subscriber.stats.coalesced += 1
+                subscriber.pending = (state, {**subscriber.pending[1], **changes})
+                continue
+            self._schedule(subscriber, state, changes)
+
+    def _schedule(self, subscriber: _Subscriber, state: GoveeState, changes: dict) -> None:
+        if subscriber.busy:
+            subscriber.pending = (state, changes)
+            return
+        if subscriber.min_interval:
+            wait = subscriber.last_delivery + subscriber.min_interval - time.monotonic()
+            if wait > 0:
+                subscriber.pending = (state, changes)
+                subscriber.timer = asyncio.get_running_loop().call_later(
+                    wait, self._flush, subscriber
+                )
+                return
+        self._deliver(subscriber, state, changes)
+
+    def _flush(self, subscriber: _Subscriber) -> None:
+        subscriber.timer = None
+        if subscriber.pending is None or subscriber not in self._subscribers:
+            return
+        state, changes = subscriber.pending
+        subscriber.pending = None
+        self._schedule(subscriber, state, changes)
+
+    def _deliver(self, subscriber: _Subscriber, state: GoveeState, changes: dict) -> None:
+        subscriber.last_delivery = time.monotonic()
+        args = subscriber.args(state, changes)
+        if subscriber.inline:
+            start = time.perf_counter()
+            try:
+                subscriber.callback(*args)
+            except Exception:
+                subscriber.stats.errors += 1
+                _LOGGER.exception("Error in state callback %s", subscriber.callback)
+            self._record(subscriber, time.perf_counter() - start)
+            return
+        subscriber.busy = True
+        task = asyncio.create_task(self._deliver_async(subscriber, args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver_async(self, subscriber: _Subscriber, args: tuple) -> None:
+        start = time.perf_counter()
+        try:
+            if subscriber.is_coroutine:
+                await subscriber.callback(*args)
+            else:
+                executor = None if subscriber.executor is True else subscriber.executor
+                await asyncio.get_running_loop().run_in_executor(
+                    executor, subscriber.callback, *args
+                )
+        except Exception:
+            subscriber.stats.errors += 1
+            _LOGGER.exception("Error in state callback %s", subscriber.callback)
+        finally:
+            self._record(subscriber, time.perf_counter() - start)
+            subscriber.busy = False
+        if subscriber.timer is None:
+            self._flush(subscriber)
+
+    @staticmethod
+    def _record(subscriber: _Subscriber, elapsed: float) -> None:
+        stats = subscriber.stats
+        stats.calls += 1
+        stats.total_time += elapsed
+        if elapsed > stats.max_time:
+            stats.max_time = elapsed
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import colorsys
+from abc import ABC, abstractmethod
+import logging
+import math
+from bisect import bisect_right
+from collections.abc import Callable, Sequence
+from typing import TYPE_CHECKING, Tuple
+
+from .codec import brightness_frame, color_frame, color_temp_frame
+from .colortemp import kelvin2rgb
+
+if TYPE_CHECKING:
+    from .govee_btled_H613B import GoveeInstance
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_FPS = 20
+
+# Number of frames rendered ahead of time
+RENDER_BATCH = 32
+
+Easing = Callable[[float], float]
+
+
+def linear(t: float) -> float:
+    return t
+
+
+def ease_in_out(t: float) -> float:
+    return 0.5 - math.cos(math.pi * t) / 2
+
+
+def _lerp(a: int, b: int, t: float) -> int:
+    return round(a + (b - a) * t)
+
+
+def _lerp_rgb(a: Tuple[int, int, int], b: Tuple[int, int, int], t: float) -> Tuple[int, int, int]:
+    return _lerp(a[0], b[0], t), _lerp(a[1], b[1], t), _lerp(a[2], b[2], t)
+
+
+class Animation(ABC):
+    """
+    A curve over time rendered into frames.
+
+    Subclasses implement frame_at(), returning the frame and the state changes
+    for a progress between 0 and 1.
+    """
+
+    def __init__(self, duration: float, easing: Easing = linear) -> None:
+        if duration <= 0:
+            raise ValueError(f'Animation duration must be positive: {duration}')
+        self.duration = duration
+        self.easing = easing
+
+    @abstractmethod
+    def frame_at(self, progress: float) -> tuple[bytes, dict]:
+        """The frame and state changes at a progress between 0 and 1."""
+
+    def render(self, fps: float, start: int, count: int) -> list[tuple[bytes, dict]]:
+        """Renders `count` frames starting at frame index `start`."""
+        total = self.frame_count(fps)
+        return [
+            self.frame_at(self.easing(min(index / fps / self.duration, 1.0)))
+            for index in range(start, min(start + count, total))
+        ]
+
+    def frame_count(self, fps: float) -> int:
+        """Frames at `fps`, the last one landing exactly on the end."""
+        return math.ceil(self.duration * fps) + 1
+
+
+class Fade(Animation):
+    def __init__(self, start: Tuple[int, int, int], end: Tuple[int, int, int], duration: float, easing: Easing = linear) -> None:
+        super().__init__(duration, easing)
+        self.start = start
+        self.end = end
+
+    def frame_at(self, progress: float) -> tuple[bytes, dict]:
+        rgb = _lerp_rgb(self.start, self.end, progress)
+        return color_frame(*rgb), {'rgb': rgb, 'color_temp': 0}
+
+
+class BrightnessFade(Animation):
+    def __init__(self, start: int, end: int, duration: float, easing: Easing = linear) -> None:
+        super().__init__(duration, easing)
+        self.start = start
+        self.end = end
+
+    def frame_at(self, progress: float) -> tuple[bytes, dict]:
+        brightness = _lerp(self.start, self.end, progress)
+        return brightness_frame(brightness), {'brightness': brightness}
+
+
+class ColorWheel(Animation):
+    """Sweeps the hue, `turns` times around the wheel."""
+
+    def __init__(self, duration: float, turns: float = 1, saturation: float = 1, value: float = 1, hue: float = 0, easing: Easing = linear) -> None:
+        super().__init__(duration, easing)
+        self.turns = turns
+        self.saturation = saturation
+        self.value = value
+        self.hue = hue
+
+    def frame_at(self, progress: float) -> tuple[bytes, dict]:
+        hue = (self.hue + self.turns * progress) % 1
+        rgb = tuple(round(x * 255) for x in colorsys.hsv_to_rgb(hue, self.saturation, self.value))
+        return color_frame(*rgb), {'rgb': rgb, 'color_temp': 0}
+
+
+class KelvinRamp(Animation):
+    def __init__(self, start: int, end: int, duration: float, easing: Easing = linear) -> None:
+        super().__init__(duration, easing)
+        kelvin2rgb(start)
+        kelvin2rgb(end)
+        self.start = start
+        self.end = end
+
+    def frame_at(self, progress: float) -> tuple[bytes, dict]:
+        kelvin = _lerp(self.start, self.end, progress)
+        return color_temp_frame(kelvin, *kelvin2rgb(kelvin)), {'color_temp': kelvin, 'rgb': (0xff, 0xff, 0xff)}
+
+
+class Keyframes(Animation):
+    """Interpolates between (seconds, rgb) keyframes, `easing` applied per segment."""
+
+    def __init__(self, keyframes: Sequence[tuple[float, Tuple[int, int, int]]], easing: Easing = linear) -> None:
+        if len(keyframes) < 2:
+            raise ValueError('At least two keyframes are needed')
+        self.keyframes = sorted(keyframes, key=lambda keyframe: keyframe[0])
+        self._times = [offset for offset, _ in self.keyframes]
+        super().__init__(self._times[-1] - self._times[0], linear)
+        self.segment_easing = easing
+
+    def frame_at(self, progress: float) -> tuple[bytes, dict]:
+        offset = self._times[0] + progress * self.duration
+        index = min(max(bisect_right(self._times, offset) - 1, 0), len(self._times) - 2)
+        (t0, a), (t1, b) = self.keyframes[index], self.keyframes[index + 1]
+        t = (offset - t0) / (t1 - t0) if t1 > t0 else 1.0
+        rgb = _lerp_rgb(a, b, self.segment_easing(t))
+        return color_frame(*rgb), {'rgb': rgb, 'color_temp': 0}
+
+
+class AnimationPlayer:
+    """
+    Plays an animation on a device at a target frame rate.
+
+    Frames are rendered ahead in batches. The player always sends the frame for
+    the current time, so frames are dropped when writes fall behind and the
+    interval is stretched to the measured write latency when the link cannot
+    keep up with `fps`; either way the animation ends on time with its final
+    frame.
+    """
+
+    def __init__(self, instance: GoveeInstance, animation: Animation, fps: float = DEFAULT_FPS) -> None:
+        self.instance = instance
+        self.animation = animation
+        self.fps = fps
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.write_latency: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> asyncio.Task:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    def cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def done(self) -> bool:
+        return self._task is not None and self._task.done()
+
+    def __await__(self):
+        return self.start().__await__()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        animation = self.animation
+        total = animation.frame_count(self.fps)
+        rendered: list[tuple[bytes, dict]] = []
+        rendered_from = 0
+        index = 0
+        begin = loop.time()
+        while index < total:
+            if not rendered_from <= index < rendered_from + len(rendered):
+                rendered_from = index
+                rendered = animation.render(self.fps, index, RENDER_BATCH)
+            frame, changes = rendered[index - rendered_from]
+
+            sent = loop.time()
+            await self.instance._write_animation_frame(frame, changes)
+            latency = loop.time() - sent
+            if self.write_latency is None:
+                self.write_latency = latency
+            else:
+                self.write_latency += 0.2 * (latency - self.write_latency)
+            self.frames_sent += 1
+            if index == total - 1:
+                break
+
+            # Next slot: one interval ahead, stretched to the write latency,
+            # or the frame for the current time when writes fell behind
+            now = loop.time() - begin
+            steps = max(1, math.ceil(self.write_latency * self.fps - 1e-6))
+            next_index = min(max(index + steps, math.floor(now * self.fps)), total - 1)
+            self.frames_dropped += next_index - index - 1
+            index = next_index
+            await asyncio.sleep(max(next_index / self.fps - now, 0))
+        _LOGGER.debug(
+            "%s: Animation done; sent %s frames, dropped %s",
+            self.instance.name,
+            self.frames_sent,
+            self.frames_dropped,
+        )
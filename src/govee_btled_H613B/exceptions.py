@@ -7,3 +7,23 @@ class ConnectionTimeout(RuntimeError):
         self.mac = mac
         self.wrapped = wrapped
         super().__init__(f'Failed connecting to {mac}')
+
+class ResponseTimeout(RuntimeError):
+    """ Raised when the LED does not answer a status query in time. """
+    def __init__(self, mac, command):
+        self.mac = mac
+        self.command = command
+        super().__init__(f'No response from {mac} to query 0x{command:02x}')
+
+class DeviceUnavailable(RuntimeError):
+    """ Raised without trying when the circuit breaker considers the LED unreachable. """
+    def __init__(self, mac, reason):
+        self.mac = mac
+        self.reason = reason
+        super().__init__(f'{mac} is unavailable: {reason}')
+
+class DaemonError(RuntimeError):
+    """ Raised by DaemonClient when the daemon failed to run a request. """
+    def __init__(self, kind, message):
+        self.kind = kind
+        super().__init__(f'{kind}: {message}')
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any, Tuple
+
+from .connection import CONNECTIONS_PER_ADAPTER, ConnectionSlots
+from .govee_btled_H613B import GoveeInstance
+from .models import GoveeState
+from .utils import get_adapter
+
+_LOGGER = logging.getLogger(__name__)
+
+OPERATION_TIMEOUT = 10.0
+
+# Seconds over which the verification polls after a restore are spread
+VERIFY_SPREAD = 30.0
+
+
+@dataclass
+class FleetResult:
+    """Outcome of a group operation."""
+
+    results: dict[str, Any] = field(default_factory=dict)
+    errors: dict[str, BaseException] = field(default_factory=dict)
+    # Seconds between the first and the last device completing the operation
+    spread: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class GoveeFleet:
+    """
+    Controls many GoveeInstance objects as a group.
+
+    Operations are fanned out concurrently, every device bounded by `timeout`,
+    so one slow light fails on its own instead of stalling the group.
+
+    At most `connections_per_adapter` devices hold a connection at once on
+    each bluetooth adapter. A device keeps its slot until it disconnects; when
+    all slots are taken, the least recently used idle device is disconnected
+    to make room, see ConnectionSlots.
+    """
+
+    def __init__(
+        self,
+        instances: Iterable[GoveeInstance] = (),
+        connections_per_adapter: int = CONNECTIONS_PER_ADAPTER,
+        timeout: float = OPERATION_TIMEOUT,
+    ) -> None:
+        self._instances: dict[str, GoveeInstance] = {}
+        self._adapter_slots: dict[str, ConnectionSlots] = {}
+        self.connections_per_adapter = connections_per_adapter
+        self.timeout = timeout
+        for instance in instances:
+            self.add(instance)
+
+    def add(self, instance: GoveeInstance) -> None:
+        self._instances[instance.address] = instance
+        instance.connection_slots = self.slots(instance)
+
+    def remove(self, address: str) -> GoveeInstance | None:
+        instance = self._instances.pop(address, None)
+        if instance is not None and instance.connection_slots is not None:
+            instance.connection_slots.release(instance)
+            instance.connection_slots = None
+        return instance
+
+    def __getitem__(self, address: str) -> GoveeInstance:
+        return self._instances[address]
+
+    def __iter__(self):
+        return iter(self._instances.values())
+
+    def __len__(self) -> int:
+        return len(self._instances)
+
+    def slots(self, instance: GoveeInstance) -> ConnectionSlots:
+        """The connection slots of the adapter an instance is on."""
+        adapter = get_adapter(instance._ble_device)
+        if adapter not in self._adapter_slots:
+            self._adapter_slots[adapter] = ConnectionSlots(self.connections_per_adapter)
+        return self._adapter_slots[adapter]
+
+    async def run(
+        self,
+        operation: Callable[[GoveeInstance], Awaitable[Any]],
+        addresses: Iterable[str] | None = None,
+    ) -> FleetResult:
+        """Run an operation on every selected device and collect the outcomes."""
+        if addresses is None:
+            instances = list(self._instances.values())
+        else:
+            instances = [self._instances[address] for address in addresses]
+        result = FleetResult()
+        finished: list[float] = []
+
+        async def _run_one(instance: GoveeInstance) -> None:
+            try:
+                result.results[instance.address] = await asyncio.wait_for(
+                    operation(instance), self.timeout
+                )
+                finished.append(time.monotonic())
+            except Exception as ex:
+                _LOGGER.debug("%s: Fleet operation failed: %s", instance.name, ex)
+                result.errors[instance.address] = ex
+
+        await asyncio.gather(*(_run_one(instance) for instance in instances))
+        if finished:
+            result.spread = max(finished) - min(finished)
+        return result
+
+    async def set_color(self, rgb: Tuple[int, int, int], addresses: Iterable[str] | None = None) -> FleetResult:
+        return await self.run(lambda instance: instance.set_color(rgb), addresses)
+
+    async def set_brightness(self, intensity: int, addresses: Iterable[str] | None = None) -> FleetResult:
+        return await self.run(lambda instance: instance.set_brightness(intensity), addresses)
+
+    async def set_color_temp(self, color_temp: int, addresses: Iterable[str] | None = None) -> FleetResult:
+        return await self.run(lambda instance: instance.set_color_temp(color_temp), addresses)
+
+    async def turn_on(self, addresses: Iterable[str] | None = None) -> FleetResult:
+        return await self.run(lambda instance: instance.turn_on(), addresses)
+
+    async def turn_off(self, addresses: Iterable[str] | None = None) -> FleetResult:
+        return await self.run(lambda instance: instance.turn_off(), addresses)
+
+    async def apply(self, addresses: Iterable[str] | None = None, **settings: Any) -> FleetResult:
+        return await self.run(lambda instance: instance.apply(**settings), addresses)
+
+    async def update(self, addresses: Iterable[str] | None = None, **kwargs: Any) -> FleetResult:
+        return await self.run(lambda instance: instance.update(**kwargs), addresses)
+
+    def restore(
+        self, states: dict[str, GoveeState], verify: bool = True, spread: float = VERIFY_SPREAD
+    ) -> asyncio.Task | None:
+        """
+        Restore saved states without connecting to any device.
+
+        With `verify`, the restored states are checked in the background, the
+        devices being polled one after the other over `spread` seconds; the
+        returned task resolves to the FleetResult of the verification.
+        """
+        addresses = [address for address in states if address in self._instances]
+        for address in addresses:
+            self._instances[address].restore_state(states[address])
+        if not verify or not addresses:
+            return None
+        return asyncio.create_task(self._verify(addresses, spread))
+
+    async def _verify(self, addresses: list[str], spread: float) -> FleetResult:
+        interval = spread / len(addresses)
+        result = FleetResult()
+
+        async def _verify_one(index: int, address: str) -> None:
+            await asyncio.sleep(index * interval)
+            outcome = await self.run(lambda instance: instance.verify_state(access=False), [address])
+            result.results.update(outcome.results)
+            result.errors.update(outcome.errors)
+
+        await asyncio.gather(*(_verify_one(index, address) for index, address in enumerate(addresses)))
+        return result
+
+    @property
+    def states(self) -> dict[str, GoveeState]:
+        return {address: instance.state for address, instance in self._instances.items()}
+
+    async def disconnect(self) -> FleetResult:
+        return await self.run(lambda instance: instance.disconnect())
@@ -1,16 +1,19 @@
 import logging
 from typing import Tuple
-import traceback
 import asyncio
-import colorsys
-from colour import Color
-from collections.abc import Callable
+import sys
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from concurrent.futures import Executor
+from contextvars import ContextVar
+from typing import Any
 from dataclasses import replace
 import async_timeout
 
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
-from bleak.backends.service import BleakGATTCharacteristic, BleakGATTServiceCollection
+from bleak.backends.service import BleakGATTServiceCollection
 from bleak.exc import BleakDBusError
 from bleak_retry_connector import BLEAK_RETRY_EXCEPTIONS as BLEAK_EXCEPTIONS
 from bleak_retry_connector import (
@@ -18,33 +21,89 @@ from bleak_retry_connector import (
     BleakError,
     BleakNotFoundError,
     establish_connection,
-    retry_bluetooth_connection_error,
 )
 
 from .const import (
-    SHADES_OF_WHITE,KELVIN2COLOR,
     READ_CHARACTERISTIC_UUIDS,WRITE_CHARACTERISTIC_UUIDS,
-    LedCommand,LedMode,LedMsgType,
-    COLOR_TEMP_KELVIN_MIN,COLOR_TEMP_KELVIN_MAX
+    LedCommand,LedMsgType,
 )
 
-from .exceptions import ConnectionTimeout,CharacteristicMissingError
-from .utils import create_status_callback,color2rgb,discover
-from .models import GoveeState
+from .codec import (
+    DEVICE_INFO_QUERY_FRAMES,MAX_PAYLOAD_LENGTH,STATE_DECODERS,STATUS_QUERY_FRAMES,is_valid_frame,
+    brightness_frame,color_frame,color_temp_frame,decode_version,encode_frame,power_frame
+)
+from .coalesce import CoalescingSendQueue
+from .connection import DISCONNECT_DELAY, ConnectionPolicy, ConnectionSlots
+from . import metrics
+from .metrics import NULL_SINK, MetricsSink
+from .pacing import TokenBucket
+from .colortemp import kelvin2rgb
+from .audio import CHUNK_SIZE, AudioAnalyzer, AudioStream
+from .effects import DEFAULT_FPS, Animation, AnimationPlayer
+from .devicecache import DeviceCache
+from .dispatch import CallbackDispatcher, SubscriberStats
+from .exceptions import CharacteristicMissingError,DeviceUnavailable,ResponseTimeout
+from .responses import ResponseTracker
+from .retry import CircuitBreaker, RetryPolicy
+from .scenes import DiyPattern, Scene, encode_scene
+from .trace import TraceEvent, TraceRecorder
+from .utils import LazyHex
+from .models import DeviceInfo, GoveeState
+
+_LOGGER = logging.getLogger(__name__)
 
-BLEAK_BACKOFF_TIME = 0.25
+# Errors after which a command is retried
+RETRY_EXCEPTIONS = (AttributeError, BleakError, EOFError, BrokenPipeError)
 
-DISCONNECT_DELAY = 120
+UPDATE_TIMEOUT = 5.0
 
-_LOGGER = logging.getLogger(__name__)
+# State fields refreshed by each status query
+QUERY_FIELDS = {
+    LedCommand.POWER: ("power",),
+    LedCommand.COLOR: ("rgb", "color_temp"),
+    LedCommand.BRIGHTNESS: ("brightness",),
+}
+
+
+class _Batch:
+    """Frames and state changes collected by GoveeInstance.batch()."""
+
+    def __init__(self, instance: "GoveeInstance") -> None:
+        self.instance = instance
+        self.frames: list[bytes] = []
+        self.changes: dict = {}
 
-DEFAULT_ATTEMPTS = 3
 
+_BATCH: ContextVar[_Batch | None] = ContextVar("govee_btled_H613B_batch", default=None)
 
 class GoveeInstance:
-    def __init__(self, ble_device: BLEDevice, advertisement_data: AdvertisementData | None = None) -> None:
+    def __init__(
+        self,
+        ble_device: BLEDevice,
+        advertisement_data: AdvertisementData | None = None,
+        coalesce: bool = False,
+        rate_limiter: TokenBucket | None = None,
+        adapter_rate_limiter: TokenBucket | None = None,
+        connection_policy: ConnectionPolicy | None = None,
+        connection_slots: ConnectionSlots | None = None,
+        connector: Callable[..., Awaitable[BleakClientWithServiceCache]] = establish_connection,
+        metrics_sink: MetricsSink | None = None,
+        trace: TraceRecorder | None = None,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        device_cache: DeviceCache | None = None,
+    ) -> None:
         self._ble_device = ble_device
         self._client = BleakClientWithServiceCache(ble_device)
+        self._connector = connector
+        self._metrics = metrics_sink or NULL_SINK
+        self._trace = trace
+        self._retry_policy = retry_policy or RetryPolicy()
+        # The default breaker never opens, so commands keep being attempted
+        self._circuit_breaker = circuit_breaker or CircuitBreaker(failure_threshold=sys.maxsize)
+        self._probe_task: asyncio.Task | None = None
+        self._device_cache = device_cache
+        self._device_info: DeviceInfo | None = None
         self._write_uuid = None
         self._read_uuid = None
         self._advertisement_data = advertisement_data
@@ -54,9 +113,26 @@ class GoveeInstance:
         self._state = GoveeState()
         self._connect_lock: asyncio.Lock = asyncio.Lock()
         self._disconnect_timer = None
+        self._disconnect_delay: float = DISCONNECT_DELAY
+        self._connection_policy = connection_policy or ConnectionPolicy()
+        self._connection_slots = connection_slots
+        self._prewarm_task: asyncio.Task | None = None
         self._expected_disconnect = False
         self.loop = asyncio.get_running_loop()
-        self._callbacks: list[Callable[[GoveeState], None]] = []
+        self._callbacks = CallbackDispatcher()
+        self._responses = ResponseTracker()
+        self._animation: AnimationPlayer | AudioStream | None = None
+        # Content digest of the program uploaded to each scene or DIY slot
+        self._uploaded: dict[tuple[int, int], str] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Reported values that differ from a value known before, i.e. changes
+        # made by something else than this instance
+        self.external_changes = 0
+        self._send_queue = CoalescingSendQueue(self._send_command) if coalesce else None
+        self._rate_limiters = [
+            limiter for limiter in (rate_limiter, adapter_rate_limiter) if limiter is not None
+        ]
     
 
     def set_ble_device_and_advertisement_data(
@@ -65,6 +141,37 @@ class GoveeInstance:
         """Set the ble device."""
         self._ble_device = ble_device
         self._advertisement_data = advertisement_data
+        if advertisement_data.rssi is not None:
+            self._metrics.gauge(metrics.RSSI, self.address, advertisement_data.rssi)
+        if not (self._client and self._client.is_connected) and self._connection_policy.should_prewarm():
+            self.prewarm()
+
+    @property
+    def connection_policy(self) -> ConnectionPolicy:
+        """Return the connection policy."""
+        return self._connection_policy
+
+    @property
+    def connection_slots(self) -> ConnectionSlots | None:
+        """Return the connection slots of the adapter, if limited."""
+        return self._connection_slots
+
+    @connection_slots.setter
+    def connection_slots(self, slots: ConnectionSlots | None) -> None:
+        self._connection_slots = slots
+
+    def prewarm(self) -> asyncio.Task:
+        """Open the connection in the background, e.g. ahead of a scheduled scene."""
+        if self._prewarm_task is None or self._prewarm_task.done():
+            self._prewarm_task = asyncio.create_task(self._prewarm())
+        return self._prewarm_task
+
+    async def _prewarm(self) -> None:
+        """Connect without counting it as an access."""
+        try:
+            await self._ensure_connected(access=False)
+        except Exception as ex:
+            _LOGGER.debug("%s: Prewarming connection failed: %s", self.name, ex)
 
     @property
     def address(self) -> str:
@@ -83,6 +190,31 @@ class GoveeInstance:
             return self._advertisement_data.rssi
         return None
 
+    @property
+    def send_queue(self) -> CoalescingSendQueue | None:
+        """Return the coalescing send queue, if enabled."""
+        return self._send_queue
+
+    @property
+    def trace(self) -> TraceRecorder | None:
+        """Return the frame trace recorder, if enabled."""
+        return self._trace
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether the device is connected right now."""
+        return bool(self._client and self._client.is_connected)
+
+    @property
+    def is_busy(self) -> bool:
+        """Whether a command, connect or status query is in progress."""
+        return self._operation_lock.locked() or self._connect_lock.locked() or self._responses.pending
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Return the circuit breaker."""
+        return self._circuit_breaker
+
     @property
     def state(self) -> GoveeState:
         """Return the state."""
@@ -107,17 +239,25 @@ class GoveeInstance:
         """Return current brightness 0-255."""
         return self._state.brightness
     
-    async def update(self) -> None:
-        """Update the LEDBLE."""
-        await self._ensure_connected()
+    async def update(
+        self, timeout: float = UPDATE_TIMEOUT, max_age: float | None = None, access: bool = True
+    ) -> GoveeState:
+        """
+        Query the LEDBLE and return the state once every reply arrived.
+
+        With max_age, fields reported by the device less than max_age seconds ago
+        are served from the cached state and only stale ones are queried.
+        Background refreshes pass access=False so they do not count as use in
+        the connection policy and do not keep the device connected.
+        """
         _LOGGER.debug("%s: Updating state", self.name)
+        queries = []
 
         # Represent on state byte 3
-        await self._send(LedMsgType.KEEP_ALIVE, 0x01, b'') # aa010000000000000000000000000000000000ab -> on:aa010100000000000000000000000000000000aa off:aa010000000000000000000000000000000000ab
+        queries.append(LedCommand.POWER) # aa010000000000000000000000000000000000ab -> on:aa010100000000000000000000000000000000aa off:aa010000000000000000000000000000000000ab
         
         # These remained constant throughout my tests
-        # await self._send(LedMsgType.KEEP_ALIVE, 0x06, b'') # aa060000000000000000000000000000000000ac -> aa06322e30342e3030000000000000000000009a
-        # await self._send(LedMsgType.KEEP_ALIVE, 0x07, b'\x03') # aa070300000000000000000000000000000000ae -> aa0703322e30312e30310000000000000000009c
+        # 0x06 and 0x07 (firmware and hardware version) are queried by device_info()
         # await self._send(LedMsgType.KEEP_ALIVE, 0x23, b'\xff') # aa23ff0000000000000000000000000000000076 -> aa23ff0000008000000080000000800000008076
         # await self._send(LedMsgType.KEEP_ALIVE, 0x12, b'') # aa120000000000000000000000000000000000b8 -> aa12ff640000800a0000000000000000000000a9
         # await self._send(LedMsgType.KEEP_ALIVE, 0x11, b'') # aa110000000000000000000000000000000000bb -> aa11001e0f0f00000000000000000000000000a5
@@ -126,7 +266,7 @@ class GoveeInstance:
         # await self._send(LedMsgType.COMMAND, 0x09, bytes.fromhex('14030f0301010000000000000000000000'))
         
 
-        await self._send(LedMsgType.KEEP_ALIVE, 0x05, b'\x01') # aa050100000000000000000000000000000000ae ->
+        queries.append(LedCommand.COLOR) # aa050100000000000000000000000000000000ae ->
         # byte 3 is always 0d
 
         # White mode, still don't know exactly the meaning of bytes 7-8
@@ -155,16 +295,106 @@ class GoveeInstance:
         
         # Brightness test: in this one the byte 3 of the response is exactly the brightness percent
         
-        await self._send(LedMsgType.KEEP_ALIVE, 0x04, b'')
+        queries.append(LedCommand.BRIGHTNESS)
         # aa040000000000000000000000000000000000ae -> aa04360000000000000000000000000000000098(54%) aa046400000000000000000000000000000000ca(100%) aa040100000000000000000000000000000000af(1%)
+
+        if max_age is not None:
+            queries = self._stale_queries(queries, max_age)
+            if not queries:
+                return self._state
+
+        pending = {cmd: self._responses.expect(cmd) for cmd in queries}
+        try:
+            await self._send_command([STATUS_QUERY_FRAMES[cmd] for cmd in queries], access=access)
+            await asyncio.gather(
+                *(self._wait_response(cmd, future, timeout) for cmd, future in pending.items())
+            )
+        finally:
+            for cmd, future in pending.items():
+                self._responses.discard(cmd, future)
+        return self._state
+
+    def restore_state(self, state: GoveeState) -> None:
+        """
+        Start from a previously saved state, e.g. after a restart.
+
+        The state stays unverified until the device reports its fields, see
+        verify_state().
+        """
+        self._state = replace(state, updated_at={})
+        self._fire_callbacks(
+            {name: getattr(state, name) for name in ("power", "rgb", "color_temp", "brightness")}
+        )
+
+    async def verify_state(self, timeout: float = UPDATE_TIMEOUT, access: bool = True) -> GoveeState:
+        """Query the fields the device has not reported since the state was restored."""
+        if self._state.verified:
+            return self._state
+        # Fields never reported have an infinite age, so only those are queried
+        return await self.update(timeout, max_age=sys.float_info.max, access=access)
+
+    async def device_info(self, timeout: float = UPDATE_TIMEOUT) -> DeviceInfo:
+        """
+        Return the firmware and hardware versions, querying the device only
+        when they are in neither memory nor the device cache.
+        """
+        if self._device_info is not None:
+            return self._device_info
+        cached = await self._device_cache.async_get(self.address) if self._device_cache else {}
+        if "firmware_version" in cached and "hardware_version" in cached:
+            self._device_info = DeviceInfo(cached["firmware_version"], cached["hardware_version"])
+            return self._device_info
+
+        pending = {cmd: self._responses.expect(cmd) for cmd in DEVICE_INFO_QUERY_FRAMES}
+        try:
+            await self._send_command(list(DEVICE_INFO_QUERY_FRAMES.values()))
+            firmware, hardware = await asyncio.gather(
+                *(self._wait_response(cmd, future, timeout) for cmd, future in pending.items())
+            )
+        finally:
+            for cmd, future in pending.items():
+                self._responses.discard(cmd, future)
+        self._device_info = DeviceInfo(decode_version(firmware), decode_version(hardware))
+        if self._device_cache is not None:
+            await self._device_cache.async_update(
+                self.address,
+                firmware_version=self._device_info.firmware_version,
+                hardware_version=self._device_info.hardware_version,
+            )
+        return self._device_info
+
+    def _stale_queries(self, queries: list[int], max_age: float) -> list[int]:
+        """Drop the queries whose fields are all fresher than max_age."""
+        now = time.monotonic()
+        stale = []
+        for cmd in queries:
+            if all(self._state.age(name, now) <= max_age for name in QUERY_FIELDS[cmd]):
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+                stale.append(cmd)
+        return stale
+
+    async def _wait_response(self, cmd: int, future: asyncio.Future, timeout: float) -> bytearray:
+        """Wait for the reply to a status query."""
+        try:
+            async with async_timeout.timeout(timeout):
+                return await future
+        except asyncio.TimeoutError as ex:
+            raise ResponseTimeout(self.address, cmd) from ex
         
         
 
 
     
     
-    async def _ensure_connected(self) -> None:
-        """Ensure connection to device is established."""
+    async def _ensure_connected(self, access: bool = True) -> None:
+        """
+        Ensure connection to device is established.
+
+        Only an access extends the idle timer of an open connection; background
+        work, e.g. polls, prewarms and probes, uses it as it is.
+        """
         if self._connect_lock.locked():
             _LOGGER.debug(
                 "%s: Connection already in progress, waiting for it to complete; RSSI: %s",
@@ -172,27 +402,48 @@ class GoveeInstance:
                 self.rssi,
             )
         if self._client and self._client.is_connected:
-            self._reset_disconnect_timer()
+            if access:
+                self._reset_disconnect_timer()
+                if self._connection_slots is not None:
+                    self._connection_slots.touch(self)
             return
+        waiting = time.monotonic()
         async with self._connect_lock:
+            self._metrics.observe(metrics.CONNECT_LOCK_WAIT, self.address, time.monotonic() - waiting)
             # Check again while holding the lock
             if self._client and self._client.is_connected:
-                self._reset_disconnect_timer()
+                if access:
+                    self._reset_disconnect_timer()
                 return
+            if self._connection_slots is not None:
+                await self._connection_slots.acquire(self)
             _LOGGER.debug("%s: Connecting; RSSI: %s", self.name, self.rssi)
-            client = await establish_connection(
-                BleakClientWithServiceCache,
-                self._ble_device,
-                self.name,
-                self._disconnected,
-                use_services_cache=True,
-                ble_device_callback=lambda: self._ble_device,
-            )
+            connecting = time.monotonic()
+            try:
+                client = await self._connector(
+                    BleakClientWithServiceCache,
+                    self._ble_device,
+                    self.name,
+                    self._disconnected,
+                    use_services_cache=True,
+                    ble_device_callback=lambda: self._ble_device,
+                )
+            except BaseException:
+                if self._connection_slots is not None:
+                    self._connection_slots.release(self)
+                raise
+            self._metrics.observe(metrics.CONNECT_DURATION, self.address, time.monotonic() - connecting)
+            if self._trace is not None:
+                self._trace.record(TraceEvent.CONNECTED)
             _LOGGER.debug("%s: Connected; RSSI: %s", self.name, self.rssi)
             resolved = self._resolve_characteristics(client.services)
             if not resolved:
                 # Try to handle services failing to load
                 resolved = self._resolve_characteristics(await client.get_services())
+            if not resolved and self._device_cache is not None:
+                # Not the device the cached versions were read from
+                self._device_info = None
+                await self._device_cache.async_invalidate(self.address)
 
             self._client = client
             self._reset_disconnect_timer()
@@ -209,40 +460,140 @@ class GoveeInstance:
            raise ValueError('Invalid command')
         if not isinstance(payload, bytes) and not (isinstance(payload, list) and all(isinstance(x, int) for x in payload)):
             raise ValueError('Invalid payload')
-        if len(payload) > 17:
+        if len(payload) > MAX_PAYLOAD_LENGTH:
             raise ValueError('Payload too long')
 
-        cmd = cmd & 0xFF
+        await self._send_frame(encode_frame(head, cmd, payload))
 
-        frame = bytes([head, cmd]) + bytes(payload)
-        # pad frame data to 19 bytes (plus checksum)
-        frame += bytes([0] * (19 - len(frame)))
-        
-        # The checksum is calculated by XORing all data bytes
-        checksum = 0
-        for b in frame:
-            checksum ^= b
-        
-        frame += bytes([checksum & 0xFF])
-        
-        await self._ensure_connected()
-
-        if not self._client.is_connected:
-            _LOGGER.warn("Device not connected, dropping command")
+    async def _send_frame(self, frame: bytes):
+        """ Sends an already encoded frame. """
+        if self._send_queue is not None:
+            await self._send_queue.put(frame)
         else:
             await self._send_command(frame)
 
 
 
+    async def _write_state(self, frame: bytes, **changes) -> None:
+        """ Sends a frame and applies its state changes, or collects both in the active batch. """
+        # A new command takes over from a running animation
+        self.stop_animation()
+        batch = _BATCH.get()
+        if batch is not None and batch.instance is self:
+            batch.frames.append(frame)
+            batch.changes.update(changes)
+            return
+        await self._send_frame(frame)
+        self._state = replace(self._state, **changes)
+        self._fire_callbacks(changes)
+
+    async def _write_animation_frame(self, frame: bytes, changes: dict) -> None:
+        """ Sends an animation frame and applies its state changes. """
+        await self._send_frame(frame)
+        self._state = replace(self._state, **changes)
+        self._fire_callbacks(changes)
+
+    def animate(self, animation: Animation, fps: float = DEFAULT_FPS) -> AnimationPlayer:
+        """
+        Start playing an animation in the background, replacing the running one.
+
+        Any setter called meanwhile stops the animation.
+        """
+        self.stop_animation()
+        self._animation = AnimationPlayer(self, animation, fps)
+        self._animation.start()
+        return self._animation
+
+    async def apply_scene(self, scene: Scene | DiyPattern) -> None:
+        """
+        Activate a scene or DIY pattern, uploading its program first unless the
+        device already holds the same content in that slot.
+        """
+        encoded = encode_scene(scene)
+        self.stop_animation()
+        frames = [encoded.activation]
+        if encoded.upload and self._uploaded.get(encoded.slot) != encoded.digest:
+            frames[:0] = encoded.upload
+        _LOGGER.debug("%s: Apply scene %s with %s frames", self.name, encoded.slot, len(frames))
+        await self._send_command(frames)
+        if encoded.upload:
+            self._uploaded[encoded.slot] = encoded.digest
+
+    async def stream_audio(
+        self, source: Any, sample_rate: int, chunk_size: int = CHUNK_SIZE, channels: int = 1
+    ) -> AudioStream:
+        """
+        Drive the colors from PCM audio: an async iterator of chunks, e.g.
+        audio.wav_chunks(), or an array of samples. Requires numpy.
+
+        Returns once the audio ended, or when a setter or another animation
+        took over.
+        """
+        stream = AudioStream(self, AudioAnalyzer(sample_rate, chunk_size))
+        self.stop_animation()
+        self._animation = stream
+        stream.start(source, channels)
+        try:
+            await stream
+        except asyncio.CancelledError:
+            if not stream.stopped:
+                raise
+        finally:
+            if self._animation is stream:
+                self._animation = None
+        return stream
+
+    def stop_animation(self) -> None:
+        """Cancel the running animation or audio stream, if any."""
+        if self._animation is not None:
+            self._animation.cancel()
+            self._animation = None
+
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator[None]:
+        """
+        Collects the frames of the setters called inside the block and writes them
+        in a single locked operation on exit, then updates the state and fires
+        the callbacks once.
+        """
+        batch = _Batch(self)
+        token = _BATCH.set(batch)
+        try:
+            yield
+        finally:
+            _BATCH.reset(token)
+        if not batch.frames:
+            return
+        _LOGGER.debug("%s: Sending batch of %s frames", self.name, len(batch.frames))
+        await self._send_command(batch.frames)
+        self._state = replace(self._state, **batch.changes)
+        self._fire_callbacks(batch.changes)
+
+    async def apply(
+        self,
+        power: bool | None = None,
+        brightness: int | None = None,
+        rgb: Tuple[int, int, int] | None = None,
+        color_temp: int | None = None,
+    ) -> None:
+        """Apply several settings in a single batch."""
+        async with self.batch():
+            if power:
+                await self.turn_on()
+            if rgb is not None:
+                await self.set_color(rgb)
+            if color_temp is not None:
+                await self.set_color_temp(color_temp)
+            if brightness is not None:
+                await self.set_brightness(brightness)
+            if power is False:
+                await self.turn_off()
+
     async def set_color(self, rgb: Tuple[int, int, int]):
         r, g, b = rgb
         # await self._write([0x56, r, g, b, 0x00, 0xF0, 0xAA])
-        await self._send(LedMsgType.COMMAND, LedCommand.COLOR, [LedMode.MANUAL, r, g, b])
-        self._state = replace(
-            self._state,
-            rgb= (r, g, b)
-        )
-        self._fire_callbacks()
+        # The device reports no color temperature in color mode
+        await self._write_state(color_frame(r, g, b), rgb=(r, g, b), color_temp=0)
     
     # although the device accepts values in the range [0, 255], it actually only does
     # anything useful with values from [1, 100], 
@@ -252,84 +603,101 @@ class GoveeInstance:
         if not 0 <= intensity <= 255:
             raise ValueError(f'Brightness value out of range: {intensity}')
         
-        await self._send(LedMsgType.COMMAND, LedCommand.BRIGHTNESS, [intensity,])
-        self._state = replace(self._state, brightness=intensity)
-        self._fire_callbacks()
+        await self._write_state(brightness_frame(intensity), brightness=intensity)
     
     async def set_color_temp(self, color_temp: int):
         _LOGGER.debug("%s: Color Temperature: %s", self.name, color_temp)
 
-        if not COLOR_TEMP_KELVIN_MIN <= color_temp <= COLOR_TEMP_KELVIN_MAX:
-            raise ValueError(f'Color Temperature value out of range: {value}')
-        color_temp = round(color_temp / 100) * 100
-        
-        white = KELVIN2COLOR[color_temp]
+        # Validates the range and interpolates the white shade for any kelvin value
+        white = kelvin2rgb(color_temp)
+        color_temp = round(color_temp)
 
-        ct = [color_temp // 256, color_temp % 256]
-        
         # Set the color to white (although ignored) and the boolean flag to True
-        await self._send(LedMsgType.COMMAND, LedCommand.COLOR, [LedMode.MANUAL, 0xff, 0xff, 0xff, ct[0], ct[1], *color2rgb(white)])
-        self._state = replace(
-            self._state,
-            color_temp=color_temp, 
+        await self._write_state(
+            color_temp_frame(color_temp, *white),
+            color_temp=color_temp,
             rgb=(0xff, 0xff, 0xff)
         )
-        self._fire_callbacks()
 
     async def turn_on(self):
         _LOGGER.debug("%s: Turn on", self.name)
-        await self._send(LedMsgType.COMMAND, LedCommand.POWER, [0x1])
-        self._state = replace(self._state, power=True)
-        self._fire_callbacks()
+        await self._write_state(power_frame(True), power=True)
         
     async def turn_off(self):
         _LOGGER.debug("%s: Turn off", self.name)
-        await self._send(LedMsgType.COMMAND, LedCommand.POWER, [0x0])
-        self._state = replace(self._state, power=False)
-        self._fire_callbacks()
+        await self._write_state(power_frame(False), power=False)
 
     
 
     async def disconnect(self):
         _LOGGER.debug("%s: Disconnect", self.name)
+        # Neither the probe nor a prewarm may reconnect behind the caller's back
+        for task in (self._probe_task, self._prewarm_task):
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+        self._probe_task = None
+        self._prewarm_task = None
         await self._execute_disconnect()
     
     def _notification_handler(self, _sender: int, data: bytearray) -> None:
         """Handle notification responses."""
+        self._metrics.increment(metrics.NOTIFICATIONS, self.address)
+        if self._trace is not None:
+            self._trace.record(TraceEvent.RX, data)
+        debug = _LOGGER.isEnabledFor(logging.DEBUG)
+        if debug:
+            _LOGGER.debug("%s: Notification received: %s", self.name, data.hex())
+
+        if not is_valid_frame(data):
+            if debug:
+                _LOGGER.debug("%s: Dropping invalid notification: %s", self.name, data.hex())
+            return
 
-        _LOGGER.debug("%s: Notification received: %s", self.name, data.hex())
-        
-        
-        if data[0] == LedMsgType.KEEP_ALIVE:
-
-            if data[1] == LedCommand.POWER:
-                self._state = replace(self._state, power=(data[2] == 0x01))
-            elif data[1] == LedCommand.COLOR:
-                if data[2] != 0x0d:
-                    _LOGGER.warn('Unknown byte 3 seen in COLOR info packet', data[2])
-                else:
-                    self._state = replace(self._state, rgb=(data[3], data[4], data[5]), color_temp=data[6] * 256 + data[7])
+        changes = None
+        decoder = STATE_DECODERS.get((data[0], data[1]))
+        if decoder is not None and (reported := decoder(data)):
+            changes = self._set_reported_state(reported)
+            if debug:
+                _LOGGER.debug(
+                    "%s: Notification received; RSSI: %s: %s %s",
+                    self.name,
+                    self.rssi,
+                    data.hex(),
+                    self._state,
+                )
 
-            elif data[1] == LedCommand.BRIGHTNESS:
-                self._state = replace(self._state, brightness=data[2])
-            
-            _LOGGER.debug(
-                "%s: Notification received; RSSI: %s: %s %s",
-                self.name,
-                self.rssi,
-                data.hex(),
-                self._state,
-            )
+        if data[0] == LedMsgType.KEEP_ALIVE:
+            self._responses.resolve(_sender, data)
+
+        if changes:
+            self._fire_callbacks(changes)
+
+    def _set_reported_state(self, reported: dict) -> dict:
+        """
+        Apply state reported by the device, stamp the fields as fresh and
+        return the fields whose value changed.
+        """
+        state = self._state
+        changes = {
+            name: value for name, value in reported.items() if getattr(state, name) != value
+        }
+        # Values never reported, e.g. after a restore, were not known to differ
+        self.external_changes += sum(1 for name in changes if name in state.updated_at)
+        now = time.monotonic()
+        updated_at = dict(state.updated_at)
+        for name in reported:
+            updated_at[name] = now
+        self._state = replace(state, updated_at=updated_at, **changes)
+        return changes
 
-        self._fire_callbacks()
-    
     def _reset_disconnect_timer(self) -> None:
         """Reset disconnect timer."""
         if self._disconnect_timer:
             self._disconnect_timer.cancel()
         self._expected_disconnect = False
+        self._disconnect_delay = self._connection_policy.idle_timeout()
         self._disconnect_timer = self.loop.call_later(
-            DISCONNECT_DELAY, self._disconnect
+            self._disconnect_delay, self._disconnect
         )
 
     def _disconnected(self, client: BleakClientWithServiceCache) -> None:
@@ -340,6 +708,11 @@ class GoveeInstance:
             )
             return
         else:
+            if self._connection_slots is not None:
+                self._connection_slots.release(self)
+            self._metrics.increment(metrics.UNEXPECTED_DISCONNECTS, self.address)
+            if self._trace is not None:
+                self._trace.record(TraceEvent.UNEXPECTED_DISCONNECT)
             _LOGGER.debug(
                 "%s: Device unexpectedly disconnected; RSSI: %s",
                 self.name,
@@ -349,6 +722,10 @@ class GoveeInstance:
     def _disconnect(self) -> None:
         """Disconnect from device."""
         self._disconnect_timer = None
+        if self.is_busy:
+            # Background work does not extend the timer, but is not cut short either
+            self._reset_disconnect_timer()
+            return
         asyncio.create_task(self._execute_timed_disconnect())
 
     async def _execute_timed_disconnect(self) -> None:
@@ -356,7 +733,7 @@ class GoveeInstance:
         _LOGGER.debug(
             "%s: Disconnecting after timeout of %s",
             self.name,
-            DISCONNECT_DELAY,
+            self._disconnect_delay,
         )
         await self._execute_disconnect()
 
@@ -369,29 +746,103 @@ class GoveeInstance:
             self._client = None
             self._read_uuid = None
             self._write_uuid = None
-            if client and client.is_connected:
-                await client.stop_notify(read_char)
-                await client.disconnect()
+            if self._trace is not None and client and client.is_connected:
+                self._trace.record(TraceEvent.DISCONNECTED)
+            try:
+                if client and client.is_connected:
+                    await client.stop_notify(read_char)
+                    await client.disconnect()
+            finally:
+                if self._connection_slots is not None:
+                    self._connection_slots.release(self)
+
 
+    async def _send_command_retrying(
+        self, commands: list[bytes], attempts: int | None = None, access: bool = True
+    ) -> None:
+        """Send command to device, retrying as set by the retry policy and circuit breaker."""
+        policy = self._retry_policy
+        breaker = self._circuit_breaker
+        if not breaker.allow(self.rssi):
+            reason = "RSSI too low" if breaker.rssi_too_low(self.rssi) else "circuit open"
+            raise DeviceUnavailable(self.address, reason)
+        attempts = attempts or policy.attempts
+        deadline = None if policy.deadline is None else time.monotonic() + policy.deadline
+        for attempt in range(attempts):
+            try:
+                if deadline is None:
+                    await self._send_command_locked(commands, access)
+                else:
+                    async with async_timeout.timeout(max(deadline - time.monotonic(), 0)):
+                        await self._send_command_locked(commands, access)
+            except asyncio.TimeoutError:
+                self._record_failure()
+                raise
+            except RETRY_EXCEPTIONS as ex:
+                backoff = policy.backoff_time(attempt)
+                out_of_time = deadline is not None and time.monotonic() + backoff >= deadline
+                if attempt == attempts - 1 or out_of_time:
+                    self._record_failure()
+                    raise
+                self._metrics.increment(metrics.BACKOFFS, self.address)
+                _LOGGER.debug(
+                    "%s: RSSI: %s; Backing off %.2fs after error: %s",
+                    self.name,
+                    self.rssi,
+                    backoff,
+                    ex,
+                )
+                await asyncio.sleep(backoff)
+            except Exception:
+                # Not worth retrying, e.g. a missing characteristic, but the device failed all the same
+                self._record_failure()
+                raise
+            else:
+                breaker.record_success()
+                return
 
-    @retry_bluetooth_connection_error(DEFAULT_ATTEMPTS)
-    async def _send_command_locked(self, commands: list[bytes]) -> None:
+    def _record_failure(self) -> None:
+        """Count a failed command and start probing once the breaker opens."""
+        self._circuit_breaker.record_failure()
+        if self._circuit_breaker.is_open and (self._probe_task is None or self._probe_task.done()):
+            self._probe_task = asyncio.create_task(self._probe())
+
+    async def _probe(self) -> None:
+        """Try to reconnect in the background while the circuit is open."""
+        breaker = self._circuit_breaker
+        while breaker.is_open:
+            await asyncio.sleep(breaker.reset_timeout)
+            if not breaker.allow(self.rssi):
+                continue
+            _LOGGER.debug("%s: Probing device; RSSI: %s", self.name, self.rssi)
+            try:
+                await self._ensure_connected(access=False)
+            except Exception as ex:
+                _LOGGER.debug("%s: Probe failed: %s", self.name, ex)
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+    async def _send_command_locked(self, commands: list[bytes], access: bool = True) -> None:
         """Send command to device and read response."""
+        # A previous attempt may have disconnected to reset the link
+        await self._ensure_connected(access)
         try:
             await self._execute_command_locked(commands)
         except BleakDBusError as ex:
             # Disconnect so we can reset state and try again
-            await asyncio.sleep(BLEAK_BACKOFF_TIME)
+            self._metrics.increment(metrics.RETRIES, self.address)
             _LOGGER.debug(
-                "%s: RSSI: %s; Backing off %ss; Disconnecting due to error: %s",
-                self.name,
-                self.rssi,
-                BLEAK_BACKOFF_TIME,
-                ex,
+                "%s: RSSI: %s; Disconnecting due to error: %s", self.name, self.rssi, ex
             )
             await self._execute_disconnect()
             raise
         except BleakError as ex:
+            self._metrics.increment(metrics.RETRIES, self.address)
+            if self._client is not None and self._client.is_connected:
+                # The link is still up, retry on it without reconnecting
+                _LOGGER.debug("%s: RSSI: %s; Write failed: %s", self.name, self.rssi, ex)
+                raise
             # Disconnect so we can reset state and try again
             _LOGGER.debug(
                 "%s: RSSI: %s; Disconnecting due to error: %s", self.name, self.rssi, ex
@@ -401,22 +852,24 @@ class GoveeInstance:
 
 
     async def _send_command(
-        self, commands: list[bytes] | bytes, retry: int | None = None
+        self, commands: list[bytes] | bytes, retry: int | None = None, access: bool = True
     ) -> None:
         """Send command to device and read response."""
-        await self._ensure_connected()
+        # Connecting is left to the retry loop, after the circuit breaker check
+        if access:
+            self._connection_policy.record_access()
         if not isinstance(commands, list):
             commands = [commands]
-        await self._send_command_while_connected(commands, retry)
+        await self._send_command_while_connected(commands, retry, access)
 
     async def _send_command_while_connected(
-        self, commands: list[bytes], retry: int | None = None
+        self, commands: list[bytes], retry: int | None = None, access: bool = True
     ) -> None:
         """Send command to device and read response."""
         _LOGGER.debug(
             "%s: Sending commands %s",
             self.name,
-            [command.hex() for command in commands],
+            LazyHex(commands),
         )
         if self._operation_lock.locked():
             _LOGGER.debug(
@@ -424,9 +877,11 @@ class GoveeInstance:
                 self.name,
                 self.rssi,
             )
+        waiting = time.monotonic()
         async with self._operation_lock:
+            self._metrics.observe(metrics.OPERATION_LOCK_WAIT, self.address, time.monotonic() - waiting)
             try:
-                await self._send_command_locked(commands)
+                await self._send_command_retrying(commands, retry, access)
                 return
             except BleakNotFoundError:
                 _LOGGER.error(
@@ -445,9 +900,16 @@ class GoveeInstance:
                     exc_info=True,
                 )
                 raise
+            except DeviceUnavailable as ex:
+                _LOGGER.debug("%s: %s", self.name, ex)
+                raise
             except BLEAK_EXCEPTIONS:
                 _LOGGER.debug("%s: communication failed", self.name, exc_info=True)
                 raise
+            finally:
+                if self._connection_slots is not None:
+                    # The connection is idle again, it may be closed for another device
+                    self._connection_slots.wake()
 
         raise RuntimeError("Unreachable")
 
@@ -460,7 +922,21 @@ class GoveeInstance:
         if not self._write_uuid:
             raise CharacteristicMissingError("Write characteristic missing")
         for command in commands:
-            await self._client.write_gatt_char(self._write_uuid, command, False)
+            for limiter in self._rate_limiters:
+                await limiter.acquire()
+            start = time.monotonic()
+            try:
+                await self._client.write_gatt_char(self._write_uuid, command, False)
+            except Exception:
+                for limiter in self._rate_limiters:
+                    limiter.record(time.monotonic() - start, error=True)
+                raise
+            latency = time.monotonic() - start
+            if self._trace is not None:
+                self._trace.record(TraceEvent.TX, command)
+            self._metrics.observe(metrics.WRITE_LATENCY, self.address, latency)
+            for limiter in self._rate_limiters:
+                limiter.record(latency)
 
     def _resolve_characteristics(self, services: BleakGATTServiceCollection) -> bool:
         """Resolve characteristics."""
@@ -474,18 +950,39 @@ class GoveeInstance:
                 break
         return bool(self._read_uuid and self._write_uuid)
     
-    def _fire_callbacks(self) -> None:
+    def _fire_callbacks(self, changes: dict) -> None:
         """Fire the callbacks."""
-        for callback in self._callbacks:
-            callback(self._state)
+        self._callbacks.dispatch(self._state, changes)
 
     def register_callback(
-        self, callback: Callable[[GoveeState], None]
+        self,
+        callback: Callable[[GoveeState], Any],
+        executor: Executor | bool | None = None,
+        min_interval: float | None = None,
     ) -> Callable[[], None]:
-        """Register a callback to be called when the state changes."""
+        """
+        Register a callback to be called when the state changes.
+
+        The callback may be a coroutine function. Blocking callables can be run in
+        a thread pool by passing an executor, or True for the default one, and
+        min_interval limits deliveries to one per interval.
+        """
+        return self._callbacks.subscribe(
+            callback, executor=executor, min_interval=min_interval
+        )
 
-        def unregister_callback() -> None:
-            self._callbacks.remove(callback)
+    def register_change_callback(
+        self,
+        callback: Callable[[GoveeState, dict], Any],
+        executor: Executor | bool | None = None,
+        min_interval: float | None = None,
+    ) -> Callable[[], None]:
+        """Register a callback receiving the state and the fields that changed."""
+        return self._callbacks.subscribe(
+            callback, with_changes=True, executor=executor, min_interval=min_interval
+        )
 
-        self._callbacks.append(callback)
-        return unregister_callback
\ No newline at end of file
+    @property
+    def callback_stats(self) -> dict[Callable[..., Any], SubscriberStats]:
+        """Return the delivery statistics of each registered callback."""
+        return self._callbacks.stats
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Sequence
+
+# Seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Names used by GoveeInstance
+CONNECT_DURATION = 'connect_duration_seconds'
+CONNECT_LOCK_WAIT = 'connect_lock_wait_seconds'
+OPERATION_LOCK_WAIT = 'operation_lock_wait_seconds'
+WRITE_LATENCY = 'write_latency_seconds'
+RETRIES = 'retries_total'
+BACKOFFS = 'backoffs_total'
+UNEXPECTED_DISCONNECTS = 'unexpected_disconnects_total'
+NOTIFICATIONS = 'notifications_total'
+RSSI = 'rssi_dbm'
+
+
+class MetricsSink:
+    """
+    Receives the metrics of GoveeInstance, labelled by device address.
+
+    This base class discards everything; subclass it to forward metrics to
+    another system.
+    """
+
+    def observe(self, name: str, address: str, value: float) -> None:
+        """Record a duration or other distribution sample."""
+
+    def increment(self, name: str, address: str, amount: int = 1) -> None:
+        """Increase a counter."""
+
+    def gauge(self, name: str, address: str, value: float) -> None:
+        """Set the current value of a gauge."""
+
+
+NULL_SINK = MetricsSink()
+
+
+class Histogram:
+    """Cumulative bucket counts, like a Prometheus histogram."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """(upper bound, count) pairs, the last bound being +inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip((*self.buckets, float('inf')), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class InMemorySink(MetricsSink):
+    """Keeps every metric in memory, keyed by (name, address)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+        self.counters: dict[tuple[str, str], int] = {}
+        self.gauges: dict[tuple[str, str], float] = {}
+
+    def observe(self, name: str, address: str, value: float) -> None:
+        key = (name, address)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def increment(self, name: str, address: str, amount: int = 1) -> None:
+        key = (name, address)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def gauge(self, name: str, address: str, value: float) -> None:
+        self.gauges[(name, address)] = value
+
+
+def _format(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(sink: InMemorySink, prefix: str = 'govee_btled') -> str:
+    """Renders an InMemorySink in the Prometheus text exposition format."""
+    lines: list[str] = []
+
+    def _family(metrics: dict, kind: str) -> None:
+        families: dict[str, list] = {}
+        for (name, address), value in sorted(metrics.items()):
+            families.setdefault(f'{prefix}_{name}', []).append((address, value))
+        for name in families:
+            lines.append(f'# TYPE {name} {kind}')
+            for address, value in families[name]:
+                label = f'address="{address}"'
+                if kind == 'histogram':
+                    for bound, count in value.cumulative():
+                        lines.append(f'{name}_bucket{{{label},le="{_format(bound)}"}} {count}')
+                    lines.append(f'{name}_sum{{{label}}} {_format(value.sum)}')
+                    lines.append(f'{name}_count{{{label}}} {value.count}')
+                else:
+                    lines.append(f'{name}{{{label}}} {_format(value)}')
+
+    _family(sink.counters, 'counter')
+    _family(sink.gauges, 'gauge')
+    _family(sink.histograms, 'histogram')
+    return '\n'.join(lines) + '\n'
@@ -1,6 +1,19 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+
+
+# Fields of GoveeState reported by the device
+REPORTED_FIELDS = ("power", "rgb", "color_temp", "brightness")
+
+
+@dataclass(frozen=True)
+class DeviceInfo:
+
+    firmware_version: str
+    hardware_version: str
 
 
 @dataclass(frozen=True)
@@ -10,3 +23,16 @@ class GoveeState:
     rgb: tuple[int, int, int] = (0, 0, 0)
     color_temp: int = 0
     brightness: int = 0
+    # time.monotonic() of the last device report, per field name
+    updated_at: Mapping[str, float] = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def verified(self) -> bool:
+        """Whether the device reported every field, which a restored state has not."""
+        return all(name in self.updated_at for name in REPORTED_FIELDS)
+
+    def age(self, name: str, now: float | None = None) -> float:
+        """Seconds since the device last reported a field, inf if it never did."""
+        if name not in self.updated_at:
+            return float("inf")
+        return (time.monotonic() if now is None else now) - self.updated_at[name]
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket limiting GATT writes to `rate` per second with bursts of up
+    to `burst` back-to-back writes.
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        if rate <= 0:
+            raise ValueError(f'Rate must be positive: {rate}')
+        if burst < 1:
+            raise ValueError(f'Burst must be at least 1: {burst}')
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """ Waits until a write is allowed. """
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def record(self, latency: float, error: bool = False) -> None:
+        """ Called after every write with its latency and whether it failed. """
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate follows the link: it grows additively while writes
+    complete faster than `target_latency` and shrinks multiplicatively when
+    writes get slow or fail.
+    """
+
+    def __init__(
+        self,
+        rate: float = 50,
+        burst: int = 1,
+        min_rate: float = 5,
+        max_rate: float = 200,
+        target_latency: float = 0.05,
+        increase: float = 1,
+        decrease: float = 0.5,
+        smoothing: float = 0.2,
+    ) -> None:
+        super().__init__(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.smoothing = smoothing
+        self.latency: float | None = None
+        self.errors = 0
+
+    @property
+    def interval(self) -> float:
+        """ Current minimum time between two writes. """
+        return 1 / self.rate
+
+    def record(self, latency: float, error: bool = False) -> None:
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+        if error:
+            self.errors += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+        elif self.latency > self.target_latency:
+            self.rate = max(self.min_rate, self.rate * (1 - self.smoothing))
+        else:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+_ADAPTER_LIMITERS: dict[str, TokenBucket] = {}
+
+
+def get_adapter_rate_limiter(adapter: str, rate: float = 50, burst: int = 1) -> TokenBucket:
+    """
+    Returns the adaptive limiter shared by all devices on an adapter, to pass
+    as GoveeInstance(adapter_rate_limiter=...) with utils.get_adapter().
+    """
+    if adapter not in _ADAPTER_LIMITERS:
+        _ADAPTER_LIMITERS[adapter] = AdaptiveRateLimiter(rate, burst)
+    return _ADAPTER_LIMITERS[adapter]
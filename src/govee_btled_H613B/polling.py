@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+from .fleet import GoveeFleet
+from .govee_btled_H613B import GoveeInstance
+
+_LOGGER = logging.getLogger(__name__)
+
+POLL_INTERVAL = 60.0
+MIN_POLL_INTERVAL = 10.0
+MAX_POLL_INTERVAL = 600.0
+
+# Seconds between two checks for due devices
+TICK = 1.0
+
+
+@dataclass
+class PollEntry:
+    """Polling schedule of one device."""
+
+    interval: float
+    next_at: float
+    external_changes: int = 0
+    polled_at: float | None = None
+    polling: bool = False
+    polls: int = 0
+    failures: int = 0
+
+
+class PollScheduler:
+    """
+    Keeps the state of a fleet's devices up to date in the background.
+
+    First polls are spread randomly over one interval and every following one
+    is jittered, so devices do not wake up together; open connections are
+    bounded by the fleet's slots per adapter. The interval of a device is halved when the
+    device reports changes made by something else, and grows by `backoff`
+    while its state stays the same or its polls fail. A device that is already
+    connected is polled up to `early` of its interval ahead of time to reuse
+    the connection, and fields the device reported since the last poll are not
+    queried again.
+    """
+
+    def __init__(
+        self,
+        fleet: GoveeFleet,
+        interval: float = POLL_INTERVAL,
+        min_interval: float = MIN_POLL_INTERVAL,
+        max_interval: float = MAX_POLL_INTERVAL,
+        jitter: float = 0.1,
+        backoff: float = 1.5,
+        early: float = 0.5,
+    ) -> None:
+        self.fleet = fleet
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.backoff = backoff
+        self.early = early
+        self.entries: dict[str, PollEntry] = {}
+        self._task: asyncio.Task | None = None
+        self._polls: set[asyncio.Task] = set()
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self) -> None:
+        tasks = [task for task in (self._task, *self._polls) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _sync_entries(self, now: float) -> None:
+        addresses = {instance.address for instance in self.fleet}
+        for address in addresses - self.entries.keys():
+            instance = self.fleet[address]
+            self.entries[address] = PollEntry(
+                self.interval, now + random.uniform(0, self.interval), instance.external_changes
+            )
+        for address in self.entries.keys() - addresses:
+            del self.entries[address]
+
+    def _is_due(self, instance: GoveeInstance, entry: PollEntry, now: float) -> bool:
+        if entry.polling:
+            return False
+        if now >= entry.next_at:
+            return True
+        return instance.is_connected and entry.next_at - now <= entry.interval * self.early
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._sync_entries(now)
+            due = [
+                address for address, entry in self.entries.items()
+                if self._is_due(self.fleet[address], entry, now)
+            ]
+            if due:
+                for address in due:
+                    self.entries[address].polling = True
+                task = asyncio.create_task(self.fleet.run(self._poll, due))
+                self._polls.add(task)
+                task.add_done_callback(self._polls.discard)
+            await asyncio.sleep(TICK)
+
+    async def _poll(self, instance: GoveeInstance) -> None:
+        entry = self.entries.get(instance.address)
+        if entry is None:
+            return
+        try:
+            if instance.circuit_breaker.is_open:
+                raise RuntimeError("circuit open")
+            max_age = None if entry.polled_at is None else time.monotonic() - entry.polled_at
+            await instance.update(max_age=max_age, access=False)
+        except Exception as ex:
+            entry.failures += 1
+            entry.interval = min(entry.interval * self.backoff, self.max_interval)
+            _LOGGER.debug(
+                "%s: Poll failed, next in %.0fs: %s", instance.name, entry.interval, ex
+            )
+            raise
+        else:
+            entry.polls += 1
+            if instance.external_changes != entry.external_changes:
+                entry.interval = max(entry.interval / 2, self.min_interval)
+            else:
+                entry.interval = min(entry.interval * self.backoff, self.max_interval)
+            entry.external_changes = instance.external_changes
+        finally:
+            entry.polling = False
+            entry.polled_at = time.monotonic()
+            entry.next_at = entry.polled_at + self._jittered(entry.interval)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+from .utils import create_status_callback
+
+
+class ResponseTracker:
+    """
+    Correlates KEEP_ALIVE replies with the queries waiting for them.
+
+    Pending queries are keyed by the reply's command byte, so queries for
+    different commands can all be in flight at once.
+    """
+
+    def __init__(self) -> None:
+        self._waiters: dict[int, list[tuple[asyncio.Future, Callable[[int, bytearray], None]]]] = {}
+
+    @property
+    def pending(self) -> bool:
+        """ Whether any query is waiting for its reply. """
+        return bool(self._waiters)
+
+    def expect(self, cmd: int) -> asyncio.Future:
+        """ Returns a future resolved with the next reply for `cmd`. """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(cmd, []).append((future, create_status_callback(future)))
+        return future
+
+    def discard(self, cmd: int, future: asyncio.Future) -> None:
+        """ Stops waiting for a reply, e.g. after a timeout. """
+        waiters = self._waiters.get(cmd)
+        if waiters:
+            waiters[:] = [waiter for waiter in waiters if waiter[0] is not future]
+            if not waiters:
+                del self._waiters[cmd]
+
+    def resolve(self, sender: int, data: bytearray) -> bool:
+        """ Hands a reply to every query waiting for its command; True if any was. """
+        waiters = self._waiters.pop(data[1], None)
+        if not waiters:
+            return False
+        for _future, callback in waiters:
+            callback(sender, data)
+        return True
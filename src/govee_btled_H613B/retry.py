@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import random
+import time
+from enum import Enum
+
+BLEAK_BACKOFF_TIME = 0.25
+
+DEFAULT_ATTEMPTS = 3
+
+
+class RetryPolicy:
+    """
+    How a command is retried: up to `attempts` tries, exponential backoff with
+    jitter starting at `backoff`, and an optional `deadline` in seconds for the
+    whole command including backoffs.
+    """
+
+    def __init__(
+        self,
+        attempts: int = DEFAULT_ATTEMPTS,
+        deadline: float | None = None,
+        backoff: float = BLEAK_BACKOFF_TIME,
+        max_backoff: float = 2.0,
+        multiplier: float = 2.0,
+        jitter: float = 0.5,
+    ) -> None:
+        self.attempts = attempts
+        self.deadline = deadline
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+    def backoff_time(self, attempt: int) -> float:
+        """Backoff after the failed attempt number `attempt`, counting from 0."""
+        base = min(self.max_backoff, self.backoff * self.multiplier ** attempt)
+        return base * (1 - self.jitter * random.random())
+
+
+class CircuitState(Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Fails commands fast while a device is unreachable.
+
+    The breaker opens after `failure_threshold` consecutive failed commands, or
+    while the advertised RSSI is below `min_rssi`. After `reset_timeout`
+    seconds a single trial is let through (half open); its outcome closes or
+    reopens the breaker. A trial that reports no outcome within
+    `reset_timeout`, e.g. because it was cancelled, is replaced by a new one.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        min_rssi: int | None = None,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.min_rssi = min_rssi
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_at: float | None = None
+
+    def rssi_too_low(self, rssi: int | None) -> bool:
+        return self.min_rssi is not None and rssi is not None and rssi < self.min_rssi
+
+    def allow(self, rssi: int | None = None) -> bool:
+        """Whether a command may be attempted now."""
+        if self.rssi_too_low(rssi):
+            return False
+        if self.state is CircuitState.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state is CircuitState.OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            self.state = CircuitState.HALF_OPEN
+        elif self.trial_at is not None and now - self.trial_at < self.reset_timeout:
+            # Only one trial at a time
+            return False
+        self.trial_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.trial_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_at = None
+        if self.state is CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state is CircuitState.OPEN
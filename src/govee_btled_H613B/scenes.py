@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+
+from .codec import MAX_PAYLOAD_LENGTH, encode_frame
+from .const import DiyCommand, DiyPacket, LedCommand, LedMode, LedMsgType
+
+SCENE_CACHE_SIZE = 64
+
+# Bytes of program data per packet, after the sequence byte
+CHUNK_SIZE = MAX_PAYLOAD_LENGTH - 1
+
+
+@dataclass(frozen=True)
+class Scene:
+    """
+    A scene stored on the device, identified by its code. Custom scenes carry
+    the program uploaded to that code before activating it.
+    """
+
+    code: int
+    program: bytes = b''
+
+    @property
+    def slot(self) -> tuple[int, int]:
+        return LedMode.SCENES, self.code
+
+    def data(self) -> bytes:
+        return self.program
+
+    def activation(self) -> bytes:
+        return bytes((LedMode.SCENES, self.code & 0xFF, self.code >> 8))
+
+
+@dataclass(frozen=True)
+class DiyPattern:
+    """ A DIY pattern: an animation style cycling through a list of colors. """
+
+    pattern_id: int
+    style: int
+    mode: int = 0
+    speed: int = 50
+    colors: Tuple[Tuple[int, int, int], ...] = ()
+
+    @property
+    def slot(self) -> tuple[int, int]:
+        return LedMode.DIY, self.pattern_id
+
+    def data(self) -> bytes:
+        return bytes(
+            (self.pattern_id, self.style, self.mode, self.speed, len(self.colors))
+        ) + bytes(channel for rgb in self.colors for channel in rgb)
+
+    def activation(self) -> bytes:
+        return bytes((LedMode.DIY, self.pattern_id))
+
+
+@dataclass(frozen=True)
+class EncodedScene:
+    """ The frames uploading a scene or pattern and the frame activating it. """
+
+    slot: tuple[int, int]
+    digest: str
+    upload: tuple[bytes, ...]
+    activation: bytes
+
+
+def encode_program(data: bytes) -> tuple[bytes, ...]:
+    """
+    Splits program data into DIY frames: a start packet carrying the number of
+    data packets, the numbered data packets and an end packet.
+    """
+    chunks = [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+    if len(chunks) >= DiyPacket.END:
+        raise ValueError(f'Program too long: {len(data)} bytes')
+    frames = [encode_frame(LedMsgType.DIY, DiyCommand.PROGRAM, bytes((DiyPacket.START, len(chunks))))]
+    frames.extend(
+        encode_frame(LedMsgType.DIY, DiyCommand.PROGRAM, bytes((index,)) + chunk)
+        for index, chunk in enumerate(chunks, 1)
+    )
+    frames.append(encode_frame(LedMsgType.DIY, DiyCommand.PROGRAM, bytes((DiyPacket.END,))))
+    return tuple(frames)
+
+
+@lru_cache(maxsize=SCENE_CACHE_SIZE)
+def encode_scene(scene: Scene | DiyPattern) -> EncodedScene:
+    """ Encodes a scene or pattern once; the digest identifies its content. """
+    data = scene.data()
+    return EncodedScene(
+        slot=scene.slot,
+        digest=hashlib.sha1(data).hexdigest(),
+        upload=encode_program(data) if data else (),
+        activation=encode_frame(LedMsgType.COMMAND, LedCommand.COLOR, scene.activation()),
+    )
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from collections.abc import Callable
+from typing import Any
+
+from bleak.backends.device import BLEDevice
+from bleak.exc import BleakDBusError, BleakError
+
+from .codec import encode_frame, is_valid_frame
+from .const import (
+    READ_CHARACTERISTIC_UUIDS, WRITE_CHARACTERISTIC_UUIDS, LedCommand, LedMode, LedMsgType, LedQuery
+)
+
+READ_HANDLE = 0x0010
+WRITE_HANDLE = 0x0014
+
+
+class SimulatedCharacteristic:
+    def __init__(self, uuid: str, handle: int) -> None:
+        self.uuid = uuid
+        self.handle = handle
+
+    def __repr__(self) -> str:
+        return f'SimulatedCharacteristic({self.uuid}, {self.handle:#06x})'
+
+
+class SimulatedServices:
+    """ The subset of BleakGATTServiceCollection used by GoveeInstance. """
+
+    def __init__(self) -> None:
+        self.characteristics = {
+            READ_HANDLE: SimulatedCharacteristic(READ_CHARACTERISTIC_UUIDS[0], READ_HANDLE),
+            WRITE_HANDLE: SimulatedCharacteristic(WRITE_CHARACTERISTIC_UUIDS[0], WRITE_HANDLE),
+        }
+
+    def get_characteristic(self, specifier: Any) -> SimulatedCharacteristic | None:
+        if isinstance(specifier, SimulatedCharacteristic):
+            return specifier
+        if isinstance(specifier, int):
+            return self.characteristics.get(specifier)
+        for characteristic in self.characteristics.values():
+            if characteristic.uuid == str(specifier).lower():
+                return characteristic
+        return None
+
+
+class SimulatedDevice:
+    """
+    An in-process H613B.
+
+    It keeps the light's state, applies COMMAND frames and answers the
+    KEEP_ALIVE status queries with frames in the format of the real device.
+    Latencies are in seconds, rates are probabilities per write; `seed` makes
+    the injected faults reproducible.
+    """
+
+    def __init__(
+        self,
+        address: str = 'A4:C1:38:00:00:01',
+        name: str = 'GBK_H613B_SIM',
+        connect_latency: float = 0.0,
+        write_latency: float = 0.0,
+        notify_latency: float = 0.0,
+        packet_loss: float = 0.0,
+        disconnect_rate: float = 0.0,
+        dbus_error_rate: float = 0.0,
+        rssi: int = -60,
+        seed: int | None = None,
+        firmware_version: str = '2.04.00',
+        hardware_version: str = '2.01.01',
+    ) -> None:
+        self.connect_latency = connect_latency
+        self.write_latency = write_latency
+        self.notify_latency = notify_latency
+        self.packet_loss = packet_loss
+        self.disconnect_rate = disconnect_rate
+        self.dbus_error_rate = dbus_error_rate
+        self.rssi = rssi
+        self.firmware_version = firmware_version
+        self.hardware_version = hardware_version
+        self.random = random.Random(seed)
+        self.ble_device = BLEDevice(
+            address,
+            name,
+            {'path': f"/org/bluez/hci0/dev_{address.replace(':', '_')}", 'props': {}},
+        )
+        self.services = SimulatedServices()
+
+        self.power = False
+        self.rgb = (0, 0, 0)
+        self.color_temp = 0
+        self.white = (0, 0, 0)
+        self.brightness = 0
+
+        self.client: SimulatedClient | None = None
+        self.writes: list[bytes] = []
+        self.connections = 0
+        self.frames_lost = 0
+        self.disconnects = 0
+        self.dbus_errors = 0
+
+    async def establish_connection(
+        self,
+        client_class: Any,
+        device: BLEDevice,
+        name: str,
+        disconnected_callback: Callable[[Any], None] | None = None,
+        **kwargs: Any,
+    ) -> SimulatedClient:
+        """ Drop-in replacement for bleak_retry_connector.establish_connection. """
+        if self.client is not None and self.client.is_connected:
+            raise BleakError(f'{name}: device accepts a single connection')
+        if self.connect_latency:
+            await asyncio.sleep(self.connect_latency)
+        self.connections += 1
+        self.client = SimulatedClient(self, disconnected_callback)
+        return self.client
+
+    def drop_connection(self) -> None:
+        """ Disconnects the current client as if the link was lost. """
+        if self.client is not None and self.client.is_connected:
+            self.disconnects += 1
+            self.client._lost()
+
+    def _apply(self, frame: bytes) -> bytes | None:
+        """ Applies a frame and returns the reply, if any. """
+        head, cmd, payload = frame[0], frame[1], frame[2:19]
+        if head == LedMsgType.COMMAND:
+            if cmd == LedCommand.POWER:
+                self.power = payload[0] == 0x01
+            elif cmd == LedCommand.BRIGHTNESS:
+                self.brightness = payload[0]
+            elif cmd == LedCommand.COLOR and payload[0] == LedMode.MANUAL:
+                self.rgb = (payload[1], payload[2], payload[3])
+                self.color_temp = payload[4] << 8 | payload[5]
+                self.white = (payload[6], payload[7], payload[8])
+            return None
+        if head == LedMsgType.KEEP_ALIVE:
+            if cmd == LedCommand.POWER:
+                return encode_frame(head, cmd, bytes((int(self.power),)))
+            if cmd == LedCommand.COLOR:
+                return encode_frame(head, cmd, bytes((
+                    LedMode.MANUAL, *self.rgb, self.color_temp >> 8, self.color_temp & 0xFF, *self.white
+                )))
+            if cmd == LedCommand.BRIGHTNESS:
+                return encode_frame(head, cmd, bytes((self.brightness,)))
+            if cmd == LedQuery.FIRMWARE_VERSION:
+                return encode_frame(head, cmd, self.firmware_version.encode())
+            if cmd == LedQuery.HARDWARE_VERSION:
+                return encode_frame(head, cmd, b'\x03' + self.hardware_version.encode())
+        return None
+
+
+class SimulatedClient:
+    """ The subset of BleakClientWithServiceCache used by GoveeInstance. """
+
+    def __init__(self, device: SimulatedDevice, disconnected_callback: Callable[[Any], None] | None) -> None:
+        self.device = device
+        self.services = device.services
+        self.address = device.ble_device.address
+        self._disconnected_callback = disconnected_callback
+        self._notify: dict[int, Callable[[Any, bytearray], None]] = {}
+        self._connected = True
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def get_services(self) -> SimulatedServices:
+        return self.services
+
+    async def start_notify(self, char_specifier: Any, callback: Callable[[Any, bytearray], None], **kwargs: Any) -> None:
+        self._check_connected()
+        characteristic = self.services.get_characteristic(char_specifier)
+        if characteristic is None:
+            raise BleakError(f'Characteristic {char_specifier} not found')
+        self._notify[characteristic.handle] = callback
+
+    async def stop_notify(self, char_specifier: Any) -> None:
+        characteristic = self.services.get_characteristic(char_specifier)
+        if characteristic is not None:
+            self._notify.pop(characteristic.handle, None)
+
+    async def disconnect(self) -> bool:
+        self._connected = False
+        self._notify.clear()
+        return True
+
+    async def write_gatt_char(self, char_specifier: Any, data: Any, response: bool = False) -> None:
+        self._check_connected()
+        device = self.device
+        rand = device.random.random
+        if device.write_latency:
+            await asyncio.sleep(device.write_latency)
+        if device.dbus_error_rate and rand() < device.dbus_error_rate:
+            device.dbus_errors += 1
+            raise BleakDBusError('org.bluez.Error.Failed', ['Operation failed with ATT error: 0x0e'])
+        if device.disconnect_rate and rand() < device.disconnect_rate:
+            device.drop_connection()
+            raise BleakError('Not connected')
+        characteristic = self.services.get_characteristic(char_specifier)
+        if characteristic is None or characteristic.handle != WRITE_HANDLE:
+            raise BleakError(f'Characteristic {char_specifier} is not writable')
+        frame = bytes(data)
+        device.writes.append(frame)
+        if (device.packet_loss and rand() < device.packet_loss) or not is_valid_frame(frame):
+            device.frames_lost += 1
+            return
+        reply = device._apply(frame)
+        if reply is not None:
+            self._schedule_notification(reply)
+
+    def _schedule_notification(self, reply: bytes) -> None:
+        callback = self._notify.get(READ_HANDLE)
+        if callback is None:
+            return
+        characteristic = self.services.characteristics[READ_HANDLE]
+
+        def _deliver() -> None:
+            if self._connected:
+                callback(characteristic, bytearray(reply))
+
+        loop = asyncio.get_running_loop()
+        if self.device.notify_latency:
+            loop.call_later(self.device.notify_latency, _deliver)
+        else:
+            loop.call_soon(_deliver)
+
+    def _check_connected(self) -> None:
+        if not self._connected:
+            raise BleakError('Not connected')
+
+    def _lost(self) -> None:
+        self._connected = False
+        self._notify.clear()
+        if self._disconnected_callback is not None:
+            self._disconnected_callback(self)
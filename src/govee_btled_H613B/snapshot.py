@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import struct
+import time
+from collections.abc import Mapping
+
+from .models import GoveeState
+from .utils import atomic_write
+
+MAGIC = b'GVSS'
+VERSION = 1
+
+# Header: magic, version, wall clock time of the snapshot, record count;
+# record: address length, then power, r, g, b, color temp, brightness
+_HEADER = struct.Struct('<4sBdI')
+_RECORD = struct.Struct('<B3BHB')
+
+
+def dumps_snapshot(states: Mapping[str, GoveeState]) -> bytes:
+    parts = [_HEADER.pack(MAGIC, VERSION, time.time(), len(states))]
+    for address, state in states.items():
+        encoded = address.encode()
+        parts.append(struct.pack('<B', len(encoded)))
+        parts.append(encoded)
+        parts.append(_RECORD.pack(state.power, *state.rgb, state.color_temp, state.brightness))
+    return b''.join(parts)
+
+
+def loads_snapshot(data: bytes) -> tuple[float, dict[str, GoveeState]]:
+    """ Returns the time of the snapshot and the states, none of them verified. """
+    magic, version, saved_at, count = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a state snapshot')
+    position = _HEADER.size
+    states = {}
+    for _ in range(count):
+        length = data[position]
+        address = data[position + 1:position + 1 + length].decode()
+        position += 1 + length
+        power, r, g, b, color_temp, brightness = _RECORD.unpack_from(data, position)
+        position += _RECORD.size
+        states[address] = GoveeState(
+            power=bool(power), rgb=(r, g, b), color_temp=color_temp, brightness=brightness
+        )
+    return saved_at, states
+
+
+def save_snapshot(path: str, states: Mapping[str, GoveeState]) -> None:
+    atomic_write(path, dumps_snapshot(states))
+
+
+def load_snapshot(path: str) -> tuple[float, dict[str, GoveeState]]:
+    with open(path, 'rb') as file:
+        return loads_snapshot(file.read())
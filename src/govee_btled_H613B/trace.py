@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import struct
+import time
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .govee_btled_H613B import GoveeInstance
+
+MAGIC = b'GVTR'
+VERSION = 1
+
+DEFAULT_CAPACITY = 10000
+
+# Header: magic, version, address length; record: offset, kind, data length
+_HEADER = struct.Struct('<4sBB')
+_RECORD = struct.Struct('<dBB')
+
+
+class TraceEvent(IntEnum):
+    TX = 0x01
+    RX = 0x02
+    CONNECTED = 0x03
+    DISCONNECTED = 0x04
+    UNEXPECTED_DISCONNECT = 0x05
+
+
+@dataclass
+class Trace:
+    address: str
+    # (seconds since the first event, kind, data)
+    events: list[tuple[float, TraceEvent, bytes]]
+
+
+class TraceRecorder:
+    """
+    Ring buffer of the last `capacity` frames and connection events of a device.
+
+    Recording costs a clock read and a tuple; nothing is formatted until the
+    trace is dumped.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.events: deque[tuple[float, int, bytes]] = deque(maxlen=capacity)
+
+    def record(self, kind: TraceEvent, data: bytes = b'') -> None:
+        self.events.append((time.monotonic(), kind, bytes(data)))
+
+    def clear(self) -> None:
+        self.events.clear()
+
+    def dumps(self, address: str = '') -> bytes:
+        encoded = address.encode()
+        parts = [_HEADER.pack(MAGIC, VERSION, len(encoded)), encoded]
+        start = self.events[0][0] if self.events else 0.0
+        for timestamp, kind, data in self.events:
+            parts.append(_RECORD.pack(timestamp - start, kind, len(data)))
+            parts.append(data)
+        return b''.join(parts)
+
+    def dump(self, path: str, address: str = '') -> None:
+        with open(path, 'wb') as file:
+            file.write(self.dumps(address))
+
+
+def loads_trace(data: bytes) -> Trace:
+    magic, version, length = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a trace file')
+    position = _HEADER.size
+    address = data[position:position + length].decode()
+    position += length
+    events = []
+    while position < len(data):
+        offset, kind, size = _RECORD.unpack_from(data, position)
+        position += _RECORD.size
+        events.append((offset, TraceEvent(kind), bytes(data[position:position + size])))
+        position += size
+    return Trace(address, events)
+
+
+def load_trace(path: str) -> Trace:
+    with open(path, 'rb') as file:
+        return loads_trace(file.read())
+
+
+class TraceReplayer:
+    """
+    Drives a recorded trace against a device, e.g. one connected to the
+    simulator, `speed` times faster than recorded.
+
+    TX frames are written through the normal command path and disconnects are
+    replayed; recorded notifications are fed to the notification handler only
+    with `notifications`, since a simulated device answers queries itself.
+    """
+
+    def __init__(self, trace: Trace, speed: float = 1.0, notifications: bool = False) -> None:
+        if speed <= 0:
+            raise ValueError(f'Speed must be positive: {speed}')
+        self.trace = trace
+        self.speed = speed
+        self.notifications = notifications
+        self.frames_sent = 0
+
+    async def replay(self, instance: GoveeInstance, events: Iterable[tuple[float, TraceEvent, bytes]] | None = None) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for offset, kind, data in self.trace.events if events is None else events:
+            delay = start + offset / self.speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if kind == TraceEvent.TX:
+                await instance._send_command(data)
+                self.frames_sent += 1
+            elif kind == TraceEvent.RX and self.notifications:
+                instance._notification_handler(0, bytearray(data))
+            elif kind in (TraceEvent.DISCONNECTED, TraceEvent.UNEXPECTED_DISCONNECT):
+                await instance._execute_disconnect()
@@ -1,6 +1,20 @@
+from __future__ import annotations
+
 from colour import Color
 import asyncio
+import os
+import tempfile
+from collections.abc import AsyncIterator, Iterable
 from bleak import BleakClient, BleakScanner
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+
+DEVICE_NAME_PREFIX = "GBK_H613B_"
+
+DISCOVERY_TIMEOUT = 5.0
+
+# Last advertisement seen for each supported device, keyed by upper case address
+DEVICE_CACHE: dict[str, tuple[BLEDevice, AdvertisementData]] = {}
 
 def color2rgb(color):
     """ Converts a color-convertible into 3-tuple of 0-255 valued ints. """
@@ -10,13 +24,104 @@ def color2rgb(color):
     return tuple(rgb)
 
 
-async def discover():
+def is_supported(device: BLEDevice, advertisement_data: AdvertisementData | None = None) -> bool:
+    """ Whether a device advertises itself as a H613B; unnamed devices are not. """
+    name = device.name or (advertisement_data and advertisement_data.local_name)
+    return bool(name) and name.startswith(DEVICE_NAME_PREFIX)
+
+
+def get_cached_device(address: str) -> tuple[BLEDevice, AdvertisementData] | None:
+    """ The last seen device and advertisement for an address, if any. """
+    return DEVICE_CACHE.get(address.upper())
+
+
+async def discover_stream(
+    addresses: Iterable[str] | None = None, timeout: float = DISCOVERY_TIMEOUT
+) -> AsyncIterator[tuple[BLEDevice, AdvertisementData]]:
+    """
+    Yields supported devices as soon as their first advertisement arrives.
+
+    When addresses are given, only those are yielded and the scan stops as soon
+    as all of them were found.
+    """
+    queue: asyncio.Queue[tuple[BLEDevice, AdvertisementData]] = asyncio.Queue()
+    wanted = {address.upper() for address in addresses} if addresses is not None else None
+
+    def detection_callback(device: BLEDevice, advertisement_data: AdvertisementData) -> None:
+        if not is_supported(device, advertisement_data):
+            return
+        DEVICE_CACHE[device.address.upper()] = (device, advertisement_data)
+        queue.put_nowait((device, advertisement_data))
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    seen: set[str] = set()
+    async with BleakScanner(detection_callback=detection_callback):
+        while wanted is None or wanted:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                device, advertisement_data = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                return
+            address = device.address.upper()
+            if address in seen or (wanted is not None and address not in wanted):
+                continue
+            seen.add(address)
+            if wanted is not None:
+                wanted.discard(address)
+            yield device, advertisement_data
+
+
+async def discover(timeout: float = DISCOVERY_TIMEOUT):
     """Discover Bluetooth LE devices."""
-    devices = await BleakScanner.discover()
-    return [device for device in devices if device.name.startswith("GBK_H613B_")]
+    return [device async for device, _ in discover_stream(timeout=timeout)]
+
+def atomic_write(path: str, data: bytes) -> None:
+    """ Writes a file through a temporary file and a rename, so readers never see it half written. """
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
 
 def create_status_callback(future: asyncio.Future):
     def callback(sender: int, data: bytearray):
         if not future.done():
             future.set_result(data)
-    return callback
\ No newline at end of file
+    return callback
+
+def get_adapter(ble_device) -> str:
+    """ Name of the bluetooth adapter a device was seen on, e.g. hci0. """
+    details = ble_device.details
+    if isinstance(details, dict):
+        if source := details.get("source"):
+            return source
+        if path := details.get("path"):
+            # /org/bluez/hci0/dev_XX_XX_XX_XX_XX_XX
+            parts = path.split("/")
+            if len(parts) > 3:
+                return parts[3]
+    return "default"
+
+
+class LazyHex:
+    """ Formats frames as hex only when a log record is actually emitted. """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data) -> None:
+        self.data = data
+
+    def __str__(self) -> str:
+        if isinstance(self.data, (list, tuple)):
+            return str([frame.hex() for frame in self.data])
+        return self.data.hex()
@@ -0,0 +1,49 @@
+#! /usr/bin/env python3
+import timeit
+
+from govee_btled_H613B.codec import (
+    brightness_frame, color_frame, color_temp_frame, encode_frame, power_frame
+)
+from govee_btled_H613B.const import LedCommand, LedMode, LedMsgType
+
+NUMBER = 100000
+
+
+def legacy_frame(head, cmd, payload):
+    """ Frame building as done by GoveeInstance._send before the codec. """
+    if not isinstance(cmd, int):
+        raise ValueError('Invalid command')
+    if not isinstance(payload, bytes) and not (isinstance(payload, list) and all(isinstance(x, int) for x in payload)):
+        raise ValueError('Invalid payload')
+    if len(payload) > 17:
+        raise ValueError('Payload too long')
+    cmd = cmd & 0xFF
+    frame = bytes([head, cmd]) + bytes(payload)
+    frame += bytes([0] * (19 - len(frame)))
+    checksum = 0
+    for b in frame:
+        checksum ^= b
+    frame += bytes([checksum & 0xFF])
+    return frame
+
+
+def report(name, fn):
+    per_frame = timeit.timeit(fn, number=NUMBER) / NUMBER
+    print(f'{name:<28} {per_frame * 1e9:8.0f} ns/frame')
+
+
+def main():
+    payload = [LedMode.MANUAL, 12, 34, 56]
+    assert legacy_frame(LedMsgType.COMMAND, LedCommand.COLOR, payload) == color_frame(12, 34, 56)
+
+    report('legacy color', lambda: legacy_frame(LedMsgType.COMMAND, LedCommand.COLOR, payload))
+    report('encode_frame color', lambda: encode_frame(LedMsgType.COMMAND, LedCommand.COLOR, bytes(payload)))
+    report('color_frame (cached)', lambda: color_frame(12, 34, 56))
+    report('color_temp_frame (cached)', lambda: color_temp_frame(6500, 0xff, 0xf9, 0xfb))
+    report('legacy brightness', lambda: legacy_frame(LedMsgType.COMMAND, LedCommand.BRIGHTNESS, [128]))
+    report('brightness_frame', lambda: brightness_frame(128))
+    report('power_frame', lambda: power_frame(True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+#! /usr/bin/env python3
+"""
+Bulk color conversion with govee_btled_H613B.color against utils.color2rgb,
+the per-color conversion through colour.Color.
+"""
+import colorsys
+import timeit
+
+from govee_btled_H613B import color
+from govee_btled_H613B.codec import color_frame
+from govee_btled_H613B.utils import color2rgb
+
+COUNT = 10000
+NUMBER = 5
+
+
+def report(name, fn):
+    per_color = min(timeit.repeat(fn, number=1, repeat=NUMBER)) / COUNT
+    print(f'{name:<32} {per_color * 1e9:8.0f} ns/color')
+
+
+def main():
+    hues = [index / COUNT for index in range(COUNT)]
+    hexes = ['#%02x%02x%02x' % tuple(round(x * 255) for x in colorsys.hsv_to_rgb(hue, 1, 1)) for hue in hues]
+    assert color.rgb_to_hex(color.hex_to_rgb(hexes)) == hexes
+    assert [tuple(row) for row in color.hex_to_rgb(hexes[:100])] == [color2rgb(h) for h in hexes[:100]]
+
+    print(f'numpy: {"yes" if color.np is not None else "no, pure-Python fallback"}')
+    report('color2rgb hex', lambda: [color2rgb(h) for h in hexes])
+    report('color.hex_to_rgb', lambda: color.hex_to_rgb(hexes))
+    report('colorsys hsv loop', lambda: [tuple(round(x * 255) for x in colorsys.hsv_to_rgb(h, 1, 1)) for h in hues])
+    report('color.hsv_to_rgb', lambda: color.hsv_to_rgb(hues))
+    report('color.kelvin_to_rgb', lambda: color.kelvin_to_rgb([1800 + index % 7200 for index in range(COUNT)]))
+    report('color2rgb + color_frame', lambda: [color_frame(*color2rgb(h)) for h in hexes])
+    report('hsv_to_rgb + color_frames', lambda: color.color_frames(color.hsv_to_rgb(hues), color.GAMMA_TABLE))
+
+
+if __name__ == '__main__':
+    main()
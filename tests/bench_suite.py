@@ -0,0 +1,153 @@
+#! /usr/bin/env python3
+"""
+Benchmarks of the hot paths against the simulated device, no hardware needed.
+
+    python tests/bench_suite.py --output bench.json
+    python tests/bench_suite.py --baseline bench.json --threshold 0.2
+
+With a baseline the run fails when a benchmark is more than `threshold`
+(relative) worse than the baseline value.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import time
+
+from govee_btled_H613B import GoveeInstance, __version__
+from govee_btled_H613B.codec import encode_frame
+from govee_btled_H613B.const import LedCommand, LedMode, LedMsgType
+from govee_btled_H613B.simulator import SimulatedDevice
+
+
+def result(value, unit, higher_is_better):
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def make_instance(index=0, **kwargs):
+    sim = SimulatedDevice(address=f'A4:C1:38:00:{index >> 8:02X}:{index & 0xFF:02X}', **kwargs)
+    return sim, GoveeInstance(sim.ble_device, connector=sim.establish_connection)
+
+
+def bench_encode(count):
+    payload = bytes((LedMode.MANUAL, 12, 34, 56))
+    start = time.perf_counter()
+    for _ in range(count):
+        encode_frame(LedMsgType.COMMAND, LedCommand.COLOR, payload)
+    return result((time.perf_counter() - start) / count * 1e9, 'ns/frame', False)
+
+
+async def bench_command_path(count):
+    _sim, led = make_instance()
+    await led.turn_on()
+    start = time.perf_counter()
+    for i in range(count):
+        await led.set_brightness(i & 0xFF)
+    elapsed = time.perf_counter() - start
+    await led.disconnect()
+    return result(count / elapsed, 'commands/s', True)
+
+
+async def bench_notifications(count):
+    _sim, led = make_instance()
+    received = []
+    led.register_callback(received.append)
+    frames = [
+        bytearray(encode_frame(LedMsgType.KEEP_ALIVE, LedCommand.BRIGHTNESS, bytes((i & 0xFF,))))
+        for i in range(256)
+    ]
+    start = time.perf_counter()
+    for i in range(count):
+        led._notification_handler(0, frames[i & 0xFF])
+    elapsed = time.perf_counter() - start
+    return result(count / elapsed, 'notifications/s', True)
+
+
+async def bench_reconnect(count):
+    _sim, led = make_instance()
+    total = 0.0
+    for _ in range(count):
+        await led._ensure_connected()
+        await led._execute_disconnect()
+        start = time.perf_counter()
+        await led._ensure_connected()
+        total += time.perf_counter() - start
+    await led.disconnect()
+    return result(total / count * 1e3, 'ms/reconnect', False)
+
+
+async def bench_scaling(instances, count):
+    leds = [make_instance(index)[1] for index in range(instances)]
+
+    async def drive(led):
+        for i in range(count):
+            await led.set_brightness(i & 0xFF)
+
+    await asyncio.gather(*(led.turn_on() for led in leds))
+    start = time.perf_counter()
+    await asyncio.gather(*(drive(led) for led in leds))
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*(led.disconnect() for led in leds))
+    return result(instances * count / elapsed, 'commands/s', True)
+
+
+async def run(args):
+    results = {
+        'encode_frame': bench_encode(args.count * 10),
+        'command_path': await bench_command_path(args.count),
+        'notification_dispatch': await bench_notifications(args.count * 10),
+        'reconnect': await bench_reconnect(max(args.count // 100, 10)),
+    }
+    for instances in args.instances:
+        results[f'scaling_{instances}'] = await bench_scaling(instances, max(args.count // instances, 10))
+    return results
+
+
+def regressions(results, baseline, threshold):
+    failed = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None or not previous['value']:
+            continue
+        change = (current['value'] - previous['value']) / previous['value']
+        if current['higher_is_better']:
+            change = -change
+        if change > threshold:
+            failed.append(f"{name}: {previous['value']:.4g} -> {current['value']:.4g} {current['unit']}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=2000, help='operations per benchmark')
+    parser.add_argument('--instances', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    logging.getLogger('govee_btled_H613B').setLevel(logging.WARNING)
+    report = {
+        'version': __version__,
+        'python': platform.python_version(),
+        'timestamp': time.time(),
+        'results': asyncio.run(run(args)),
+    }
+    for name, value in report['results'].items():
+        print(f"{name:<24} {value['value']:12.2f} {value['unit']}")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            failed = regressions(report['results'], json.load(file)['results'], args.threshold)
+        for line in failed:
+            print(f'REGRESSION {line}')
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+import asyncio
+import inspect
+
+import pytest
+
+from govee_btled_H613B import GoveeInstance
+from govee_btled_H613B.simulator import SimulatedDevice
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """ Runs `async def` tests in a fresh event loop. """
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    arguments = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    asyncio.run(pyfuncitem.obj(**arguments))
+    return True
+
+
+@pytest.fixture
+def make_led():
+    """ Builds a GoveeInstance on a simulated device; call it inside the test's event loop. """
+    def _make(sim=None, **kwargs):
+        sim = sim or SimulatedDevice()
+        return sim, GoveeInstance(sim.ble_device, connector=sim.establish_connection, **kwargs)
+    return _make
@@ -0,0 +1,77 @@
+import asyncio
+import wave
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from govee_btled_H613B.audio import AudioAnalyzer, AudioStream, wav_chunks, wav_samples  # noqa: E402
+
+RATE = 8000
+CHUNK = 256
+
+
+def _tone(frequency, seconds=0.5, channels=1):
+    t = np.arange(int(RATE * seconds)) / RATE
+    samples = (np.sin(2 * np.pi * frequency * t) * 20000).astype('<i2')
+    return np.repeat(samples, channels) if channels > 1 else samples
+
+
+def _write_wav(path, samples, channels=1):
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(samples.tobytes())
+    return str(path)
+
+
+@pytest.mark.parametrize('frequency, channel', [(100, 0), (1000, 1), (3000, 2)])
+def test_recording_drives_the_channel_of_its_band(tmp_path, frequency, channel):
+    samples, rate = wav_samples(_write_wav(tmp_path / 'tone.wav', _tone(frequency)))
+    colors = AudioAnalyzer(rate, CHUNK).render(samples)
+    assert len(colors) == len(samples) // CHUNK
+    assert all(max(range(3), key=rgb.__getitem__) == channel for rgb in colors[1:])
+
+
+def test_stereo_recordings_render_like_mono(tmp_path):
+    mono, _ = wav_samples(_write_wav(tmp_path / 'mono.wav', _tone(1000)))
+    stereo, _ = wav_samples(_write_wav(tmp_path / 'stereo.wav', _tone(1000, channels=2), channels=2))
+    assert AudioAnalyzer(RATE, CHUNK).render(mono) == AudioAnalyzer(RATE, CHUNK).render(stereo)
+
+
+async def test_recorded_file_streams_to_the_device(make_led, tmp_path):
+    sim, led = make_led()
+    path = _write_wav(tmp_path / 'tone.wav', _tone(100))
+    stream = await led.stream_audio(wav_chunks(path, CHUNK), RATE, CHUNK)
+    assert stream.frames_sent > 0
+    # The last, partial chunk of the file is padded
+    assert stream.frames_sent + stream.frames_skipped == -(-len(_tone(100)) // CHUNK)
+    assert sim.rgb[0] > 0 and sim.rgb[2] == 0
+    assert led.rgb == sim.rgb
+    assert not stream.stopped
+    await led.disconnect()
+
+
+async def test_interleaved_arrays_are_paced_by_the_sample_rate(make_led):
+    sim, led = make_led()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    stream = await led.stream_audio(_tone(3000, seconds=0.2, channels=2), RATE, CHUNK, channels=2)
+    assert loop.time() - start >= 0.15
+    assert stream.frames_sent + stream.frames_skipped == int(RATE * 0.2) // CHUNK
+    assert sim.rgb[2] > 0
+    await led.disconnect()
+
+
+async def test_setters_stop_the_stream(make_led):
+    sim, led = make_led()
+    streaming = asyncio.create_task(led.stream_audio(_tone(1000, seconds=5), RATE, CHUNK))
+    await asyncio.sleep(0.1)
+    await led.set_color((1, 2, 3))
+    stream = await asyncio.wait_for(streaming, 1)
+    assert stream.stopped
+    assert isinstance(stream, AudioStream)
+    await asyncio.sleep(0.1)
+    assert sim.rgb == (1, 2, 3)
+    await led.disconnect()
@@ -0,0 +1,58 @@
+import pytest
+from bleak.exc import BleakDBusError
+
+from govee_btled_H613B import metrics
+from govee_btled_H613B.codec import brightness_frame, color_frame, power_frame
+from govee_btled_H613B.metrics import InMemorySink
+from govee_btled_H613B.retry import RetryPolicy
+
+
+async def test_batch_writes_once_and_fires_callbacks_once(make_led):
+    sink = InMemorySink()
+    sim, led = make_led(metrics_sink=sink)
+    states = []
+    led.register_callback(states.append)
+    async with led.batch():
+        await led.turn_on()
+        await led.set_color((10, 20, 30))
+        await led.set_brightness(40)
+        # Nothing is written or applied before the block ends
+        assert sim.writes == []
+        assert not led.on
+    assert sim.writes == [power_frame(True), color_frame(10, 20, 30), brightness_frame(40)]
+    assert (sim.power, sim.rgb, sim.brightness) == (True, (10, 20, 30), 40)
+    assert len(states) == 1
+    assert (states[0].power, states[0].rgb, states[0].brightness) == (True, (10, 20, 30), 40)
+    assert sink.histograms[(metrics.OPERATION_LOCK_WAIT, led.address)].count == 1
+    await led.disconnect()
+
+
+async def test_empty_batch_writes_nothing(make_led):
+    sim, led = make_led()
+    async with led.batch():
+        pass
+    assert sim.writes == []
+    assert sim.connections == 0
+
+
+async def test_apply_sends_settings_in_one_batch(make_led):
+    sim, led = make_led()
+    await led.apply(power=True, rgb=(5, 6, 7), brightness=20)
+    assert sim.writes == [power_frame(True), color_frame(5, 6, 7), brightness_frame(20)]
+    await led.apply(power=False, brightness=10)
+    assert sim.writes[3:] == [brightness_frame(10), power_frame(False)]
+    assert sim.connections == 1
+    assert (led.on, led.brightness) == (False, 10)
+    await led.disconnect()
+
+
+async def test_failed_batch_leaves_the_state_alone(make_led):
+    sim, led = make_led(retry_policy=RetryPolicy(attempts=1))
+    await led.turn_off()
+    sim.dbus_error_rate = 1.0
+    with pytest.raises(BleakDBusError):
+        async with led.batch():
+            await led.turn_on()
+            await led.set_brightness(80)
+    assert not led.on
+    assert led.brightness == 0
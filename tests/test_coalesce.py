@@ -0,0 +1,60 @@
+import asyncio
+
+from govee_btled_H613B.codec import brightness_frame, color_frame, power_frame
+from govee_btled_H613B.coalesce import CoalescingSendQueue
+from govee_btled_H613B.simulator import SimulatedDevice
+
+
+async def test_queue_keeps_newest_frame_per_command():
+    sent = []
+
+    async def send(frame):
+        sent.append(frame)
+
+    queue = CoalescingSendQueue(send)
+    frames = [brightness_frame(level) for level in range(1, 6)]
+    await asyncio.gather(*(queue.put(frame) for frame in frames))
+    assert sent == [brightness_frame(5)]
+    assert queue.frames_coalesced == 4
+    assert queue.frames_sent == 1
+    assert queue.pending == 0
+
+
+async def test_power_frames_are_barriers():
+    sent = []
+
+    async def send(frame):
+        sent.append(frame)
+
+    queue = CoalescingSendQueue(send)
+    frames = [
+        brightness_frame(1), brightness_frame(2), power_frame(False),
+        brightness_frame(3), color_frame(1, 2, 3), brightness_frame(4),
+        power_frame(True), power_frame(True),
+    ]
+    await asyncio.gather(*(queue.put(frame) for frame in frames))
+    assert sent == [
+        brightness_frame(2), power_frame(False), brightness_frame(4), color_frame(1, 2, 3),
+        power_frame(True), power_frame(True),
+    ]
+
+
+async def test_queue_failure_reaches_every_coalesced_caller():
+    async def send(frame):
+        raise OSError('write failed')
+
+    queue = CoalescingSendQueue(send)
+    results = await asyncio.gather(
+        *(queue.put(brightness_frame(level)) for level in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, OSError) for result in results)
+
+
+async def test_coalescing_instance_ends_on_latest_value(make_led):
+    sim, led = make_led(SimulatedDevice(write_latency=0.005), coalesce=True)
+    await asyncio.gather(*(led.set_brightness(level) for level in range(1, 21)))
+    assert sim.brightness == 20
+    assert led.brightness == 20
+    assert led.send_queue.frames_coalesced > 0
+    assert len(sim.writes) < 20
+    await led.disconnect()
@@ -0,0 +1,65 @@
+import pytest
+
+from govee_btled_H613B.codec import (
+    STATE_DECODERS, FrameEncoder, brightness_frame, checksum, color_frame, color_temp_frame,
+    decode_frame, decode_version, encode_frame, is_valid_frame, power_frame,
+)
+from govee_btled_H613B.const import LedCommand, LedMsgType
+
+
+def _reference_frame(head, cmd, payload=b''):
+    frame = bytes((head, cmd)) + bytes(payload) + bytes(17 - len(payload))
+    value = 0
+    for b in frame:
+        value ^= b
+    return frame + bytes((value,))
+
+
+def test_frames_match_the_reference_encoding():
+    assert power_frame(True) == _reference_frame(0x33, LedCommand.POWER, b'\x01')
+    assert power_frame(False) == _reference_frame(0x33, LedCommand.POWER, b'\x00')
+    assert brightness_frame(54) == _reference_frame(0x33, LedCommand.BRIGHTNESS, b'\x36')
+    assert color_frame(255, 0, 0) == _reference_frame(0x33, LedCommand.COLOR, b'\x0d\xff\x00\x00')
+    assert color_temp_frame(4000, 1, 2, 3) == _reference_frame(
+        0x33, LedCommand.COLOR, b'\x0d\xff\xff\xff\x0f\xa0\x01\x02\x03'
+    )
+
+
+def test_frames_are_valid_and_decode():
+    frame = encode_frame(LedMsgType.COMMAND, LedCommand.BRIGHTNESS, b'\x10')
+    assert is_valid_frame(frame)
+    assert decode_frame(frame) == (LedMsgType.COMMAND, LedCommand.BRIGHTNESS, b'\x10' + bytes(16))
+    assert checksum(frame) == 0
+
+
+def test_invalid_frames_are_rejected():
+    frame = bytearray(power_frame(True))
+    frame[19] ^= 0xFF
+    assert not is_valid_frame(frame)
+    with pytest.raises(ValueError):
+        decode_frame(frame)
+    with pytest.raises(ValueError):
+        decode_frame(frame[:10])
+    with pytest.raises(ValueError):
+        encode_frame(LedMsgType.COMMAND, LedCommand.COLOR, bytes(18))
+
+
+def test_encoder_results_do_not_share_the_buffer():
+    encoder = FrameEncoder()
+    first = encoder.encode(LedMsgType.COMMAND, LedCommand.BRIGHTNESS, b'\x01')
+    encoder.encode(LedMsgType.COMMAND, LedCommand.BRIGHTNESS, b'\x02')
+    assert first == brightness_frame(1)
+
+
+def test_status_replies_decode_into_state_fields():
+    color = encode_frame(LedMsgType.KEEP_ALIVE, LedCommand.COLOR, b'\x0d\x01\x02\x03\x0f\xa0')
+    assert STATE_DECODERS[(LedMsgType.KEEP_ALIVE, LedCommand.COLOR)](color) == {
+        'rgb': (1, 2, 3), 'color_temp': 4000
+    }
+    power = encode_frame(LedMsgType.KEEP_ALIVE, LedCommand.POWER, b'\x01')
+    assert STATE_DECODERS[(LedMsgType.KEEP_ALIVE, LedCommand.POWER)](power) == {'power': True}
+
+
+def test_versions_decode():
+    assert decode_version(encode_frame(LedMsgType.KEEP_ALIVE, 0x06, b'2.04.00')) == '2.04.00'
+    assert decode_version(encode_frame(LedMsgType.KEEP_ALIVE, 0x07, b'\x032.01.01')) == '2.01.01'
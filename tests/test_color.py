@@ -0,0 +1,51 @@
+import pytest
+
+from govee_btled_H613B import color
+from govee_btled_H613B.codec import color_frame
+from govee_btled_H613B.colortemp import kelvin2rgb
+
+
+@pytest.fixture(params=['numpy', 'fallback'])
+def backend(request, monkeypatch):
+    """ Runs a test with numpy, when installed, and with the pure-Python fallback. """
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(color, 'np', None)
+    return request.param
+
+
+def rows(rgb):
+    return [tuple(int(x) for x in row) for row in rgb]
+
+
+def test_kelvin_scalars_and_sequences(backend):
+    assert rows(color.kelvin_to_rgb(2700)) == [tuple(kelvin2rgb(2700))]
+    assert rows(color.kelvin_to_rgb(2700.4)) == [tuple(kelvin2rgb(2700))]
+    assert rows(color.kelvin_to_rgb([1800, 9000])) == [tuple(kelvin2rgb(1800)), tuple(kelvin2rgb(9000))]
+    with pytest.raises(ValueError):
+        color.kelvin_to_rgb(1000)
+
+
+def test_hsv_scalars_broadcast(backend):
+    assert rows(color.hsv_to_rgb(0.0)) == [(255, 0, 0)]
+    assert rows(color.hsv_to_rgb([0.0, 1 / 3, 2 / 3], 1.0, 0.5)) == [(128, 0, 0), (0, 128, 0), (0, 0, 128)]
+    assert rows(color.hsl_to_rgb([0.5], 1.0, 0.5)) == [(0, 255, 255)]
+
+
+def test_round_trips(backend):
+    hexes = ['#ff0000', '#12ab34', '#000000']
+    assert color.rgb_to_hex(color.hex_to_rgb(hexes)) == hexes
+    assert color.rgb_to_hex(color.hex_to_rgb(['#abc'])) == ['#aabbcc']
+    hsv = [tuple(float(x) for x in row) for row in color.rgb_to_hsv([(255, 0, 0), (0, 0, 0)])]
+    assert hsv == [(0.0, 1.0, 1.0), (0.0, 0.0, 0.0)]
+    with pytest.raises(ValueError):
+        color.hex_to_rgb(['#abcd'])
+
+
+def test_single_rows_and_frames(backend):
+    assert color.rgb_to_hex((1, 2, 3)) == ['#010203']
+    assert rows(color.gradient((0, 0, 0), (255, 100, 10), 3)) == [(0, 0, 0), (128, 50, 5), (255, 100, 10)]
+    assert color.color_frames([(255, 0, 0), (0, 0, 255)]) == [color_frame(255, 0, 0), color_frame(0, 0, 255)]
+    corrected = color.color_frames((128, 0, 255), color.GAMMA_TABLE)
+    assert corrected == [color_frame(color.GAMMA_TABLE[128], 0, 255)]
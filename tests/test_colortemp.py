@@ -0,0 +1,40 @@
+import pytest
+
+from govee_btled_H613B.codec import color_temp_frame
+from govee_btled_H613B.colortemp import ALTERNATE_SHADE, PRIMARY_SHADE, hex2rgb, kelvin2rgb, kelvin_table
+from govee_btled_H613B.const import COLOR_TEMP_KELVIN_MAX, COLOR_TEMP_KELVIN_MIN, KELVIN2COLOR, SHADES_OF_WHITE
+
+
+def test_anchors_are_the_listed_shades():
+    for kelvin, color in KELVIN2COLOR.items():
+        assert tuple(kelvin2rgb(kelvin)) == hex2rgb(color)
+    alternates = [color for color, kelvin in SHADES_OF_WHITE if kelvin == 4000]
+    assert tuple(kelvin2rgb(4000, ALTERNATE_SHADE)) == hex2rgb(alternates[1])
+
+
+def test_values_between_anchors_are_interpolated():
+    low, high = hex2rgb(KELVIN2COLOR[2700]), hex2rgb(KELVIN2COLOR[2800])
+    assert tuple(kelvin2rgb(2750)) == tuple(round((a + b) / 2) for a, b in zip(low, high))
+    assert tuple(kelvin2rgb(2749.6)) == tuple(kelvin2rgb(2750))
+
+
+def test_table_covers_the_whole_range():
+    table = kelvin_table(PRIMARY_SHADE)
+    assert len(table) == 3 * (COLOR_TEMP_KELVIN_MAX - COLOR_TEMP_KELVIN_MIN + 1)
+    assert table[-3:] == kelvin2rgb(COLOR_TEMP_KELVIN_MAX)
+
+
+@pytest.mark.parametrize('kelvin', [COLOR_TEMP_KELVIN_MIN - 1, COLOR_TEMP_KELVIN_MAX + 1])
+def test_out_of_range_is_rejected(kelvin):
+    with pytest.raises(ValueError):
+        kelvin2rgb(kelvin)
+
+
+async def test_set_color_temp_sends_the_shade(make_led):
+    sim, led = make_led()
+    await led.set_color_temp(3450)
+    assert sim.writes == [color_temp_frame(3450, *kelvin2rgb(3450))]
+    assert sim.color_temp == 3450
+    assert sim.white == tuple(kelvin2rgb(3450))
+    assert led.color_temp == 3450
+    await led.disconnect()
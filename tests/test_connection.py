@@ -0,0 +1,80 @@
+import time
+
+from bleak.backends.scanner import AdvertisementData
+
+from govee_btled_H613B.connection import DISCONNECT_DELAY, ConnectionPolicy
+
+
+def _advertisement(rssi=-60):
+    return AdvertisementData(None, {}, {}, [], None, rssi, ())
+
+
+def _used_every(policy, interval, times=5, start=1000.0):
+    for index in range(times):
+        policy.record_access(start + index * interval)
+    return start + (times - 1) * interval
+
+
+def test_default_delay_until_a_gap_is_seen():
+    policy = ConnectionPolicy()
+    assert policy.idle_timeout() == DISCONNECT_DELAY
+    policy.record_access(10.0)
+    policy.record_access(10.5)
+    assert policy.interval is None
+    assert policy.idle_timeout() == DISCONNECT_DELAY
+
+
+def test_regular_use_keeps_the_connection_for_the_gap():
+    policy = ConnectionPolicy(min_delay=10, max_delay=600, factor=1.5)
+    _used_every(policy, 60)
+    assert policy.interval == 60
+    assert policy.idle_timeout() == 90
+
+
+def test_rare_use_releases_the_slot_early():
+    policy = ConnectionPolicy(min_delay=10, max_delay=600)
+    _used_every(policy, 3600)
+    assert policy.idle_timeout() == 10
+
+
+def test_prewarm_only_ahead_of_the_predicted_access():
+    policy = ConnectionPolicy(prewarm_on_advertisement=True)
+    last = _used_every(policy, 100)
+    predicted = policy.next_access()
+    assert predicted == last + 100
+    assert not policy.should_prewarm(predicted - policy.idle_timeout() - 1)
+    assert policy.should_prewarm(predicted - 10)
+    assert policy.should_prewarm(predicted)
+    # A missed prediction does not keep reconnecting the device
+    assert not policy.should_prewarm(predicted + 1)
+    assert not policy.should_prewarm(predicted + 100000)
+    assert not ConnectionPolicy().should_prewarm()
+
+
+async def test_advertisement_prewarms_the_connection(make_led):
+    policy = ConnectionPolicy(prewarm_on_advertisement=True)
+    sim, led = make_led(connection_policy=policy)
+    led.set_ble_device_and_advertisement_data(sim.ble_device, _advertisement())
+    assert led._prewarm_task is None
+
+    # Pretend the device was used every 100 s and is due in 5 s
+    now = time.monotonic()
+    _used_every(policy, 100, start=now - 495)
+    led.set_ble_device_and_advertisement_data(sim.ble_device, _advertisement())
+    await led._prewarm_task
+    assert led.is_connected
+    assert sim.connections == 1
+    # Prewarming is not an access
+    assert policy._last_access == now - 95
+    await led.disconnect()
+
+
+async def test_idle_timeout_follows_the_policy(make_led):
+    policy = ConnectionPolicy(min_delay=10, max_delay=600)
+    sim, led = make_led(connection_policy=policy)
+    await led.turn_on()
+    assert led._disconnect_delay == DISCONNECT_DELAY
+    _used_every(policy, 3600)
+    await led.turn_off()
+    assert led._disconnect_delay == 10
+    await led.disconnect()
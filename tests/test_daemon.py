@@ -0,0 +1,116 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from govee_btled_H613B import GoveeInstance, daemon
+from govee_btled_H613B.exceptions import DaemonError
+from govee_btled_H613B.simulator import SimulatedDevice
+
+ADDRESS = 'A4:C1:38:00:00:01'
+
+
+def test_package_does_not_import_the_daemon():
+    code = 'import sys, govee_btled_H613B; assert "govee_btled_H613B.daemon" not in sys.modules'
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, '-c', code], check=True, env=env)
+
+
+def test_socket_path_is_resolved_on_use(monkeypatch):
+    monkeypatch.setenv(daemon.SOCKET_PATH_ENV, '/run/govee.sock')
+    assert daemon.GoveeDaemon().path == '/run/govee.sock'
+    monkeypatch.delenv(daemon.SOCKET_PATH_ENV)
+    monkeypatch.setenv('XDG_RUNTIME_DIR', '/run/user/1000')
+    assert daemon.DaemonClient().path == '/run/user/1000/govee_btled_H613B.sock'
+    monkeypatch.delenv('XDG_RUNTIME_DIR')
+    monkeypatch.setattr(daemon.os, 'getuid', lambda: 1234)
+    assert daemon.default_socket_path() == '/tmp/govee_btled_H613B-1234/govee_btled_H613B.sock'
+
+
+async def test_fallback_directory_must_be_private(tmp_path, monkeypatch):
+    directory = tmp_path / 'fallback'
+    monkeypatch.setattr(daemon, '_fallback_directory', lambda: str(directory))
+    server = daemon.GoveeDaemon(path=str(directory / 'govee.sock'))
+    await server.start()
+    assert (directory.stat().st_mode & 0o777) == 0o700
+    await server.close()
+
+    directory.chmod(0o755)
+    with pytest.raises(RuntimeError, match='accessible to other users'):
+        await server.start()
+    directory.chmod(0o700)
+    uid = os.getuid()
+    monkeypatch.setattr(daemon.os, 'getuid', lambda: uid + 1)
+    with pytest.raises(RuntimeError, match='owned by another user'):
+        await server.start()
+    monkeypatch.undo()
+
+    directory.rmdir()
+    (tmp_path / 'elsewhere').mkdir(mode=0o700)
+    directory.symlink_to(tmp_path / 'elsewhere')
+    monkeypatch.setattr(daemon, '_fallback_directory', lambda: str(directory))
+    with pytest.raises(RuntimeError, match='not a directory'):
+        await server.start()
+
+
+def _serve(tmp_path, sims):
+    """ A daemon on simulated devices, keyed by address. """
+    async def factory(address):
+        sim = sims[address]
+        return GoveeInstance(sim.ble_device, connector=sim.establish_connection)
+    return daemon.GoveeDaemon(factory, path=str(tmp_path / 'govee.sock'))
+
+
+async def test_client_drives_simulated_devices(tmp_path):
+    sims = {address: SimulatedDevice(address) for address in ('A4:C1:38:00:00:01', 'A4:C1:38:00:00:02')}
+    server = _serve(tmp_path, sims)
+    await server.start()
+    try:
+        async with daemon.DaemonClient(server.path) as client:
+            assert await client.call('ping') == 'pong'
+            events = []
+            await client.subscribe('a4:c1:38:00:00:01', lambda address, state: events.append(state))
+            await asyncio.gather(
+                client.set_color('A4:C1:38:00:00:01', (255, 0, 0)),
+                client.turn_on('A4:C1:38:00:00:02'),
+            )
+            assert sims['A4:C1:38:00:00:01'].rgb == (255, 0, 0)
+            assert sims['A4:C1:38:00:00:02'].power is True
+            assert events[-1]['rgb'] == [255, 0, 0]
+            assert set(await client.devices()) == set(sims)
+            with pytest.raises(DaemonError, match='Unknown operation'):
+                await client.call('explode', 'A4:C1:38:00:00:01')
+    finally:
+        await server.close()
+    assert not os.path.exists(server.path)
+
+
+async def test_client_survives_bad_callbacks_and_messages(tmp_path, caplog):
+    server = _serve(tmp_path, {ADDRESS: SimulatedDevice(ADDRESS)})
+    await server.start()
+    try:
+        async with daemon.DaemonClient(server.path) as client:
+            received = []
+
+            def failing(address, state):
+                raise RuntimeError('callback failed')
+
+            async def slow(address, state):
+                await asyncio.sleep(0)
+                # Coroutine callbacks run as tasks, so they may call the daemon
+                received.append(await client.state(address))
+
+            await client.subscribe(ADDRESS, failing)
+            await client.subscribe(ADDRESS, slow)
+            client._reader.feed_data(b'not json\n[1, 2]\n{"event": "state"}\n')
+            await client.set_color(ADDRESS, (0, 0, 255))
+            await client.turn_on(ADDRESS)
+            await asyncio.sleep(0.05)
+            assert received and received[-1]['rgb'] == [0, 0, 255]
+            assert await client.call('ping') == 'pong'
+    finally:
+        await server.close()
+    assert 'callback failed' in caplog.text
+    assert 'Ignoring malformed message' in caplog.text
@@ -0,0 +1,73 @@
+import json
+import logging
+
+from govee_btled_H613B import DeviceCache
+from govee_btled_H613B.codec import DEVICE_INFO_QUERY_FRAMES
+from govee_btled_H613B.simulator import SimulatedDevice
+
+ADDRESS = 'A4:C1:38:00:00:01'
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'cache' / 'devices.json')
+    DeviceCache(path).update(ADDRESS.lower(), firmware_version='1.0')
+    assert DeviceCache(path).get(ADDRESS) == {'firmware_version': '1.0'}
+    with open(path) as file:
+        assert json.load(file) == {ADDRESS: {'firmware_version': '1.0'}}
+
+
+def test_writers_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / 'devices.json')
+    first, second = DeviceCache(path), DeviceCache(path)
+    first.get(ADDRESS)
+    second.update('A4:C1:38:00:00:02', firmware_version='2.0')
+    first.update(ADDRESS, hardware_version='1.1')
+    assert DeviceCache(path).get('A4:C1:38:00:00:02') == {'firmware_version': '2.0'}
+    first.invalidate(ADDRESS)
+    assert DeviceCache(path).get(ADDRESS) == {}
+
+
+def test_corrupt_file_is_ignored(tmp_path, caplog):
+    path = tmp_path / 'devices.json'
+    path.write_text('{not json')
+    with caplog.at_level(logging.WARNING):
+        assert DeviceCache(str(path)).get(ADDRESS) == {}
+    assert 'unreadable' in caplog.text
+
+
+def test_unusable_path_falls_back_to_memory(tmp_path, caplog):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    cache = DeviceCache(str(blocker / 'devices.json'))
+    with caplog.at_level(logging.WARNING):
+        assert cache.get(ADDRESS) == {}
+        cache.update(ADDRESS, firmware_version='1.0')
+    assert cache.in_memory
+    assert cache.get(ADDRESS) == {'firmware_version': '1.0'}
+    cache.invalidate(ADDRESS)
+    assert cache.get(ADDRESS) == {}
+    assert caplog.text.count('in memory') == 1
+
+
+async def test_versions_are_queried_once_across_restarts(make_led, tmp_path):
+    path = str(tmp_path / 'devices.json')
+    sim, led = make_led(device_cache=DeviceCache(path))
+    info = await led.device_info()
+    assert (info.firmware_version, info.hardware_version) == ('2.04.00', '2.01.01')
+    assert sim.writes == list(DEVICE_INFO_QUERY_FRAMES.values())
+    assert await led.device_info() is info
+    await led.disconnect()
+
+    sim, led = make_led(SimulatedDevice(), device_cache=DeviceCache(path))
+    assert await led.device_info() == info
+    assert sim.writes == []
+    assert sim.connections == 0
+
+
+async def test_device_info_works_without_a_usable_cache(make_led, tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    sim, led = make_led(device_cache=DeviceCache(str(blocker / 'devices.json')))
+    info = await led.device_info()
+    assert info.firmware_version == '2.04.00'
+    await led.disconnect()
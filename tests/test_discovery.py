@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+
+from govee_btled_H613B import utils
+
+
+def _seen(address, name):
+    return BLEDevice(address, name, {}), AdvertisementData(name, {}, {}, [], None, -60, ())
+
+
+class FakeScanner:
+    """ Replays advertisements to the detection callback, one per loop iteration. """
+
+    advertisements: list = []
+    stopped_at = None
+
+    def __init__(self, detection_callback):
+        self.callback = detection_callback
+        self.task = None
+
+    async def _advertise(self):
+        for device, advertisement_data in self.advertisements:
+            await asyncio.sleep(0.01)
+            self.callback(device, advertisement_data)
+
+    async def __aenter__(self):
+        self.task = asyncio.create_task(self._advertise())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        FakeScanner.stopped_at = time.monotonic()
+        self.task.cancel()
+
+
+@pytest.fixture
+def scanner(monkeypatch):
+    monkeypatch.setattr(utils, 'BleakScanner', FakeScanner)
+    monkeypatch.setattr(utils, 'DEVICE_CACHE', {})
+    FakeScanner.advertisements = [
+        _seen('A4:C1:38:00:00:01', 'GBK_H613B_0001'),
+        _seen('11:22:33:44:55:66', 'Some speaker'),
+        _seen('A4:C1:38:00:00:01', 'GBK_H613B_0001'),
+        _seen('A4:C1:38:00:00:02', 'GBK_H613B_0002'),
+        _seen('A4:C1:38:00:00:03', None),
+    ]
+    return FakeScanner
+
+
+async def test_supported_devices_are_yielded_once(scanner):
+    found = [device.address async for device, _ in utils.discover_stream(timeout=0.2)]
+    assert found == ['A4:C1:38:00:00:01', 'A4:C1:38:00:00:02']
+    assert set(utils.DEVICE_CACHE) == {'A4:C1:38:00:00:01', 'A4:C1:38:00:00:02'}
+    device, advertisement_data = utils.get_cached_device('a4:c1:38:00:00:02')
+    assert advertisement_data.local_name == 'GBK_H613B_0002'
+
+
+async def test_scan_stops_once_every_address_is_found(scanner):
+    start = time.monotonic()
+    found = [
+        device.address
+        async for device, _ in utils.discover_stream(['a4:c1:38:00:00:01'], timeout=5)
+    ]
+    assert found == ['A4:C1:38:00:00:01']
+    assert scanner.stopped_at - start < 1
+
+
+async def test_scan_gives_up_after_the_timeout(scanner):
+    start = time.monotonic()
+    found = [device async for device, _ in utils.discover_stream(['A4:C1:38:00:00:09'], timeout=0.1)]
+    assert found == []
+    assert 0.1 <= time.monotonic() - start < 1
+
+
+async def test_discover_collects_the_stream(scanner):
+    devices = await utils.discover(timeout=0.2)
+    assert [device.name for device in devices] == ['GBK_H613B_0001', 'GBK_H613B_0002']
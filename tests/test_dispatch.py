@@ -0,0 +1,62 @@
+import asyncio
+
+from govee_btled_H613B.dispatch import CallbackDispatcher
+from govee_btled_H613B.models import GoveeState
+
+
+async def test_min_interval_merges_updates():
+    dispatcher = CallbackDispatcher()
+    received = []
+
+    def callback(state, changes):
+        received.append((state, changes))
+
+    dispatcher.subscribe(callback, with_changes=True, min_interval=0.05)
+    for level in range(1, 11):
+        dispatcher.dispatch(GoveeState(brightness=level), {'brightness': level})
+    dispatcher.dispatch(GoveeState(brightness=10, power=True), {'power': True})
+    assert len(received) == 1
+    await asyncio.sleep(0.1)
+    assert len(received) == 2
+    state, changes = received[1]
+    assert state.brightness == 10 and state.power
+    assert changes == {'brightness': 10, 'power': True}
+    assert dispatcher.stats[callback].coalesced == 9
+
+
+async def test_slow_coroutine_callbacks_do_not_overlap():
+    dispatcher = CallbackDispatcher()
+    running = 0
+    overlapped = False
+    received = []
+
+    async def callback(state):
+        nonlocal running, overlapped
+        running += 1
+        overlapped |= running > 1
+        await asyncio.sleep(0.02)
+        received.append(state.brightness)
+        running -= 1
+
+    dispatcher.subscribe(callback)
+    for level in range(5):
+        dispatcher.dispatch(GoveeState(brightness=level), {'brightness': level})
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.1)
+    assert not overlapped
+    assert received == [0, 4]
+    assert dispatcher.stats[callback].calls == 2
+
+
+async def test_failing_callback_does_not_stop_others():
+    dispatcher = CallbackDispatcher()
+    received = []
+
+    def broken(state):
+        raise RuntimeError('broken')
+
+    dispatcher.subscribe(broken)
+    dispatcher.subscribe(received.append)
+    dispatcher.dispatch(GoveeState(power=True), {'power': True})
+    assert len(received) == 1
+    assert dispatcher.stats[broken].errors == 1
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from govee_btled_H613B.codec import brightness_frame, color_frame
+from govee_btled_H613B.effects import (
+    Animation, BrightnessFade, ColorWheel, Fade, Keyframes, KelvinRamp, ease_in_out,
+)
+from govee_btled_H613B.simulator import SimulatedDevice
+
+
+def test_animation_is_abstract():
+    with pytest.raises(TypeError):
+        Animation(1.0)
+
+
+def test_fade_renders_every_frame_up_to_the_end():
+    fade = Fade((0, 0, 0), (100, 200, 50), duration=1.0)
+    frames = fade.render(fps=10, start=0, count=100)
+    assert len(frames) == fade.frame_count(10) == 11
+    assert frames[0] == (color_frame(0, 0, 0), {'rgb': (0, 0, 0), 'color_temp': 0})
+    assert frames[5][1] == {'rgb': (50, 100, 25), 'color_temp': 0}
+    assert frames[-1] == (color_frame(100, 200, 50), {'rgb': (100, 200, 50), 'color_temp': 0})
+    assert fade.render(fps=10, start=8, count=2) == frames[8:10]
+
+
+def test_easing_and_keyframes():
+    fade = BrightnessFade(0, 100, duration=1.0, easing=ease_in_out)
+    assert fade.render(fps=4, start=0, count=5)[1][1] == {'brightness': 15}
+    keyframes = Keyframes([(0, (0, 0, 0)), (1, (100, 0, 0)), (3, (100, 100, 0))])
+    assert keyframes.frame_at(0.25)[1] == {'rgb': (75, 0, 0), 'color_temp': 0}
+    assert keyframes.frame_at(2 / 3)[1] == {'rgb': (100, 50, 0), 'color_temp': 0}
+    assert ColorWheel(1.0).frame_at(1 / 3)[1] == {'rgb': (0, 255, 0), 'color_temp': 0}
+
+
+def test_bad_animations_are_rejected():
+    with pytest.raises(ValueError):
+        Fade((0, 0, 0), (1, 1, 1), duration=0)
+    with pytest.raises(ValueError):
+        Keyframes([(0, (0, 0, 0))])
+    with pytest.raises(ValueError):
+        KelvinRamp(1000, 4000, duration=1)
+
+
+async def test_animation_ends_on_its_last_frame(make_led):
+    sim, led = make_led()
+    player = led.animate(BrightnessFade(0, 50, duration=0.1), fps=100)
+    await player
+    assert player.frames_sent + player.frames_dropped == 11
+    assert sim.writes[-1] == brightness_frame(50)
+    assert led.brightness == 50
+    await led.disconnect()
+
+
+async def test_slow_links_drop_frames_but_end_on_time(make_led):
+    sim, led = make_led(SimulatedDevice(write_latency=0.02))
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    player = led.animate(Fade((0, 0, 0), (255, 0, 0), duration=0.2), fps=100)
+    await player
+    assert loop.time() - start < 0.3
+    assert player.frames_dropped > 0
+    assert sim.rgb == (255, 0, 0)
+    await led.disconnect()
+
+
+async def test_setters_stop_the_animation(make_led):
+    sim, led = make_led()
+    player = led.animate(Fade((0, 0, 0), (255, 255, 255), duration=5), fps=20)
+    await asyncio.sleep(0.05)
+    await led.set_color((1, 2, 3))
+    await asyncio.sleep(0.1)
+    assert player.done()
+    assert sim.rgb == (1, 2, 3)
+    await led.disconnect()
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from govee_btled_H613B import GoveeFleet, GoveeInstance
+from govee_btled_H613B.connection import ConnectionSlots
+from govee_btled_H613B.simulator import SimulatedDevice
+
+
+def _fleet(count, **kwargs):
+    sims = [SimulatedDevice(address=f'A4:C1:38:00:00:{index:02X}') for index in range(count)]
+    instances = [GoveeInstance(sim.ble_device, connector=sim.establish_connection) for sim in sims]
+    return sims, GoveeFleet(instances, **kwargs)
+
+
+def _connected(sims):
+    return sum(1 for sim in sims if sim.client is not None and sim.client.is_connected)
+
+
+async def test_operations_reach_every_device():
+    sims, fleet = _fleet(3)
+    result = await fleet.apply(power=True, brightness=30)
+    assert result.ok
+    assert set(result.results) == {sim.ble_device.address for sim in sims}
+    assert all(sim.power and sim.brightness == 30 for sim in sims)
+    await fleet.disconnect()
+    assert _connected(sims) == 0
+
+
+async def test_one_failing_device_does_not_fail_the_group():
+    sims, fleet = _fleet(3, timeout=0.1)
+    sims[0].write_latency = 1.0
+    sims[1].dbus_error_rate = 1.0
+    result = await fleet.turn_on()
+    assert set(result.errors) == {sims[0].ble_device.address, sims[1].ble_device.address}
+    assert isinstance(result.errors[sims[0].ble_device.address], asyncio.TimeoutError)
+    assert list(result.results) == [sims[2].ble_device.address]
+    assert sims[2].power
+    sims[0].write_latency = 0
+    await fleet.disconnect()
+
+
+async def test_open_connections_are_capped_per_adapter():
+    sims = [SimulatedDevice(address=f'A4:C1:38:00:00:{index:02X}') for index in range(6)]
+    most = 0
+
+    def _counting(sim):
+        async def _connect(*args, **kwargs):
+            nonlocal most
+            client = await sim.establish_connection(*args, **kwargs)
+            most = max(most, _connected(sims))
+            return client
+        return _connect
+
+    fleet = GoveeFleet(
+        (GoveeInstance(sim.ble_device, connector=_counting(sim)) for sim in sims),
+        connections_per_adapter=2,
+    )
+    result = await fleet.turn_on()
+    assert result.ok
+    assert all(sim.power for sim in sims)
+    assert most == 2
+    assert _connected(sims) == 2
+    slots = fleet.slots(next(iter(fleet)))
+    assert len(slots) == 2
+    assert slots.evictions == 4
+    await fleet.disconnect()
+    assert len(slots) == 0
+
+
+async def test_least_recently_used_idle_device_is_disconnected():
+    sims, fleet = _fleet(3, connections_per_adapter=2)
+    first, second, third = fleet
+    await first.turn_on()
+    await second.turn_on()
+    await first.set_brightness(10)
+    await third.turn_on()
+    assert (first.is_connected, second.is_connected, third.is_connected) == (True, False, True)
+    await fleet.disconnect()
+
+
+async def test_unexpected_disconnects_release_the_slot():
+    sims, fleet = _fleet(2, connections_per_adapter=1)
+    first, second = fleet
+    await first.turn_on()
+    sims[0].drop_connection()
+    assert len(fleet.slots(first)) == 0
+    await second.turn_on()
+    assert sims[0].connections == 1
+    await fleet.disconnect()
+
+
+async def test_removed_devices_give_their_slot_back():
+    sims, fleet = _fleet(1)
+    instance = next(iter(fleet))
+    await instance.turn_on()
+    slots = instance.connection_slots
+    assert instance in slots
+    fleet.remove(instance.address)
+    assert instance not in slots
+    assert instance.connection_slots is None
+    await instance.disconnect()
+
+
+def test_slots_reject_a_zero_limit():
+    with pytest.raises(ValueError):
+        ConnectionSlots(0)
@@ -0,0 +1,66 @@
+import pytest
+from bleak.backends.scanner import AdvertisementData
+from bleak.exc import BleakDBusError
+
+from govee_btled_H613B import metrics
+from govee_btled_H613B.metrics import Histogram, InMemorySink, render_prometheus
+from govee_btled_H613B.retry import RetryPolicy
+from govee_btled_H613B.simulator import SimulatedDevice
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(0.1, 2), (1.0, 3), (float('inf'), 4)]
+    assert histogram.count == 4
+    assert histogram.mean == 2.65 / 4
+
+
+def test_prometheus_text_format():
+    sink = InMemorySink(buckets=(0.5,))
+    sink.increment(metrics.RETRIES, 'AA')
+    sink.increment(metrics.RETRIES, 'AA', 2)
+    sink.gauge(metrics.RSSI, 'AA', -70)
+    sink.observe(metrics.WRITE_LATENCY, 'AA', 0.25)
+    assert render_prometheus(sink).splitlines() == [
+        '# TYPE govee_btled_retries_total counter',
+        'govee_btled_retries_total{address="AA"} 3',
+        '# TYPE govee_btled_rssi_dbm gauge',
+        'govee_btled_rssi_dbm{address="AA"} -70',
+        '# TYPE govee_btled_write_latency_seconds histogram',
+        'govee_btled_write_latency_seconds_bucket{address="AA",le="0.5"} 1',
+        'govee_btled_write_latency_seconds_bucket{address="AA",le="+Inf"} 1',
+        'govee_btled_write_latency_seconds_sum{address="AA"} 0.25',
+        'govee_btled_write_latency_seconds_count{address="AA"} 1',
+    ]
+
+
+async def test_instance_reports_to_the_sink(make_led):
+    sink = InMemorySink()
+    sim, led = make_led(metrics_sink=sink)
+    address = led.address
+    led.set_ble_device_and_advertisement_data(
+        sim.ble_device, AdvertisementData(None, {}, {}, [], None, -72, ())
+    )
+    await led.turn_on()
+    await led.update()
+    sim.drop_connection()
+    assert sink.gauges[(metrics.RSSI, address)] == -72
+    assert sink.histograms[(metrics.CONNECT_DURATION, address)].count == 1
+    assert sink.histograms[(metrics.WRITE_LATENCY, address)].count == 4
+    assert sink.counters[(metrics.NOTIFICATIONS, address)] == 3
+    assert sink.counters[(metrics.UNEXPECTED_DISCONNECTS, address)] == 1
+
+
+async def test_failed_attempts_are_counted(make_led):
+    sink = InMemorySink()
+    sim, led = make_led(
+        SimulatedDevice(dbus_error_rate=1.0),
+        metrics_sink=sink,
+        retry_policy=RetryPolicy(attempts=3, backoff=0.001),
+    )
+    with pytest.raises(BleakDBusError):
+        await led.turn_on()
+    assert sink.counters[(metrics.RETRIES, led.address)] == 3
+    assert sink.counters[(metrics.BACKOFFS, led.address)] == 2
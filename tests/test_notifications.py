@@ -0,0 +1,38 @@
+from govee_btled_H613B.codec import encode_frame
+from govee_btled_H613B.const import LedCommand, LedMsgType
+
+
+async def test_notifications_fire_callbacks_only_on_change(make_led):
+    sim, led = make_led()
+    changes = []
+    led.register_change_callback(lambda state, changed: changes.append(changed))
+    await led.update()
+    await led.update()
+    assert changes == []
+    sim.brightness = 30
+    await led.update()
+    assert changes[-1] == {'brightness': 30}
+    await led.disconnect()
+
+
+async def test_invalid_and_unknown_frames_change_nothing(make_led):
+    sim, led = make_led()
+    states = []
+    led.register_callback(states.append)
+    frame = bytearray(encode_frame(LedMsgType.KEEP_ALIVE, LedCommand.BRIGHTNESS, b'\x20'))
+    frame[19] ^= 0xFF
+    led._notification_handler(0, frame)
+    led._notification_handler(0, bytearray(encode_frame(LedMsgType.KEEP_ALIVE, 0x23, b'\xff')))
+    led._notification_handler(0, bytearray(b'\xaa\x04'))
+    assert states == []
+    assert led.brightness == 0
+
+
+async def test_only_changed_fields_are_reported(make_led):
+    sim, led = make_led()
+    changes = []
+    led.register_change_callback(lambda state, changed: changes.append(changed))
+    reply = encode_frame(LedMsgType.KEEP_ALIVE, LedCommand.COLOR, b'\x0d\x01\x02\x03')
+    led._notification_handler(0, bytearray(reply))
+    led._notification_handler(0, bytearray(reply))
+    assert changes == [{'rgb': (1, 2, 3)}]
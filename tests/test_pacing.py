@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from govee_btled_H613B import AdaptiveRateLimiter, TokenBucket, get_adapter_rate_limiter
+
+
+async def test_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=100, burst=3)
+    start = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+    assert time.monotonic() - start < 0.01
+    for _ in range(3):
+        await bucket.acquire()
+    assert time.monotonic() - start >= 0.025
+
+
+@pytest.mark.parametrize('rate, burst', [(0, 1), (-1, 1), (10, 0)])
+def test_bucket_rejects_bad_settings(rate, burst):
+    with pytest.raises(ValueError):
+        TokenBucket(rate, burst)
+
+
+def test_adaptive_rate_follows_the_link():
+    limiter = AdaptiveRateLimiter(rate=50, min_rate=5, max_rate=60, target_latency=0.05)
+    for _ in range(20):
+        limiter.record(0.01)
+    assert limiter.rate == 60
+    limiter.record(0.01, error=True)
+    assert limiter.rate == 30
+    assert limiter.errors == 1
+    for _ in range(50):
+        limiter.record(0.5)
+    assert limiter.rate == 5
+
+
+def test_adapter_limiter_is_shared():
+    first = get_adapter_rate_limiter('hci-test')
+    assert get_adapter_rate_limiter('hci-test') is first
+    assert get_adapter_rate_limiter('hci-other') is not first
+    assert isinstance(first, AdaptiveRateLimiter)
+
+
+async def test_writes_are_paced(make_led):
+    limiter = AdaptiveRateLimiter(rate=100, max_rate=100)
+    sim, led = make_led(rate_limiter=limiter)
+    start = time.monotonic()
+    for level in range(6):
+        await led.set_brightness(level)
+    assert time.monotonic() - start >= 0.04
+    assert limiter.latency is not None
+    await led.disconnect()
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from govee_btled_H613B import GoveeFleet, GoveeInstance, PollScheduler, polling
+from govee_btled_H613B.retry import RetryPolicy
+from govee_btled_H613B.simulator import SimulatedDevice
+
+
+@pytest.fixture(autouse=True)
+def fast_ticks(monkeypatch):
+    monkeypatch.setattr(polling, 'TICK', 0.005)
+
+
+def _fleet(count, **kwargs):
+    sims = [SimulatedDevice(address=f'A4:C1:38:00:00:{index:02X}') for index in range(count)]
+    fleet = GoveeFleet(
+        GoveeInstance(sim.ble_device, connector=sim.establish_connection, **kwargs) for sim in sims
+    )
+    return sims, fleet
+
+
+async def test_every_device_is_polled_in_the_background():
+    sims, fleet = _fleet(3)
+    for sim in sims:
+        sim.brightness = 40
+    scheduler = PollScheduler(fleet, interval=0.05, min_interval=0.01, jitter=0)
+    scheduler.start()
+    await asyncio.sleep(0.15)
+    await scheduler.stop()
+    assert all(entry.polls >= 1 for entry in scheduler.entries.values())
+    assert all(instance.brightness == 40 for instance in fleet)
+    # Polls are not use, the connection policy learns nothing from them
+    assert all(instance.connection_policy._last_access is None for instance in fleet)
+    await fleet.disconnect()
+
+
+async def test_interval_adapts_to_external_changes():
+    sims, fleet = _fleet(1)
+    instance = next(iter(fleet))
+    scheduler = PollScheduler(fleet, interval=1, min_interval=0.25, max_interval=4, backoff=2)
+    scheduler._sync_entries(0)
+    entry = scheduler.entries[instance.address]
+
+    await scheduler._poll(instance)
+    assert entry.interval == 2
+    sims[0].brightness = 70
+    await scheduler._poll(instance)
+    assert entry.interval == 1
+    await scheduler._poll(instance)
+    await scheduler._poll(instance)
+    await scheduler._poll(instance)
+    assert entry.interval == 4
+    await fleet.disconnect()
+
+
+async def test_own_writes_do_not_speed_polling_up():
+    sims, fleet = _fleet(1)
+    instance = next(iter(fleet))
+    scheduler = PollScheduler(fleet, interval=1, backoff=2)
+    scheduler._sync_entries(0)
+    entry = scheduler.entries[instance.address]
+    await scheduler._poll(instance)
+    await instance.set_color_temp(4000)
+    await scheduler._poll(instance)
+    await instance.set_color((1, 2, 3))
+    await scheduler._poll(instance)
+    assert entry.interval == 8
+    await fleet.disconnect()
+
+
+async def test_failed_polls_back_off():
+    sims, fleet = _fleet(1, retry_policy=RetryPolicy(attempts=1))
+    instance = next(iter(fleet))
+    sims[0].dbus_error_rate = 1.0
+    scheduler = PollScheduler(fleet, interval=1, backoff=2)
+    scheduler._sync_entries(0)
+    entry = scheduler.entries[instance.address]
+    result = await fleet.run(scheduler._poll)
+    assert not result.ok
+    assert entry.failures == 1
+    assert entry.interval == 2
+    assert not entry.polling
+    await fleet.disconnect()
+
+
+async def test_polls_let_connected_devices_go_idle():
+    sims, fleet = _fleet(1)
+    instance = next(iter(fleet))
+    await instance.turn_on()
+    timer = instance._disconnect_timer
+    scheduler = PollScheduler(fleet, interval=0.02, min_interval=0.01, jitter=0)
+    scheduler.start()
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+    assert scheduler.entries[instance.address].polls >= 2
+    assert instance._disconnect_timer is timer
+    await fleet.disconnect()
@@ -0,0 +1,204 @@
+import asyncio
+
+import pytest
+from bleak.exc import BleakDBusError, BleakError
+
+from govee_btled_H613B import DeviceUnavailable, GoveeInstance
+from govee_btled_H613B.retry import CircuitBreaker, CircuitState, RetryPolicy
+from govee_btled_H613B.simulator import SimulatedDevice
+
+FAST = RetryPolicy(attempts=3, backoff=0.001)
+
+
+class _Advertisement:
+    def __init__(self, rssi):
+        self.rssi = rssi
+
+
+def test_backoff_grows_and_is_capped():
+    policy = RetryPolicy(backoff=0.1, max_backoff=0.5, multiplier=2, jitter=0.5)
+    for attempt, base in enumerate((0.1, 0.2, 0.4, 0.5, 0.5)):
+        assert base * 0.5 <= policy.backoff_time(attempt) <= base
+
+
+def test_breaker_opens_after_threshold_and_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state is CircuitState.CLOSED
+    breaker.record_failure()
+    assert breaker.is_open
+    assert breaker.allow()
+    assert breaker.state is CircuitState.HALF_OPEN
+    breaker.record_failure()
+    assert breaker.is_open
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+
+
+async def test_transient_errors_are_retried(make_led):
+    sim, led = make_led(retry_policy=FAST)
+    await led.turn_on()
+    sim.dbus_error_rate = 1.0
+    task = asyncio.create_task(led.set_brightness(50))
+    # Let the first attempt fail, then heal the link before the next one
+    while sim.dbus_errors == 0:
+        await asyncio.sleep(0)
+    sim.dbus_error_rate = 0.0
+    await task
+    assert sim.brightness == 50
+    await led.disconnect()
+
+
+async def test_errors_are_raised_after_the_last_attempt(make_led):
+    sim, led = make_led(SimulatedDevice(dbus_error_rate=1.0), retry_policy=FAST)
+    with pytest.raises(BleakDBusError):
+        await led.turn_on()
+    assert sim.dbus_errors == 3
+    # D-Bus errors reset the link before the next attempt
+    assert sim.connections == 3
+
+
+async def test_deadline_bounds_the_whole_command(make_led):
+    sim, led = make_led(
+        SimulatedDevice(write_latency=0.2), retry_policy=RetryPolicy(deadline=0.05)
+    )
+    with pytest.raises(asyncio.TimeoutError):
+        await led.turn_on()
+    await led.disconnect()
+
+
+async def test_open_breaker_fails_fast_without_connecting(make_led):
+    sim, led = make_led(
+        SimulatedDevice(dbus_error_rate=1.0),
+        retry_policy=FAST,
+        circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+    )
+    with pytest.raises(BleakDBusError):
+        await led.turn_on()
+    connections = sim.connections
+    with pytest.raises(DeviceUnavailable):
+        await led.turn_on()
+    assert sim.connections == connections
+    await led.disconnect()
+
+
+async def test_connect_failures_open_the_breaker():
+    attempts = 0
+
+    async def unreachable(*args, **kwargs):
+        nonlocal attempts
+        attempts += 1
+        raise BleakError('device not found')
+
+    sim = SimulatedDevice()
+    led = GoveeInstance(
+        sim.ble_device,
+        connector=unreachable,
+        retry_policy=FAST,
+        circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+    )
+    with pytest.raises(BleakError):
+        await led.turn_on()
+    assert led.circuit_breaker.is_open
+    with pytest.raises(DeviceUnavailable):
+        await led.turn_on()
+    assert attempts == 3
+    await led.disconnect()
+
+
+async def test_low_rssi_fails_fast(make_led):
+    sim, led = make_led(circuit_breaker=CircuitBreaker(min_rssi=-80))
+    led._advertisement_data = _Advertisement(-90)
+    with pytest.raises(DeviceUnavailable, match='RSSI'):
+        await led.turn_on()
+    assert sim.connections == 0
+    led._advertisement_data = _Advertisement(-60)
+    await led.turn_on()
+    assert sim.power
+    await led.disconnect()
+
+
+async def test_probe_closes_the_breaker_once_the_device_is_back(make_led):
+    sim, led = make_led(
+        SimulatedDevice(dbus_error_rate=1.0),
+        retry_policy=FAST,
+        circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.02),
+    )
+    with pytest.raises(BleakDBusError):
+        await led.turn_on()
+    sim.dbus_error_rate = 0.0
+    await asyncio.wait_for(led._probe_task, 1)
+    assert led.circuit_breaker.state is CircuitState.CLOSED
+    await led.turn_on()
+    assert sim.power
+    await led.disconnect()
+
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.opened_at -= 0.05
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_abandoned_trial_is_replaced_after_the_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.opened_at -= 0.05
+    assert breaker.allow()
+    breaker.trial_at -= 0.05
+    assert breaker.allow()
+
+
+async def test_failed_trial_fails_the_queued_commands_fast(make_led):
+    sim, led = make_led(
+        SimulatedDevice(dbus_error_rate=1.0),
+        retry_policy=RetryPolicy(attempts=1),
+        circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+    )
+    breaker = led.circuit_breaker
+    breaker.record_failure()
+    breaker.opened_at -= 60
+    results = await asyncio.gather(
+        led.turn_on(), led.set_brightness(10), led.set_brightness(20), return_exceptions=True
+    )
+    assert isinstance(results[0], BleakDBusError)
+    assert all(isinstance(result, DeviceUnavailable) for result in results[1:])
+    assert sim.connections == 1
+    assert breaker.is_open
+    await led.disconnect()
+
+
+async def test_disconnect_stops_the_probe(make_led):
+    sim, led = make_led(
+        SimulatedDevice(dbus_error_rate=1.0),
+        retry_policy=FAST,
+        circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.02),
+    )
+    with pytest.raises(BleakDBusError):
+        await led.turn_on()
+    probe = led._probe_task
+    assert probe is not None
+    sim.dbus_error_rate = 0.0
+    await led.disconnect()
+    connections = sim.connections
+    await asyncio.sleep(0.1)
+    assert probe.cancelled()
+    assert sim.connections == connections
+    assert not led.is_connected
+
+
+async def test_disconnect_cancels_a_pending_prewarm(make_led):
+    sim, led = make_led(SimulatedDevice(connect_latency=0.05))
+    prewarm = led.prewarm()
+    await asyncio.sleep(0)
+    await led.disconnect()
+    await asyncio.sleep(0.1)
+    assert prewarm.done()
+    assert not led.is_connected
+    assert sim.connections == 0
@@ -0,0 +1,54 @@
+import pytest
+
+from govee_btled_H613B.codec import decode_frame
+from govee_btled_H613B.const import DiyCommand, DiyPacket, LedCommand, LedMode, LedMsgType
+from govee_btled_H613B.scenes import CHUNK_SIZE, DiyPattern, Scene, encode_program, encode_scene
+
+PATTERN = DiyPattern(pattern_id=3, style=1, colors=((255, 0, 0), (0, 255, 0), (0, 0, 255)))
+
+
+def test_program_is_split_into_numbered_packets():
+    data = bytes(range(40))
+    frames = [decode_frame(frame) for frame in encode_program(data)]
+    assert [(head, cmd) for head, cmd, _ in frames] == [(LedMsgType.DIY, DiyCommand.PROGRAM)] * 5
+    assert frames[0][2][:2] == bytes((DiyPacket.START, 3))
+    assert [payload[0] for _, _, payload in frames[1:-1]] == [1, 2, 3]
+    assert b''.join(payload[1:1 + CHUNK_SIZE] for _, _, payload in frames[1:-1])[:40] == data
+    assert frames[-1][2][0] == DiyPacket.END
+
+
+def test_too_long_programs_are_rejected():
+    with pytest.raises(ValueError):
+        encode_program(bytes(CHUNK_SIZE * DiyPacket.END))
+
+
+def test_encoding_is_cached_and_identifies_the_content():
+    encoded = encode_scene(PATTERN)
+    assert encode_scene(DiyPattern(3, 1, colors=PATTERN.colors)) is encoded
+    assert encode_scene(DiyPattern(3, 1, colors=((1, 1, 1),))).digest != encoded.digest
+    head, cmd, payload = decode_frame(encoded.activation)
+    assert (head, cmd, payload[:2]) == (LedMsgType.COMMAND, LedCommand.COLOR, bytes((LedMode.DIY, 3)))
+    assert encode_scene(Scene(0x1234)).upload == ()
+
+
+async def test_program_is_uploaded_once_per_slot(make_led):
+    sim, led = make_led()
+    encoded = encode_scene(PATTERN)
+    await led.apply_scene(PATTERN)
+    assert sim.writes == [*encoded.upload, encoded.activation]
+    await led.apply_scene(PATTERN)
+    assert sim.writes[len(encoded.upload) + 1:] == [encoded.activation]
+
+    changed = DiyPattern(3, 1, colors=((9, 9, 9),))
+    writes = len(sim.writes)
+    await led.apply_scene(changed)
+    assert sim.writes[writes:] == [*encode_scene(changed).upload, encode_scene(changed).activation]
+    await led.disconnect()
+
+
+async def test_stored_scenes_are_only_activated(make_led):
+    sim, led = make_led()
+    await led.apply_scene(Scene(0x0102))
+    assert len(sim.writes) == 1
+    assert decode_frame(sim.writes[0])[2][:3] == bytes((LedMode.SCENES, 0x02, 0x01))
+    await led.disconnect()
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from bleak.exc import BleakDBusError, BleakError
+
+from govee_btled_H613B.codec import STATUS_QUERY_FRAMES, brightness_frame, color_frame, power_frame
+from govee_btled_H613B.const import LedCommand
+from govee_btled_H613B.simulator import READ_HANDLE, WRITE_HANDLE, SimulatedDevice
+
+
+async def _connect(sim, disconnected=None):
+    return await sim.establish_connection(object, sim.ble_device, sim.ble_device.name, disconnected)
+
+
+async def test_commands_change_the_state():
+    sim = SimulatedDevice()
+    client = await _connect(sim)
+    for frame in (power_frame(True), color_frame(1, 2, 3), brightness_frame(55)):
+        await client.write_gatt_char(WRITE_HANDLE, frame)
+    assert (sim.power, sim.rgb, sim.brightness) == (True, (1, 2, 3), 55)
+    assert sim.connections == 1
+    assert len(sim.writes) == 3
+
+
+async def test_queries_are_answered_on_the_read_characteristic():
+    sim = SimulatedDevice()
+    sim.brightness = 30
+    client = await _connect(sim)
+    replies = []
+    await client.start_notify(READ_HANDLE, lambda char, data: replies.append(bytes(data)))
+    await client.write_gatt_char(WRITE_HANDLE, STATUS_QUERY_FRAMES[LedCommand.BRIGHTNESS])
+    assert replies == []
+    await asyncio.sleep(0)
+    assert len(replies) == 1
+    assert replies[0][:3] == bytes((0xAA, LedCommand.BRIGHTNESS, 30))
+
+
+async def test_only_one_connection_is_accepted():
+    sim = SimulatedDevice()
+    client = await _connect(sim)
+    with pytest.raises(BleakError):
+        await _connect(sim)
+    await client.disconnect()
+    await _connect(sim)
+    assert sim.connections == 2
+
+
+async def test_injected_faults():
+    sim = SimulatedDevice(packet_loss=1.0)
+    client = await _connect(sim)
+    await client.write_gatt_char(WRITE_HANDLE, power_frame(True))
+    assert not sim.power
+    assert sim.frames_lost == 1
+
+    sim.dbus_error_rate = 1.0
+    with pytest.raises(BleakDBusError):
+        await client.write_gatt_char(WRITE_HANDLE, power_frame(True))
+    assert sim.dbus_errors == 1
+
+
+async def test_dropped_connection_calls_back():
+    sim = SimulatedDevice(disconnect_rate=1.0)
+    lost = []
+    client = await _connect(sim, lost.append)
+    with pytest.raises(BleakError):
+        await client.write_gatt_char(WRITE_HANDLE, power_frame(True))
+    assert lost == [client]
+    assert not client.is_connected
+    assert sim.disconnects == 1
+
+
+async def test_seeded_faults_are_reproducible():
+    async def lost_frames():
+        sim = SimulatedDevice(packet_loss=0.5, seed=7)
+        client = await _connect(sim)
+        for level in range(50):
+            await client.write_gatt_char(WRITE_HANDLE, brightness_frame(level))
+        return sim.frames_lost
+
+    assert await lost_frames() == await lost_frames()
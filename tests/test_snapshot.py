@@ -0,0 +1,84 @@
+import pytest
+
+from govee_btled_H613B import GoveeFleet, GoveeInstance, load_snapshot, save_snapshot
+from govee_btled_H613B.models import GoveeState
+from govee_btled_H613B.simulator import SimulatedDevice
+from govee_btled_H613B.snapshot import dumps_snapshot, loads_snapshot
+
+STATES = {
+    'AA:BB:CC:DD:EE:01': GoveeState(power=True, rgb=(255, 128, 0), color_temp=0, brightness=80),
+    'AA:BB:CC:DD:EE:02': GoveeState(power=False, rgb=(0, 0, 0), color_temp=4000, brightness=10),
+}
+
+
+def _fields(state):
+    return state.power, state.rgb, state.color_temp, state.brightness
+
+
+def test_snapshot_round_trip():
+    saved_at, states = loads_snapshot(dumps_snapshot(STATES))
+    assert saved_at > 0
+    assert states.keys() == STATES.keys()
+    for address, state in states.items():
+        assert _fields(state) == _fields(STATES[address])
+        assert not state.verified
+
+
+def test_snapshot_file_round_trip(tmp_path):
+    path = str(tmp_path / 'states.bin')
+    save_snapshot(path, STATES)
+    _, states = load_snapshot(path)
+    assert {address: _fields(state) for address, state in states.items()} == {
+        address: _fields(state) for address, state in STATES.items()
+    }
+
+
+def test_snapshot_rejects_other_files():
+    with pytest.raises(ValueError):
+        loads_snapshot(b'GVTR' + bytes(20))
+
+
+async def test_restored_state_is_verified_against_the_device(make_led):
+    sim, led = make_led(SimulatedDevice())
+    sim.power = True
+    sim.brightness = 80
+    led.restore_state(STATES['AA:BB:CC:DD:EE:01'])
+    assert not led.state.verified
+    await led.verify_state()
+    assert led.state.verified
+    assert led.state.brightness == 80
+    await led.disconnect()
+
+
+async def test_fleet_restores_without_connecting_and_verifies_in_the_background():
+    sims = {address: SimulatedDevice(address=address) for address in STATES}
+    for address, sim in sims.items():
+        sim.power, sim.rgb, sim.color_temp, sim.brightness = _fields(STATES[address])
+    sims['AA:BB:CC:DD:EE:02'].brightness = 55
+    fleet = GoveeFleet(
+        GoveeInstance(sim.ble_device, connector=sim.establish_connection) for sim in sims.values()
+    )
+    changes = []
+    fleet['AA:BB:CC:DD:EE:02'].register_change_callback(lambda state, changed: changes.append(changed))
+
+    verifying = fleet.restore(STATES, spread=0.05)
+    assert all(sim.connections == 0 for sim in sims.values())
+    assert _fields(fleet['AA:BB:CC:DD:EE:01'].state) == _fields(STATES['AA:BB:CC:DD:EE:01'])
+    result = await verifying
+    assert result.ok
+    assert all(instance.state.verified for instance in fleet)
+    assert fleet['AA:BB:CC:DD:EE:02'].brightness == 55
+    assert changes[-1] == {'brightness': 55}
+    # Verification is not use, the connection policy has nothing to learn
+    assert all(instance.connection_policy._last_access is None for instance in fleet)
+    await fleet.disconnect()
+
+
+async def test_restore_skips_unknown_devices_and_can_skip_verification(make_led):
+    sim, led = make_led(SimulatedDevice(address='AA:BB:CC:DD:EE:01'))
+    fleet = GoveeFleet([led])
+    assert fleet.restore({'AA:BB:CC:DD:EE:09': GoveeState(power=True)}) is None
+    assert fleet.restore(STATES, verify=False) is None
+    assert led.on
+    assert not led.state.verified
+    assert sim.connections == 0
@@ -0,0 +1,65 @@
+import pytest
+
+from govee_btled_H613B import GoveeInstance
+from govee_btled_H613B.simulator import SimulatedDevice
+from govee_btled_H613B.trace import TraceEvent, TraceRecorder, TraceReplayer, load_trace, loads_trace
+from govee_btled_H613B.utils import LazyHex
+
+
+async def test_trace_round_trip_and_replay(make_led, tmp_path):
+    recorder = TraceRecorder()
+    sim, led = make_led(trace=recorder)
+    await led.turn_on()
+    await led.set_color((10, 20, 30))
+    await led.set_brightness(42)
+    await led.disconnect()
+
+    path = str(tmp_path / 'trace.bin')
+    recorder.dump(path, led.address)
+    trace = load_trace(path)
+    assert trace == loads_trace(recorder.dumps(led.address))
+    assert trace.address == led.address
+    kinds = [kind for _, kind, _ in trace.events]
+    assert kinds[0] is TraceEvent.CONNECTED
+    assert kinds[-1] is TraceEvent.DISCONNECTED
+    sent = [data for _, kind, data in trace.events if kind is TraceEvent.TX]
+    assert sent == sim.writes
+
+    replay_sim = SimulatedDevice()
+    replay_led = GoveeInstance(replay_sim.ble_device, connector=replay_sim.establish_connection)
+    replayer = TraceReplayer(trace, speed=100)
+    await replayer.replay(replay_led)
+    assert replayer.frames_sent == 3
+    assert replay_sim.writes == sim.writes
+    assert (replay_sim.power, replay_sim.rgb, replay_sim.brightness) == (sim.power, sim.rgb, sim.brightness)
+    assert not replay_led.is_connected
+
+
+async def test_replies_and_lost_links_are_recorded(make_led):
+    recorder = TraceRecorder()
+    sim, led = make_led(trace=recorder)
+    await led.update()
+    sim.drop_connection()
+    kinds = [kind for _, kind, _ in recorder.events]
+    assert kinds.count(TraceEvent.RX) == 3
+    assert kinds[-1] == TraceEvent.UNEXPECTED_DISCONNECT
+
+
+def test_ring_buffer_keeps_the_newest_events():
+    recorder = TraceRecorder(capacity=2)
+    for index in range(3):
+        recorder.record(TraceEvent.TX, bytes((index,)))
+    assert [data for _, _, data in loads_trace(recorder.dumps()).events] == [b'\x01', b'\x02']
+
+
+def test_trace_rejects_other_files():
+    with pytest.raises(ValueError):
+        loads_trace(b'GVSS' + bytes(20))
+    with pytest.raises(ValueError):
+        TraceReplayer(loads_trace(TraceRecorder().dumps()), speed=0)
+
+
+def test_hex_is_only_formatted_when_logged():
+    frames = [b'\x01\x02', b'\xff']
+    assert str(LazyHex(frames)) == "['0102', 'ff']"
+    assert str(LazyHex(b'\xab')) == 'ab'
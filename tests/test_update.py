@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from govee_btled_H613B import ResponseTimeout
+from govee_btled_H613B.codec import STATUS_QUERY_FRAMES
+from govee_btled_H613B.simulator import SimulatedDevice
+
+
+async def test_update_reads_the_device_state(make_led):
+    sim, led = make_led()
+    sim.power, sim.rgb, sim.brightness = True, (1, 2, 3), 42
+    state = await led.update()
+    assert (state.power, state.rgb, state.brightness) == (True, (1, 2, 3), 42)
+    assert state.verified
+    assert sim.writes == list(STATUS_QUERY_FRAMES.values())
+    await led.disconnect()
+
+
+async def test_update_waits_for_late_replies(make_led):
+    sim, led = make_led(SimulatedDevice(notify_latency=0.02))
+    sim.brightness = 7
+    state = await led.update()
+    assert state.brightness == 7
+    await led.disconnect()
+
+
+async def test_concurrent_updates_are_all_answered(make_led):
+    sim, led = make_led(SimulatedDevice(notify_latency=0.01))
+    sim.brightness = 9
+    states = await asyncio.gather(*(led.update() for _ in range(5)))
+    assert [state.brightness for state in states] == [9] * 5
+    await led.disconnect()
+
+
+async def test_update_times_out_without_reply(make_led):
+    sim, led = make_led(SimulatedDevice(packet_loss=1.0))
+    with pytest.raises(ResponseTimeout):
+        await led.update(timeout=0.05)
+    # Waiters of the timed out queries are dropped
+    assert led._responses._waiters == {}
+    await led.disconnect()
+
+
+
+async def test_max_age_serves_fresh_fields_without_querying(make_led):
+    sim, led = make_led()
+    await led.update()
+    await led.disconnect()
+    writes, connections = len(sim.writes), sim.connections
+    await led.update(max_age=60)
+    assert led.cache_hits == 3
+    assert len(sim.writes) == writes
+    assert sim.connections == connections
+
+
+async def test_max_age_queries_only_stale_fields(make_led):
+    sim, led = make_led()
+    await led.update()
+    await asyncio.sleep(0.02)
+    led._set_reported_state({'brightness': 5})
+    writes = len(sim.writes)
+    await led.update(max_age=0.01)
+    assert led.cache_hits == 1
+    assert led.cache_misses == 2
+    assert len(sim.writes) == writes + 2
+    await led.disconnect()
+
+
+async def test_reported_external_changes_are_counted(make_led):
+    sim, led = make_led()
+    await led.update()
+    assert led.external_changes == 0
+    sim.brightness = 99
+    await led.update()
+    assert led.external_changes == 1
+
+
+async def test_background_update_is_not_an_access(make_led):
+    sim, led = make_led()
+    await led.update(access=False)
+    assert led.connection_policy._last_access is None
+    await led.update()
+    assert led.connection_policy._last_access is not None
+    await led.disconnect()
+
+
+async def test_own_writes_are_not_external_changes(make_led):
+    sim, led = make_led()
+    await led.set_color_temp(4000)
+    await led.update()
+    await led.set_color((10, 20, 30))
+    await led.update()
+    await led.set_color_temp(3000)
+    await led.update()
+    assert led.external_changes == 0
+    sim.rgb = (1, 1, 1)
+    await led.update()
+    assert led.external_changes == 1
+    await led.disconnect()
+
+
+async def test_background_update_does_not_extend_the_connection(make_led):
+    sim, led = make_led()
+    await led.turn_on()
+    timer = led._disconnect_timer
+    await led.update(access=False)
+    assert led._disconnect_timer is timer
+    await led.update()
+    assert led._disconnect_timer is not timer
+    await led.disconnect()
+
+
+async def test_idle_timer_waits_for_background_work(make_led):
+    sim, led = make_led(SimulatedDevice(notify_latency=0.05))
+    await led.turn_on()
+    updating = asyncio.create_task(led.update(access=False))
+    await asyncio.sleep(0.01)
+    led._disconnect()
+    assert await updating is led.state
+    assert led.is_connected
+    await led.disconnect()